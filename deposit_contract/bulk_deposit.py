@@ -0,0 +1,288 @@
+from hashlib import (
+    sha256,
+)
+
+from deposit_contract.contracts.utils import (
+    get_deposit_contract_artifact,
+)
+from deposit_contract.deposit_data import (
+    DepositDataBatch,
+    hash_deposit_data,
+    serialize_deposit_data,
+)
+from deposit_contract.deposit_tree import (
+    ZERO_BYTES32,
+    IncrementalDepositTree,
+)
+from deposit_contract.encoding import (
+    decode_eth2genesis_data,
+    encode_deposit_batch_call,
+    encode_deposit_call,
+)
+from deposit_contract.storage import (
+    CHAIN_STARTED_SLOT,
+    DEPOSIT_COUNT_SLOT,
+    FULL_DEPOSIT_COUNT_SLOT,
+    get_branch_slots,
+)
+
+GWEI = 10**9  # wei
+FULL_DEPOSIT_AMOUNT = 32000000000  # Gwei
+SECONDS_PER_DAY = 86400
+# upper bound for one deposit() call, including the one that emits Eth2Genesis
+DEPOSIT_GAS = 300000
+# upper bound for each further deposit in one deposit_batch() call
+BATCH_DEPOSIT_GAS = 150000
+DEPLOY_GAS = 3000000
+
+
+def get_genesis_time(timestamp):
+    return timestamp - timestamp % SECONDS_PER_DAY + 2 * SECONDS_PER_DAY
+
+
+def make_deposit(index, amount):
+    # the contract does not check keys or signatures, so any unique filler will do
+    return (
+        index.to_bytes(8, 'big') * 6,
+        b'\x00' + index.to_bytes(31, 'big'),
+        amount,
+        index.to_bytes(8, 'big') * 12,
+    )
+
+
+class TransactionFailed(Exception):
+    pass
+
+
+class BulkDepositDriver:
+    """
+    Send deposits straight to the py-evm chain behind an eth-tester ``PyEVMBackend``.
+
+    Transactions are signed and applied to the state of a pending block directly,
+    skipping web3 and eth-tester's per-call normalization. The block's transaction and
+    receipt tries are built once, when it is mined, which happens only once it cannot
+    fit another deposit; until then its transactions are not visible through the
+    chain. Senders rotate over the tester accounts, whose nonces are tracked here, and
+    every deposit is mirrored into an off-chain ``IncrementalDepositTree``.
+    """
+
+    def __init__(self, backend, full_deposit_amount=FULL_DEPOSIT_AMOUNT):
+        self.backend = backend
+        self.full_deposit_amount = full_deposit_amount
+        self.account_keys = list(backend.account_keys)
+        account_db = self.chain.get_vm().state.account_db
+        self.nonces = [
+            account_db.get_nonce(key.public_key.to_canonical_address())
+            for key in self.account_keys
+        ]
+        self.genesis_topic = int.from_bytes(
+            get_deposit_contract_artifact().event_topics['Eth2Genesis'], 'big'
+        )
+        self.next_sender = 0
+        self.tree = IncrementalDepositTree()
+        self.contract_address = None
+        self.genesis = None
+        self.blocks_mined = 0
+        self.gas_used = 0
+        # the VM, header, transactions and receipts of the block being filled
+        self._pending_chain = None
+        self._pending_vm = None
+        self._pending_header = None
+        self._pending_transactions = []
+        self._pending_receipts = []
+
+    @property
+    def chain(self):
+        # the backend swaps its chain object when reverting to the genesis snapshot
+        return self.backend.chain
+
+    def get_pending_vm(self):
+        if self._pending_vm is None or self._pending_chain is not self.chain:
+            # MiningChain.apply_transaction rebuilds the transaction and receipt tries
+            # of the whole pending block on every call, so a full block costs
+            # quadratic time; the pending block is kept here instead
+            self._pending_chain = self.chain
+            self._pending_vm = self.chain.get_vm(self.chain.header)
+            self._pending_header = self._pending_vm.block.header
+            self._pending_transactions = []
+            self._pending_receipts = []
+        return self._pending_vm
+
+    def send_transaction(self, to, data, value=0, gas=DEPOSIT_GAS):
+        sender = self.next_sender
+        self.next_sender = (sender + 1) % len(self.account_keys)
+        vm = self.get_pending_vm()
+        header = self._pending_header
+        if header.gas_limit - header.gas_used < gas:
+            self.mine_block()
+            vm = self.get_pending_vm()
+            header = self._pending_header
+        transaction = vm.create_unsigned_transaction(
+            nonce=self.nonces[sender],
+            gas_price=1,
+            gas=gas,
+            to=to,
+            value=value,
+            data=data,
+        ).as_signed_transaction(self.account_keys[sender])
+        new_header, receipt, computation = vm.apply_transaction(header, transaction)
+        vm.state.account_db.persist()
+        self._pending_header = new_header
+        self._pending_transactions.append(transaction)
+        self._pending_receipts.append(receipt)
+        self.nonces[sender] += 1
+        self.gas_used += new_header.gas_used - header.gas_used
+        if computation.is_error:
+            raise TransactionFailed(computation._error)
+        return receipt, computation, header.timestamp
+
+    def set_storage(self, storage):
+        """
+        Overwrite slots of the contract's storage in the pending block, bypassing
+        ``deposit()``. ``storage`` maps slot numbers to integer values.
+        """
+        account_db = self.get_pending_vm().state.account_db
+        for slot, value in storage.items():
+            account_db.set_storage(self.contract_address, slot, value)
+        account_db.persist()
+        self._pending_header = self._pending_header.copy(state_root=account_db.state_root)
+
+    def seed_deposit_count(self, count, chain_start_threshold):
+        """
+        Make the contract look as if ``count`` full deposits had been made.
+
+        Every branch level a real run would have written by then holds a non-zero
+        node, so that the SSTORE in the next ``deposit()`` costs what it would on a
+        real chain; the nodes themselves are not those of any real tree.
+        """
+        storage = {}
+        for height, slot in enumerate(get_branch_slots()):
+            node = sha256(bytes([height])).digest() if 2**height <= count else ZERO_BYTES32
+            storage[slot] = int.from_bytes(node, 'big')
+        storage[DEPOSIT_COUNT_SLOT] = count
+        storage[FULL_DEPOSIT_COUNT_SLOT] = count
+        storage[CHAIN_STARTED_SLOT] = int(count >= chain_start_threshold)
+        self.set_storage(storage)
+
+    def fast_forward(self, count, amount):
+        """
+        Add ``count`` deposits of ``amount`` Gwei to the off-chain tree and write the
+        resulting branch and counters straight into contract storage, as if they had
+        been sent through ``deposit()``. No ether is transferred and no logs are emitted.
+        """
+        start = len(self.tree)
+        batch = DepositDataBatch.from_deposits(
+            make_deposit(index, amount) for index in range(start, start + count)
+        )
+        leaves = batch.hash_tree_roots()
+        self.tree.extend(leaves[i:i + 32] for i in range(0, len(leaves), 32))
+
+        account_db = self.get_pending_vm().state.account_db
+        full_deposit_count = account_db.get_storage(self.contract_address, FULL_DEPOSIT_COUNT_SLOT)
+        if amount >= self.full_deposit_amount:
+            full_deposit_count += count
+        storage = {
+            slot: int.from_bytes(node, 'big')
+            for slot, node in zip(get_branch_slots(), self.tree.branch)
+        }
+        storage[DEPOSIT_COUNT_SLOT] = len(self.tree)
+        storage[FULL_DEPOSIT_COUNT_SLOT] = full_deposit_count
+        self.set_storage(storage)
+
+    def mine_block(self):
+        vm = self.get_pending_vm()
+        block = vm.set_block_transactions(
+            vm.block,
+            self._pending_header,
+            tuple(self._pending_transactions),
+            tuple(self._pending_receipts),
+        )
+        self.chain.header = block.header
+        self._pending_vm = None
+        self.chain.mine_block()
+        self.blocks_mined += 1
+
+    def deploy(self, bytecode=None):
+        if bytecode is None:
+            bytecode = get_deposit_contract_artifact().bytecode
+        _, computation, _ = self.send_transaction(b'', bytecode, gas=DEPLOY_GAS)
+        self.contract_address = computation.msg.storage_address
+        self.mine_block()
+        return self.contract_address
+
+    def call(self, function_name, arguments=b''):
+        """
+        Send a transaction calling ``function_name`` with the ABI-encoded ``arguments``
+        and return its output.
+        """
+        selector = get_deposit_contract_artifact().function_selectors[function_name]
+        _, computation, _ = self.send_transaction(self.contract_address, selector + arguments)
+        return computation.output
+
+    def deposit(self, pubkey, withdrawal_credentials, amount, signature):
+        receipt, _, timestamp = self.send_transaction(
+            self.contract_address,
+            encode_deposit_call(pubkey, withdrawal_credentials, signature),
+            value=amount * GWEI,
+        )
+        self.tree.append(hash_deposit_data(
+            serialize_deposit_data(pubkey, withdrawal_credentials, amount, signature)
+        ))
+        self.record_genesis(receipt, timestamp)
+        return receipt
+
+    def deposit_batch(self, deposits):
+        """
+        Make ``deposits`` in one ``deposit_batch()`` call of the batch deposit contract.
+        """
+        deposits = list(deposits)
+        receipt, _, timestamp = self.send_transaction(
+            self.contract_address,
+            encode_deposit_batch_call(deposits),
+            value=sum(amount for _, _, amount, _ in deposits) * GWEI,
+            gas=DEPOSIT_GAS + BATCH_DEPOSIT_GAS * (len(deposits) - 1),
+        )
+        for deposit in deposits:
+            self.tree.append(hash_deposit_data(serialize_deposit_data(*deposit)))
+        self.record_genesis(receipt, timestamp)
+        return receipt
+
+    def record_genesis(self, receipt, timestamp):
+        for log in receipt.logs:
+            if log.address == self.contract_address and log.topics[0] == self.genesis_topic:
+                deposit_root, deposit_count, time = decode_eth2genesis_data(log.data)
+                self.genesis = {
+                    'deposit_root': deposit_root,
+                    'deposit_count': deposit_count,
+                    'time': time,
+                    'block_timestamp': timestamp,
+                }
+
+    def run_until_genesis(self, amount, max_deposits):
+        """
+        Deposit ``amount`` Gwei per deposit until ``Eth2Genesis`` is logged or
+        ``max_deposits`` deposits have been made, then mine the pending block.
+        """
+        while self.genesis is None and len(self.tree) < max_deposits:
+            self.deposit(*make_deposit(len(self.tree), amount))
+        self.mine_block()
+        return self.genesis
+
+    def check_genesis(self):
+        """
+        Check the logged ``Eth2Genesis`` against the off-chain tree and the block time.
+        """
+        if self.genesis is None:
+            raise ValueError("No Eth2Genesis log was emitted")
+        expected = (
+            self.tree.get_deposit_root(),
+            len(self.tree),
+            get_genesis_time(self.genesis['block_timestamp']),
+        )
+        actual = (
+            self.genesis['deposit_root'],
+            self.genesis['deposit_count'],
+            self.genesis['time'],
+        )
+        if actual != expected:
+            raise ValueError("Eth2Genesis %r does not match the expected %r" % (actual, expected))
@@ -0,0 +1,94 @@
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
+import functools
+import re
+
+from deposit_contract.contracts.utils import (
+    DEPOSIT_CONTRACT_NAME,
+    compile_contract,
+    get_contract_code,
+    get_deposit_contract_code,
+)
+
+CONSTANT_PATTERN = re.compile(
+    r'^(?P<name>[A-Z][A-Z0-9_]*): constant\((?P<type>\w+)\) = (?P<value>\d+)[ \t]*(#.*)?$',
+    re.MULTILINE,
+)
+
+
+def get_contract_constants(contract_code=None):
+    if contract_code is None:
+        contract_code = get_deposit_contract_code()
+    return {
+        match.group('name'): int(match.group('value'))
+        for match in CONSTANT_PATTERN.finditer(contract_code)
+    }
+
+
+def apply_constant_overrides(contract_code, overrides):
+    """
+    Return ``contract_code`` with the integer constants named in ``overrides`` redefined.
+
+    ``MAX_DEPOSIT_COUNT`` follows an overridden ``DEPOSIT_CONTRACT_TREE_DEPTH``
+    unless it is overridden as well.
+    """
+    constants = get_contract_constants(contract_code)
+    unknown = set(overrides) - set(constants)
+    if unknown:
+        raise ValueError("Unknown contract constants: %s" % ', '.join(sorted(unknown)))
+    for name, value in overrides.items():
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ValueError("Invalid value for %s: %r" % (name, value))
+
+    overrides = dict(overrides)
+    derive_max_deposit_count = all([
+        'DEPOSIT_CONTRACT_TREE_DEPTH' in overrides,
+        'MAX_DEPOSIT_COUNT' in constants,
+        'MAX_DEPOSIT_COUNT' not in overrides,
+    ])
+    if derive_max_deposit_count:
+        overrides['MAX_DEPOSIT_COUNT'] = 2**overrides['DEPOSIT_CONTRACT_TREE_DEPTH'] - 1
+
+    def replace(match):
+        name = match.group('name')
+        if name not in overrides:
+            return match.group(0)
+        # the original comment may describe the old value, so it is dropped
+        return '%s: constant(%s) = %d' % (name, match.group('type'), overrides[name])
+    return CONSTANT_PATTERN.sub(replace, contract_code)
+
+
+@functools.lru_cache(maxsize=None)
+def _build_deposit_contract(contract_name, overrides):
+    contract_code = apply_constant_overrides(get_contract_code(contract_name), dict(overrides))
+    return compile_contract(contract_code)
+
+
+def build_deposit_contract(contract_name=DEPOSIT_CONTRACT_NAME, **overrides):
+    """
+    Return ``{'abi': ..., 'bytecode': ...}`` for the deposit contract with the given
+    constant overrides, e.g. ``build_deposit_contract(CHAIN_START_FULL_DEPOSIT_THRESHOLD=8)``.
+
+    ``contract_name`` selects another contract in ``deposit_contract/contracts``
+    defining the same constants, such as ``OPTIMIZED_DEPOSIT_CONTRACT_NAME``.
+    """
+    return _build_deposit_contract(contract_name, tuple(sorted(overrides.items())))
+
+
+def _build_variant(contract_name, overrides):
+    return build_deposit_contract(contract_name, **overrides)
+
+
+def build_deposit_contract_variants(variants, processes=None, contract_name=DEPOSIT_CONTRACT_NAME):
+    """
+    Build every override set in ``variants`` of the contract ``contract_name`` in
+    parallel worker processes and return the results in the same order.
+    """
+    variants = [dict(overrides) for overrides in variants]
+    # validate up front so that bad input fails before any worker starts
+    contract_code = get_contract_code(contract_name)
+    for overrides in variants:
+        apply_constant_overrides(contract_code, overrides)
+    with ProcessPoolExecutor(processes) as executor:
+        return list(executor.map(functools.partial(_build_variant, contract_name), variants))
@@ -1,16 +1,173 @@
+import copy
+import fcntl
+import functools
+from hashlib import (
+    sha256,
+)
 import json
 import os
+import tempfile
 
 DIR = os.path.dirname(__file__)
+COMPILE_CACHE_DIR_ENV = 'DEPOSIT_CONTRACT_COMPILE_CACHE'
+DEPOSIT_CONTRACT_NAME = 'validator_registration'
+# same ABI, events and roots as the deposit contract, at a lower gas cost
+OPTIMIZED_DEPOSIT_CONTRACT_NAME = 'validator_registration_optimized'
+# the optimized contract with deposit_batch() in place of deposit()
+BATCH_DEPOSIT_CONTRACT_NAME = 'validator_registration_batch'
+
+_compiled_contracts = {}
+
+
+class ContractArtifact:
+    """
+    Compiled contract artifact, parsed on first access and reused afterwards.
+
+    ``bytecode`` is raw bytes, ``function_selectors`` maps function names to their
+    4-byte selectors and ``event_topics`` maps event names to their topic hashes.
+    The parsed ``json`` is shared between callers and must not be modified.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._json = None
+        self._bytecode = None
+        self._function_selectors = None
+        self._event_topics = None
+
+    @property
+    def json(self):
+        if self._json is None:
+            with open(self.file_path) as f:
+                self._json = json.load(f)
+        return self._json
+
+    @property
+    def abi(self):
+        return self.json['abi']
+
+    @property
+    def bytecode_hex(self):
+        return self.json['bytecode']
+
+    @property
+    def bytecode(self):
+        if self._bytecode is None:
+            bytecode_hex = self.bytecode_hex
+            if bytecode_hex.startswith('0x'):
+                bytecode_hex = bytecode_hex[2:]
+            self._bytecode = bytes.fromhex(bytecode_hex)
+        return self._bytecode
+
+    @property
+    def function_selectors(self):
+        if self._function_selectors is None:
+            self._function_selectors = {
+                item['name']: keccak(get_abi_signature(item))[:4]
+                for item in self.abi
+                if item['type'] == 'function'
+            }
+        return self._function_selectors
+
+    @property
+    def event_topics(self):
+        if self._event_topics is None:
+            self._event_topics = {
+                item['name']: keccak(get_abi_signature(item))
+                for item in self.abi
+                if item['type'] == 'event'
+            }
+        return self._event_topics
+
+
+def get_abi_signature(abi_item):
+    return '%s(%s)' % (abi_item['name'], ','.join(item['type'] for item in abi_item['inputs']))
+
+
+def keccak(text):
+    from eth_utils import keccak
+    return keccak(text=text)
+
+
+@functools.lru_cache(maxsize=None)
+def get_contract_code(contract_name):
+    with open(os.path.join(DIR, contract_name + '.v.py')) as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=None)
+def get_contract_artifact(contract_name):
+    return ContractArtifact(os.path.join(DIR, contract_name + '.json'))
 
 
 def get_deposit_contract_code():
-    file_path = os.path.join(DIR, './validator_registration.v.py')
-    deposit_contract_code = open(file_path).read()
-    return deposit_contract_code
+    return get_contract_code(DEPOSIT_CONTRACT_NAME)
+
+
+def get_deposit_contract_artifact():
+    return get_contract_artifact(DEPOSIT_CONTRACT_NAME)
 
 
 def get_deposit_contract_json():
-    file_path = os.path.join(DIR, './validator_registration.json')
-    deposit_contract_json = open(file_path).read()
-    return json.loads(deposit_contract_json)
+    return get_deposit_contract_artifact().json
+
+
+def get_compile_cache_dir():
+    return os.environ.get(
+        COMPILE_CACHE_DIR_ENV,
+        os.path.join(os.path.expanduser('~'), '.cache', 'deposit_contract', 'compiled'),
+    )
+
+
+def get_compiler_version():
+    import vyper
+    version = getattr(vyper, '__version__', None)
+    if version is None:
+        import pkg_resources
+        version = pkg_resources.get_distribution('vyper').version
+    return version
+
+
+def compile_contract(contract_code):
+    """
+    Compile Vyper ``contract_code`` into ``{'abi': ..., 'bytecode': ...}``.
+
+    Results are cached on disk under ``get_compile_cache_dir()``, keyed by the hash of
+    the source and the compiler version, and shared by every process using that
+    directory; a per-entry file lock ensures concurrent callers compile a source once.
+    Every call returns a fresh copy, so callers may modify it.
+    """
+    compiler_version = get_compiler_version()
+    key = sha256(
+        compiler_version.encode('utf-8') + b'\x00' + contract_code.encode('utf-8')
+    ).hexdigest()
+    if key in _compiled_contracts:
+        return copy.deepcopy(_compiled_contracts[key])
+
+    cache_dir = get_compile_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(cache_dir, key + '.json')
+    with open(cache_path + '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            with open(cache_path) as f:
+                contract_json = json.load(f)
+        except (FileNotFoundError, ValueError):
+            from vyper import compiler
+            contract_json = {
+                'abi': compiler.mk_full_signature(contract_code),
+                'bytecode': compiler.compile_code(contract_code)['bytecode'],
+                'compiler_version': compiler_version,
+            }
+            # write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(contract_json, f)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    _compiled_contracts[key] = contract_json
+    return copy.deepcopy(contract_json)
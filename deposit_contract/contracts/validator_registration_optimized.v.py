@@ -0,0 +1,161 @@
+MIN_DEPOSIT_AMOUNT: constant(uint256) = 1000000000  # Gwei
+FULL_DEPOSIT_AMOUNT: constant(uint256) = 32000000000  # Gwei
+CHAIN_START_FULL_DEPOSIT_THRESHOLD: constant(uint256) = 65536  # 2**16
+DEPOSIT_CONTRACT_TREE_DEPTH: constant(uint256) = 32
+SECONDS_PER_DAY: constant(uint256) = 86400
+MAX_64_BIT_VALUE: constant(uint256) = 18446744073709551615  # 2**64 - 1
+PUBKEY_LENGTH: constant(uint256) = 48  # bytes
+WITHDRAWAL_CREDENTIALS_LENGTH: constant(uint256) = 32  # bytes
+SIGNATURE_LENGTH: constant(uint256) = 96  # bytes
+MAX_DEPOSIT_COUNT: constant(uint256) = 4294967295 # 2**DEPOSIT_CONTRACT_TREE_DEPTH - 1
+BYTE_MASK_64: constant(uint256) = 71777214294589695  # 0x00FF00FF00FF00FF
+PAIR_MASK_64: constant(uint256) = 281470681808895  # 0x0000FFFF0000FFFF
+HALF_MASK_64: constant(uint256) = 4294967295  # 0x00000000FFFFFFFF
+BYTE_MASK_128: constant(uint256) = 1324055902416102970674609367438786815  # 0x00FF00FF...00FF, 16 bytes
+PAIR_MASK_128: constant(uint256) = 5192217631581220737344928932233215  # 0x0000FFFF...FFFF, 16 bytes
+HALF_MASK_128: constant(uint256) = 79228162495817593524129366015  # 0x00000000FFFFFFFF00000000FFFFFFFF
+
+Deposit: event({
+    pubkey: bytes[48],
+    withdrawal_credentials: bytes[32],
+    amount: bytes[8],
+    signature: bytes[96],
+    merkle_tree_index: bytes[8],
+})
+Eth2Genesis: event({deposit_root: bytes32, deposit_count: bytes[8], time: bytes[8]})
+
+zerohashes: bytes32[DEPOSIT_CONTRACT_TREE_DEPTH]
+branch: bytes32[DEPOSIT_CONTRACT_TREE_DEPTH]
+deposit_count: uint256
+full_deposit_count: uint256
+chainStarted: public(bool)
+
+
+@public
+def __init__():
+    for i in range(DEPOSIT_CONTRACT_TREE_DEPTH - 1):
+        self.zerohashes[i+1] = sha256(concat(self.zerohashes[i], self.zerohashes[i]))
+
+
+@public
+@constant
+def to_little_endian_64(value: uint256) -> bytes[8]:
+    assert value <= MAX_64_BIT_VALUE
+
+    # reverse the bytes by swapping adjacent bytes, then adjacent byte pairs, then
+    # the two 4-byte halves
+    y: uint256 = bitwise_or(
+        shift(bitwise_and(value, BYTE_MASK_64), 8),
+        bitwise_and(shift(value, -8), BYTE_MASK_64),
+    )
+    y = bitwise_or(
+        shift(bitwise_and(y, PAIR_MASK_64), 16),
+        bitwise_and(shift(y, -16), PAIR_MASK_64),
+    )
+    y = bitwise_or(shift(bitwise_and(y, HALF_MASK_64), 32), shift(y, -32))
+
+    return slice(convert(y, bytes32), start=24, len=8)
+
+
+@public
+@constant
+def get_deposit_root() -> bytes32:
+    root: bytes32 = 0x0000000000000000000000000000000000000000000000000000000000000000
+    size: uint256 = self.deposit_count
+    for h in range(DEPOSIT_CONTRACT_TREE_DEPTH):
+        if bitwise_and(size, 1) == 1:
+            root = sha256(concat(self.branch[h], root))
+        else:
+            root = sha256(concat(root, self.zerohashes[h]))
+        size /= 2
+    return root
+
+@public
+@constant
+def get_deposit_count() -> bytes[8]:
+    return self.to_little_endian_64(self.deposit_count)
+
+@payable
+@public
+def deposit(pubkey: bytes[PUBKEY_LENGTH],
+            withdrawal_credentials: bytes[WITHDRAWAL_CREDENTIALS_LENGTH],
+            signature: bytes[SIGNATURE_LENGTH]):
+    index: uint256 = self.deposit_count
+    # Prevent edge case in computing `self.branch` when `self.deposit_count == MAX_DEPOSIT_COUNT`
+    # NOTE: reaching this point with the constants as currently defined is impossible due to the
+    # uni-directional nature of transfers from eth1 to eth2 and the total ether supply (< 130M).
+    assert index < MAX_DEPOSIT_COUNT
+
+    assert len(pubkey) == PUBKEY_LENGTH
+    assert len(withdrawal_credentials) == WITHDRAWAL_CREDENTIALS_LENGTH
+    assert len(signature) == SIGNATURE_LENGTH
+
+    deposit_amount: uint256 = msg.value / as_wei_value(1, "gwei")
+    assert deposit_amount >= MIN_DEPOSIT_AMOUNT
+    assert deposit_amount <= MAX_64_BIT_VALUE
+
+    # convert the amount and the index to little endian together, with the byte
+    # reversal of to_little_endian_64 applied to both 64-bit halves of the low 128 bits
+    y: uint256 = bitwise_or(shift(deposit_amount, 64), index)
+    y = bitwise_or(
+        shift(bitwise_and(y, BYTE_MASK_128), 8),
+        bitwise_and(shift(y, -8), BYTE_MASK_128),
+    )
+    y = bitwise_or(
+        shift(bitwise_and(y, PAIR_MASK_128), 16),
+        bitwise_and(shift(y, -16), PAIR_MASK_128),
+    )
+    y = bitwise_or(
+        shift(bitwise_and(y, HALF_MASK_128), 32),
+        bitwise_and(shift(y, -32), HALF_MASK_128),
+    )
+    packed: bytes32 = convert(y, bytes32)
+    amount: bytes[8] = slice(packed, start=16, len=8)
+
+    zero_bytes_32: bytes32
+    pubkey_root: bytes32 = sha256(concat(pubkey, slice(zero_bytes_32, start=0, len=16)))
+    signature_root: bytes32 = sha256(concat(
+        sha256(slice(signature, start=0, len=64)),
+        sha256(concat(slice(signature, start=64, len=32), zero_bytes_32))
+    ))
+    node: bytes32 = sha256(concat(
+        sha256(concat(pubkey_root, withdrawal_credentials)),
+        sha256(concat(
+            convert(shift(shift(y, -64), 192), bytes32),  # amount padded to 32 bytes
+            signature_root,
+        ))
+    ))
+
+    # add deposit to merkle tree: hash up through the levels where the new count has
+    # a zero bit and store the node at the first level where it has a one bit
+    size: uint256 = index + 1
+    for height in range(DEPOSIT_CONTRACT_TREE_DEPTH):
+        if bitwise_and(size, 1) == 1:
+            self.branch[height] = node
+            break
+        node = sha256(concat(self.branch[height], node))
+        size /= 2
+
+    self.deposit_count = index + 1
+    log.Deposit(
+        pubkey,
+        withdrawal_credentials,
+        amount,
+        signature,
+        slice(packed, start=24, len=8),
+    )
+
+    if deposit_amount >= FULL_DEPOSIT_AMOUNT:
+        full_count: uint256 = self.full_deposit_count + 1
+        self.full_deposit_count = full_count
+        if full_count == CHAIN_START_FULL_DEPOSIT_THRESHOLD:
+            timestamp_day_boundary: uint256 = (
+                as_unitless_number(block.timestamp) -
+                as_unitless_number(block.timestamp) % SECONDS_PER_DAY +
+                2 * SECONDS_PER_DAY
+            )
+            new_deposit_root: bytes32 = self.get_deposit_root()
+            log.Eth2Genesis(new_deposit_root,
+                            self.to_little_endian_64(index + 1),
+                            self.to_little_endian_64(timestamp_day_boundary))
+            self.chainStarted = True
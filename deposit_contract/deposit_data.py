@@ -0,0 +1,213 @@
+from hashlib import (
+    sha256,
+)
+
+PUBKEY_LENGTH = 48  # bytes
+WITHDRAWAL_CREDENTIALS_LENGTH = 32  # bytes
+AMOUNT_LENGTH = 8  # bytes
+SIGNATURE_LENGTH = 96  # bytes
+
+# DepositData is a constant-sized SSZ container, so its serialization is the
+# concatenation of its fields at these fixed offsets.
+PUBKEY_OFFSET = 0
+WITHDRAWAL_CREDENTIALS_OFFSET = PUBKEY_OFFSET + PUBKEY_LENGTH
+AMOUNT_OFFSET = WITHDRAWAL_CREDENTIALS_OFFSET + WITHDRAWAL_CREDENTIALS_LENGTH
+SIGNATURE_OFFSET = AMOUNT_OFFSET + AMOUNT_LENGTH
+DEPOSIT_DATA_LENGTH = SIGNATURE_OFFSET + SIGNATURE_LENGTH
+
+ZERO_BYTES32 = b'\x00' * 32
+
+
+def hash(data):
+    return sha256(data).digest()
+
+
+def serialize_deposit_data(pubkey, withdrawal_credentials, amount, signature):
+    if len(pubkey) != PUBKEY_LENGTH:
+        raise ValueError("Expected a %d-byte pubkey" % PUBKEY_LENGTH)
+    if len(withdrawal_credentials) != WITHDRAWAL_CREDENTIALS_LENGTH:
+        raise ValueError(
+            "Expected %d-byte withdrawal credentials" % WITHDRAWAL_CREDENTIALS_LENGTH
+        )
+    if len(signature) != SIGNATURE_LENGTH:
+        raise ValueError("Expected a %d-byte signature" % SIGNATURE_LENGTH)
+    return b''.join([
+        pubkey,
+        withdrawal_credentials,
+        amount.to_bytes(AMOUNT_LENGTH, 'little'),
+        signature,
+    ])
+
+
+def hash_deposit_data(serialized):
+    """
+    Return the ``hash_tree_root`` of a serialized DepositData, laid out as in ``deposit()``.
+    """
+    return bytes(hash_deposit_data_batch(serialized))
+
+
+def hash_deposit_data_batch(data, out=None):
+    """
+    Hash every serialized DepositData in the packed buffer ``data`` and write the
+    32-byte roots to ``out`` (a writable buffer, allocated if not given), which is returned.
+
+    Fields are fed to SHA-256 straight from views into ``data`` and zero padding is
+    appended with ``update()``, so no per-leaf lists or concatenated byte strings are built.
+    """
+    data = memoryview(data)
+    if len(data) % DEPOSIT_DATA_LENGTH != 0:
+        raise ValueError("Buffer length must be a multiple of %d" % DEPOSIT_DATA_LENGTH)
+    count = len(data) // DEPOSIT_DATA_LENGTH
+    if out is None:
+        out = bytearray(count * 32)
+    elif len(out) < count * 32:
+        raise ValueError("Output buffer is too small for %d roots" % count)
+    roots = memoryview(out)
+
+    new = sha256
+    zero_16 = ZERO_BYTES32[:16]
+    zero_24 = ZERO_BYTES32[:24]
+    j = 0
+    for i in range(0, count * DEPOSIT_DATA_LENGTH, DEPOSIT_DATA_LENGTH):
+        # pubkey_root = sha256(pubkey ++ zero_bytes_16)
+        pubkey_root = new(data[i + PUBKEY_OFFSET:i + WITHDRAWAL_CREDENTIALS_OFFSET])
+        pubkey_root.update(zero_16)
+        # sha256(pubkey_root ++ withdrawal_credentials)
+        left = new(pubkey_root.digest())
+        left.update(data[i + WITHDRAWAL_CREDENTIALS_OFFSET:i + AMOUNT_OFFSET])
+        # signature_root = sha256(sha256(signature[:64]) ++ sha256(signature[64:] ++ zero_bytes_32))
+        signature_tail = new(data[i + SIGNATURE_OFFSET + 64:i + DEPOSIT_DATA_LENGTH])
+        signature_tail.update(ZERO_BYTES32)
+        signature_root = new(new(data[i + SIGNATURE_OFFSET:i + SIGNATURE_OFFSET + 64]).digest())
+        signature_root.update(signature_tail.digest())
+        # sha256(amount ++ zero_bytes_24 ++ signature_root)
+        right = new(data[i + AMOUNT_OFFSET:i + SIGNATURE_OFFSET])
+        right.update(zero_24)
+        right.update(signature_root.digest())
+
+        root = new(left.digest())
+        root.update(right.digest())
+        roots[j:j + 32] = root.digest()
+        j += 32
+    return out
+
+
+class DepositDataView:
+    """
+    Zero-copy view of one DepositData row of a ``DepositDataBatch``.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    @property
+    def pubkey(self):
+        return self.data[PUBKEY_OFFSET:WITHDRAWAL_CREDENTIALS_OFFSET]
+
+    @property
+    def withdrawal_credentials(self):
+        return self.data[WITHDRAWAL_CREDENTIALS_OFFSET:AMOUNT_OFFSET]
+
+    @property
+    def amount(self):
+        return int.from_bytes(self.data[AMOUNT_OFFSET:SIGNATURE_OFFSET], 'little')
+
+    @property
+    def signature(self):
+        return self.data[SIGNATURE_OFFSET:DEPOSIT_DATA_LENGTH]
+
+    def serialize(self):
+        return bytes(self.data)
+
+    def hash_tree_root(self):
+        return hash_deposit_data(self.data)
+
+
+class DepositDataBatch:
+    """
+    Columnar batch of DepositData stored in one contiguous buffer.
+
+    Each row is the 184-byte SSZ serialization of a DepositData, so the pubkey,
+    withdrawal_credentials, amount (uint64, little-endian) and signature columns
+    are fixed-width strided slices of the same buffer.
+
+    With ``copy=False`` the batch takes ownership of ``data``, which must be a
+    ``bytearray`` the caller no longer modifies, instead of copying it.
+    """
+
+    def __init__(self, data=b'', copy=True):
+        if len(data) % DEPOSIT_DATA_LENGTH != 0:
+            raise ValueError(
+                "Buffer length must be a multiple of %d" % DEPOSIT_DATA_LENGTH
+            )
+        if copy:
+            data = bytearray(data)
+        elif not isinstance(data, bytearray):
+            raise TypeError("Only a bytearray can be used without copying")
+        self._buffer = data
+        self._count = len(data) // DEPOSIT_DATA_LENGTH
+
+    @classmethod
+    def from_deposits(cls, deposits):
+        batch = cls()
+        for pubkey, withdrawal_credentials, amount, signature in deposits:
+            batch.append(pubkey, withdrawal_credentials, amount, signature)
+        return batch
+
+    @classmethod
+    def from_numpy(cls, array):
+        return cls(array.tobytes())
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        index = range(self._count)[index]
+        start = index * DEPOSIT_DATA_LENGTH
+        return DepositDataView(memoryview(self._buffer)[start:start + DEPOSIT_DATA_LENGTH])
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    @property
+    def data(self):
+        """
+        Zero-copy view of the serialized rows.
+        """
+        return memoryview(self._buffer)[:self._count * DEPOSIT_DATA_LENGTH]
+
+    def append(self, pubkey, withdrawal_credentials, amount, signature):
+        row = serialize_deposit_data(pubkey, withdrawal_credentials, amount, signature)
+        end = (self._count + 1) * DEPOSIT_DATA_LENGTH
+        if end > len(self._buffer):
+            # Grow into a new buffer rather than resizing in place, so that views
+            # handed out earlier stay valid.
+            buffer = bytearray(max(end, 2 * len(self._buffer)))
+            buffer[:len(self._buffer)] = self._buffer
+            self._buffer = buffer
+        self._buffer[end - DEPOSIT_DATA_LENGTH:end] = row
+        self._count += 1
+
+    def serialize(self):
+        return bytes(self.data)
+
+    def hash_tree_roots(self):
+        """
+        Return the ``hash_tree_root`` of every row as one packed buffer of 32-byte roots.
+        """
+        return hash_deposit_data_batch(self.data)
+
+    def to_numpy(self):
+        """
+        Return a NumPy structured array sharing memory with this batch.
+        """
+        import numpy as np
+
+        dtype = np.dtype([
+            ('pubkey', np.uint8, (PUBKEY_LENGTH,)),
+            ('withdrawal_credentials', np.uint8, (WITHDRAWAL_CREDENTIALS_LENGTH,)),
+            ('amount', '<u8'),
+            ('signature', np.uint8, (SIGNATURE_LENGTH,)),
+        ])
+        return np.frombuffer(self.data, dtype=dtype)
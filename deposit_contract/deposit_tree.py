@@ -0,0 +1,320 @@
+from hashlib import (
+    sha256,
+)
+
+DEPOSIT_CONTRACT_TREE_DEPTH = 32
+MAX_DEPOSIT_COUNT = 2**DEPOSIT_CONTRACT_TREE_DEPTH - 1
+ZERO_BYTES32 = b'\x00' * 32
+
+
+def hash(data):
+    return sha256(data).digest()
+
+
+def compute_zerohashes(depth):
+    zerohashes = [ZERO_BYTES32]
+    for i in range(depth - 1):
+        zerohashes.append(hash(zerohashes[i] + zerohashes[i]))
+    return zerohashes
+
+
+# Roots of all-zero subtrees of height 0..DEPOSIT_CONTRACT_TREE_DEPTH; the first
+# DEPOSIT_CONTRACT_TREE_DEPTH entries are the contract's `zerohashes`.
+ZEROHASHES = compute_zerohashes(DEPOSIT_CONTRACT_TREE_DEPTH + 1)
+
+
+class IncrementalDepositTree:
+    """
+    Off-chain replica of the deposit contract's Merkle tree state.
+
+    Only the rightmost ``branch`` is kept, exactly like the contract, so each
+    append and each root computation costs ``DEPOSIT_CONTRACT_TREE_DEPTH`` hashes at most.
+    """
+
+    def __init__(self, branch=None, deposit_count=0):
+        if branch is None:
+            branch = [ZERO_BYTES32] * DEPOSIT_CONTRACT_TREE_DEPTH
+        if len(branch) != DEPOSIT_CONTRACT_TREE_DEPTH:
+            raise ValueError("Expected a branch of %d nodes" % DEPOSIT_CONTRACT_TREE_DEPTH)
+        if not 0 <= deposit_count <= MAX_DEPOSIT_COUNT:
+            raise ValueError("Invalid deposit count: %d" % deposit_count)
+        self.branch = list(branch)
+        self.deposit_count = deposit_count
+
+    def __len__(self):
+        return self.deposit_count
+
+    def append(self, leaf):
+        if len(leaf) != 32:
+            raise ValueError("Expected a 32-byte leaf")
+        if self.deposit_count >= MAX_DEPOSIT_COUNT:
+            raise ValueError("Deposit tree is full")
+
+        # height of the lowest zero bit of the new deposit count, as in `deposit()`
+        i = 0
+        size = self.deposit_count + 1
+        while size & 1 == 0:
+            i += 1
+            size >>= 1
+
+        value = leaf
+        for j in range(i):
+            value = hash(self.branch[j] + value)
+        self.branch[i] = value
+        self.deposit_count += 1
+
+    def extend(self, leaves):
+        for leaf in leaves:
+            self.append(leaf)
+
+    def get_deposit_root(self):
+        root = ZERO_BYTES32
+        size = self.deposit_count
+        for h in range(DEPOSIT_CONTRACT_TREE_DEPTH):
+            if size & 1 == 1:
+                root = hash(self.branch[h] + root)
+            else:
+                root = hash(root + ZEROHASHES[h])
+            size >>= 1
+        return root
+
+    def copy(self):
+        return self.__class__(self.branch, self.deposit_count)
+
+
+def hash_pair(left, right):
+    # accepts any bytes-like nodes, including views into packed level buffers
+    h = sha256(left)
+    h.update(right)
+    return h.digest()
+
+
+def hash_level(nodes, height):
+    """
+    Hash a packed buffer of nodes of ``height`` into the packed buffer of their
+    parents, pairing an odd last node with ``ZEROHASHES[height]``.
+    """
+    nodes = memoryview(nodes)
+    count = len(nodes) // 32
+    parents = bytearray(((count + 1) // 2) * 32)
+    for j in range(count // 2):
+        parents[j * 32:j * 32 + 32] = sha256(nodes[j * 64:j * 64 + 64]).digest()
+    if count & 1:
+        parents[-32:] = hash_pair(nodes[-32:], ZEROHASHES[height])
+    return parents
+
+
+def compute_subtree_root(nodes, height, subtree_height):
+    """
+    Return the root of the subtree of ``subtree_height`` whose leftmost nodes of
+    ``height`` are the packed ``nodes``, all further nodes being zero subtrees.
+    """
+    for h in range(height, subtree_height):
+        nodes = hash_level(nodes, h)
+    if len(nodes) == 0:
+        return ZEROHASHES[subtree_height]
+    return bytes(nodes[:32])
+
+
+def verify_merkle_branch(leaf, branch, index, root):
+    value = leaf
+    for h, node in enumerate(branch):
+        if (index >> h) & 1:
+            value = hash_pair(node, value)
+        else:
+            value = hash_pair(value, node)
+    return value == root
+
+
+class DepositTree:
+    """
+    Deposit tree keeping every node so that proofs can be served for any deposit.
+
+    ``levels[h]`` is one packed buffer holding the 32-byte nodes of height ``h``,
+    left to right; nodes past the last deposit are implicitly ``ZEROHASHES[h]``.
+    """
+
+    def __init__(self, levels=None, deposit_count=0):
+        if levels is None:
+            levels = [bytearray() for _ in range(DEPOSIT_CONTRACT_TREE_DEPTH + 1)]
+        if len(levels) != DEPOSIT_CONTRACT_TREE_DEPTH + 1:
+            raise ValueError("Expected %d levels" % (DEPOSIT_CONTRACT_TREE_DEPTH + 1))
+        if not 0 <= deposit_count <= MAX_DEPOSIT_COUNT:
+            raise ValueError("Invalid deposit count: %d" % deposit_count)
+        self.levels = levels
+        self.deposit_count = deposit_count
+
+    @classmethod
+    def from_leaves(cls, leaves):
+        """
+        Build the tree bottom-up from ``leaves``, either a sequence of 32-byte leaves
+        or a packed buffer of them, hashing each node exactly once.
+        """
+        if not isinstance(leaves, (bytes, bytearray, memoryview)):
+            leaves = b''.join(leaves)
+        if len(leaves) % 32 != 0:
+            raise ValueError("Leaf buffer length must be a multiple of 32")
+        deposit_count = len(leaves) // 32
+        if deposit_count > MAX_DEPOSIT_COUNT:
+            raise ValueError("Too many leaves for the deposit tree")
+
+        levels = [bytearray(leaves)]
+        for h in range(DEPOSIT_CONTRACT_TREE_DEPTH):
+            levels.append(hash_level(levels[h], h))
+        return cls(levels, deposit_count)
+
+    def __len__(self):
+        return self.deposit_count
+
+    def node_count(self, height):
+        return (self.deposit_count + (1 << height) - 1) >> height
+
+    def get_node(self, height, index):
+        if index >= self.node_count(height):
+            return ZEROHASHES[height]
+        return bytes(self.levels[height][index * 32:index * 32 + 32])
+
+    def get_leaf(self, index):
+        if not 0 <= index < self.deposit_count:
+            raise IndexError("Deposit index out of range: %d" % index)
+        return self.get_node(0, index)
+
+    def append(self, leaf):
+        if len(leaf) != 32:
+            raise ValueError("Expected a 32-byte leaf")
+        if self.deposit_count >= MAX_DEPOSIT_COUNT:
+            raise ValueError("Deposit tree is full")
+
+        # the new leaf is always the rightmost one, so its right-hand siblings are all zero
+        index = self.deposit_count
+        node = bytes(leaf)
+        self.levels[0][index * 32:index * 32 + 32] = node
+        for h in range(DEPOSIT_CONTRACT_TREE_DEPTH):
+            level = self.levels[h]
+            if index & 1:
+                node = hash_pair(level[index * 32 - 32:index * 32], node)
+            else:
+                node = hash_pair(node, ZEROHASHES[h])
+            index >>= 1
+            self.levels[h + 1][index * 32:index * 32 + 32] = node
+        self.deposit_count += 1
+
+    def extend(self, leaves):
+        for leaf in leaves:
+            self.append(leaf)
+
+    def rollback(self, deposit_count):
+        """
+        Drop every deposit from index ``deposit_count`` on, as if they were never appended.
+        """
+        if not 0 <= deposit_count <= self.deposit_count:
+            raise ValueError("Cannot roll back to deposit count %d" % deposit_count)
+        self.deposit_count = deposit_count
+        for h, level in enumerate(self.levels):
+            del level[self.node_count(h) * 32:]
+        if deposit_count == 0:
+            return
+        # the rightmost node of each level also covered the dropped leaves
+        index = deposit_count - 1
+        for h in range(DEPOSIT_CONTRACT_TREE_DEPTH):
+            level = self.levels[h]
+            left = (index & ~1) * 32
+            if index & 1:
+                node = hash_pair(level[left:left + 32], level[left + 32:left + 64])
+            else:
+                node = hash_pair(level[left:left + 32], ZEROHASHES[h])
+            index >>= 1
+            self.levels[h + 1][index * 32:index * 32 + 32] = node
+
+    def get_deposit_root(self):
+        return self.get_node(DEPOSIT_CONTRACT_TREE_DEPTH, 0)
+
+    def _check_historical_count(self, deposit_count):
+        if not 0 <= deposit_count <= self.deposit_count:
+            raise ValueError("Deposit count out of range: %d" % deposit_count)
+
+    def _get_edge_at(self, deposit_count):
+        # The nodes of the tree of the first `deposit_count` leaves are the stored ones
+        # left of its right edge and zero subtrees right of it, so only the edge node
+        # of each height, at index `deposit_count >> h`, differs from what is stored.
+        edge = [ZERO_BYTES32]
+        node = ZERO_BYTES32
+        for h in range(DEPOSIT_CONTRACT_TREE_DEPTH):
+            index = deposit_count >> h
+            if index & 1:
+                node = hash_pair(self.get_node(h, index - 1), node)
+            else:
+                node = hash_pair(node, ZEROHASHES[h])
+            edge.append(node)
+        return edge
+
+    def get_root_at(self, deposit_count):
+        """
+        Return the root the contract had after its first ``deposit_count`` deposits,
+        in ``DEPOSIT_CONTRACT_TREE_DEPTH`` hashes.
+        """
+        return self.get_roots_at([deposit_count])[0]
+
+    def get_roots_at(self, deposit_counts):
+        """
+        Return ``get_root_at(count)`` for each of ``deposit_counts``, computed level by
+        level for all of them in one pass and once per distinct count.
+        """
+        deposit_counts = list(deposit_counts)
+        for deposit_count in deposit_counts:
+            self._check_historical_count(deposit_count)
+        counts = sorted(set(deposit_counts))
+        nodes = [ZERO_BYTES32] * len(counts)
+        for h in range(DEPOSIT_CONTRACT_TREE_DEPTH):
+            for i, deposit_count in enumerate(counts):
+                index = deposit_count >> h
+                if index & 1:
+                    nodes[i] = hash_pair(self.get_node(h, index - 1), nodes[i])
+                else:
+                    nodes[i] = hash_pair(nodes[i], ZEROHASHES[h])
+        roots = dict(zip(counts, nodes))
+        return [roots[deposit_count] for deposit_count in deposit_counts]
+
+    def get_proof_at(self, index, deposit_count):
+        """
+        Return the proof of deposit ``index`` against ``get_root_at(deposit_count)``.
+        """
+        return self.get_proofs_at([index], deposit_count)[0]
+
+    def get_proofs_at(self, indices, deposit_count):
+        """
+        Return ``get_proof_at(index, deposit_count)`` for each of ``indices``, sharing
+        the computation of the tree's right edge at ``deposit_count``.
+        """
+        self._check_historical_count(deposit_count)
+        indices = list(indices)
+        for index in indices:
+            if not 0 <= index < deposit_count:
+                raise IndexError("Deposit index out of range: %d" % index)
+        edge = self._get_edge_at(deposit_count)
+        proofs = []
+        for index in indices:
+            proof = []
+            for h in range(DEPOSIT_CONTRACT_TREE_DEPTH):
+                sibling = (index >> h) ^ 1
+                edge_index = deposit_count >> h
+                if sibling < edge_index:
+                    proof.append(self.get_node(h, sibling))
+                elif sibling == edge_index:
+                    proof.append(edge[h])
+                else:
+                    proof.append(ZEROHASHES[h])
+            proofs.append(proof)
+        return proofs
+
+    def get_proof(self, index):
+        """
+        Return the ``DEPOSIT_CONTRACT_TREE_DEPTH`` sibling nodes, leaf level first,
+        proving deposit ``index`` against the current ``get_deposit_root()``.
+        """
+        if not 0 <= index < self.deposit_count:
+            raise IndexError("Deposit index out of range: %d" % index)
+        return [
+            self.get_node(h, (index >> h) ^ 1)
+            for h in range(DEPOSIT_CONTRACT_TREE_DEPTH)
+        ]
@@ -0,0 +1,287 @@
+import fcntl
+import mmap
+import os
+import struct
+import zlib
+
+from deposit_contract.deposit_tree import (
+    DEPOSIT_CONTRACT_TREE_DEPTH,
+    MAX_DEPOSIT_COUNT,
+    ZEROHASHES,
+    DepositTree,
+    hash_level,
+    hash_pair,
+)
+
+MAGIC = b'DEPTREE\x00'
+FORMAT_VERSION = 1
+HEADER_SIZE = 4096
+# magic, format version, tree depth, leaf capacity
+HEADER_FORMAT = '<8sIIQ'
+# sequence number, deposit count, crc32 of the two
+COMMIT_SLOT_FORMAT = '<QQI'
+COMMIT_SLOT_SIZE = struct.calcsize(COMMIT_SLOT_FORMAT)
+COMMIT_SLOT_OFFSETS = (64, 128)
+PAGE_SIZE = mmap.ALLOCATIONGRANULARITY
+
+
+def level_offsets(capacity):
+    offsets = []
+    offset = HEADER_SIZE
+    for h in range(DEPOSIT_CONTRACT_TREE_DEPTH + 1):
+        offsets.append(offset)
+        offset += max((capacity + (1 << h) - 1) >> h, 1) * 32
+    return offsets, offset
+
+
+def pack_commit_slot(sequence, deposit_count):
+    data = struct.pack('<QQ', sequence, deposit_count)
+    return data + struct.pack('<I', zlib.crc32(data))
+
+
+def unpack_commit_slot(data):
+    sequence, deposit_count, crc = struct.unpack(COMMIT_SLOT_FORMAT, data)
+    if zlib.crc32(data[:16]) != crc:
+        return None
+    return sequence, deposit_count
+
+
+class DepositTreeFile(DepositTree):
+    """
+    ``DepositTree`` persisted in a memory-mapped file.
+
+    The file is a header page followed by one region per level, each sized for
+    ``capacity`` leaves. The file is created sparse, so only written nodes use disk.
+    A node is written once, when its subtree becomes complete; the partial nodes
+    on the right edge are recomputed in memory from complete nodes in O(depth).
+    Appends become visible to readers on ``commit()``, which flushes the nodes and
+    then publishes the new deposit count in one of two checksummed header slots,
+    so a crash at any point leaves the previously committed tree intact.
+
+    Any number of read-only instances may map the same file as one writer;
+    readers pick up new commits with ``refresh()``.
+    """
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.writable = writable
+        self._file = open(path, 'r+b' if writable else 'rb')
+        try:
+            if writable:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._mmap = mmap.mmap(
+                self._file.fileno(),
+                0,
+                access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ,
+            )
+        except Exception:
+            self._file.close()
+            raise
+
+        magic, version, depth, capacity = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or depth != DEPOSIT_CONTRACT_TREE_DEPTH:
+            self.close()
+            raise ValueError("Not a deposit tree file: %s" % path)
+        offsets, size = level_offsets(capacity)
+        if len(self._mmap) != size:
+            self.close()
+            raise ValueError("Deposit tree file has unexpected size: %s" % path)
+
+        self.capacity = capacity
+        self._offsets = offsets
+        self._view = memoryview(self._mmap)
+        levels = [
+            self._view[offsets[h]:offsets[h + 1] if h < DEPOSIT_CONTRACT_TREE_DEPTH else size]
+            for h in range(DEPOSIT_CONTRACT_TREE_DEPTH + 1)
+        ]
+        self._dirty_pages = set()
+        self._edge = list(ZEROHASHES)
+        self._sequence = -1
+        super().__init__(levels, 0)
+        self.refresh()
+
+    @classmethod
+    def create(cls, path, capacity=MAX_DEPOSIT_COUNT + 1):
+        if not 1 <= capacity <= MAX_DEPOSIT_COUNT + 1:
+            raise ValueError("Invalid capacity: %d" % capacity)
+        _, size = level_offsets(capacity)
+        with open(path, 'xb') as f:
+            f.write(struct.pack(
+                HEADER_FORMAT,
+                MAGIC,
+                FORMAT_VERSION,
+                DEPOSIT_CONTRACT_TREE_DEPTH,
+                capacity,
+            ))
+            f.seek(COMMIT_SLOT_OFFSETS[0])
+            f.write(pack_commit_slot(0, 0))
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+        return cls(path, writable=True)
+
+    @classmethod
+    def from_leaves(cls, path, leaves, capacity=MAX_DEPOSIT_COUNT + 1):
+        """
+        Create a tree file at ``path`` holding ``leaves``, either a sequence of 32-byte
+        leaves or a packed buffer of them, and commit it.
+
+        Like ``DepositTree.from_leaves`` the tree is built bottom-up, one level at a
+        time, but only the nodes of complete subtrees are written to the file.
+        """
+        if not isinstance(leaves, (bytes, bytearray, memoryview)):
+            leaves = b''.join(leaves)
+        if len(leaves) % 32 != 0:
+            raise ValueError("Leaf buffer length must be a multiple of 32")
+        deposit_count = len(leaves) // 32
+        if deposit_count > min(capacity, MAX_DEPOSIT_COUNT):
+            raise ValueError("Too many leaves for the deposit tree")
+
+        tree = cls.create(path, capacity)
+        try:
+            nodes = leaves
+            for h in range(DEPOSIT_CONTRACT_TREE_DEPTH + 1):
+                tree._write_nodes(h, memoryview(nodes)[:(deposit_count >> h) * 32])
+                if h < DEPOSIT_CONTRACT_TREE_DEPTH:
+                    nodes = hash_level(nodes, h)
+            tree.deposit_count = deposit_count
+            if deposit_count > 0:
+                tree._update_edge(deposit_count - 1, bytes(leaves[-32:]))
+            tree.commit()
+        except BaseException:
+            tree.close()
+            os.unlink(path)
+            raise
+        return tree
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if getattr(self, 'levels', None) is not None:
+            for level in self.levels:
+                level.release()
+            self.levels = None
+        if getattr(self, '_view', None) is not None:
+            self._view.release()
+            self._view = None
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+    def _read_commit(self):
+        commits = []
+        for offset in COMMIT_SLOT_OFFSETS:
+            commit = unpack_commit_slot(self._mmap[offset:offset + COMMIT_SLOT_SIZE])
+            if commit is not None:
+                commits.append(commit)
+        if not commits:
+            raise ValueError("Deposit tree file has no valid commit: %s" % self.path)
+        return max(commits)
+
+    def refresh(self):
+        """
+        Load the latest committed deposit count, discarding uncommitted appends.
+        """
+        sequence, deposit_count = self._read_commit()
+        if sequence == self._sequence and deposit_count == self.deposit_count:
+            return
+        self._sequence = sequence
+        self.deposit_count = deposit_count
+        self._edge = list(ZEROHASHES)
+        if deposit_count > 0:
+            index = deposit_count - 1
+            self._update_edge(index, bytes(self.levels[0][index * 32:index * 32 + 32]))
+
+    def _update_edge(self, index, leaf, write=False):
+        # recompute the rightmost node of every level for a tree whose last leaf is `index`
+        node = leaf
+        self._edge[0] = node
+        for h in range(DEPOSIT_CONTRACT_TREE_DEPTH):
+            if index & 1:
+                node = hash_pair(self.levels[h][index * 32 - 32:index * 32], node)
+            else:
+                node = hash_pair(node, ZEROHASHES[h])
+            index >>= 1
+            self._edge[h + 1] = node
+            if write and (index + 1) << (h + 1) == self.deposit_count:
+                self._write_node(h + 1, index, node)
+
+    def _write_node(self, height, index, node):
+        start = index * 32
+        self.levels[height][start:start + 32] = node
+        self._dirty_pages.add((self._offsets[height] + start) // PAGE_SIZE)
+
+    def _write_nodes(self, height, nodes):
+        # write the packed ``nodes`` from the start of the level
+        if len(nodes) == 0:
+            return
+        start = self._offsets[height]
+        self.levels[height][:len(nodes)] = nodes
+        last_page = (start + len(nodes) - 1) // PAGE_SIZE
+        self._dirty_pages.update(range(start // PAGE_SIZE, last_page + 1))
+
+    def get_node(self, height, index):
+        node_count = self.node_count(height)
+        if index >= node_count:
+            return ZEROHASHES[height]
+        if index == node_count - 1:
+            return self._edge[height]
+        return bytes(self.levels[height][index * 32:index * 32 + 32])
+
+    def append(self, leaf):
+        if not self.writable:
+            raise ValueError("Deposit tree file is opened read-only")
+        if len(leaf) != 32:
+            raise ValueError("Expected a 32-byte leaf")
+        if self.deposit_count >= min(self.capacity, MAX_DEPOSIT_COUNT):
+            raise ValueError("Deposit tree is full")
+
+        index = self.deposit_count
+        self._write_node(0, index, leaf)
+        self.deposit_count += 1
+        self._update_edge(index, bytes(leaf), write=True)
+
+    def rollback(self, deposit_count):
+        """
+        Drop every deposit from index ``deposit_count`` on and commit the smaller count.
+
+        The rollback is committed at once, so that later appends never overwrite nodes
+        of a committed tree.
+        """
+        if not self.writable:
+            raise ValueError("Deposit tree file is opened read-only")
+        if not 0 <= deposit_count <= self.deposit_count:
+            raise ValueError("Cannot roll back to deposit count %d" % deposit_count)
+        # nodes of complete subtrees left of the new edge are still valid
+        self.deposit_count = deposit_count
+        self._edge = list(ZEROHASHES)
+        if deposit_count > 0:
+            index = deposit_count - 1
+            self._update_edge(index, bytes(self.levels[0][index * 32:index * 32 + 32]))
+        self.commit()
+
+    def commit(self):
+        if not self.writable:
+            raise ValueError("Deposit tree file is opened read-only")
+        # make the nodes durable before publishing the count that refers to them
+        pages = sorted(self._dirty_pages)
+        first = 0
+        for i, page in enumerate(pages):
+            if i + 1 == len(pages) or pages[i + 1] != page + 1:
+                start = pages[first] * PAGE_SIZE
+                self._mmap.flush(start, min((page + 1) * PAGE_SIZE, len(self._mmap)) - start)
+                first = i + 1
+        self._dirty_pages.clear()
+
+        sequence = self._sequence + 1
+        offset = COMMIT_SLOT_OFFSETS[sequence % 2]
+        self._mmap[offset:offset + COMMIT_SLOT_SIZE] = pack_commit_slot(
+            sequence,
+            self.deposit_count,
+        )
+        self._mmap.flush(0, HEADER_SIZE)
+        self._sequence = sequence
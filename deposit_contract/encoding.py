@@ -0,0 +1,216 @@
+from deposit_contract.contracts.utils import (
+    BATCH_DEPOSIT_CONTRACT_NAME,
+    get_contract_artifact,
+    get_deposit_contract_artifact,
+)
+from deposit_contract.deposit_data import (
+    AMOUNT_LENGTH,
+    DEPOSIT_DATA_LENGTH,
+    PUBKEY_LENGTH,
+    SIGNATURE_LENGTH,
+    WITHDRAWAL_CREDENTIALS_LENGTH,
+    DepositDataBatch,
+)
+
+WORD_LENGTH = 32  # bytes
+MERKLE_TREE_INDEX_LENGTH = 8  # bytes
+
+
+def pad_right(data):
+    return bytes(data) + b'\x00' * (-len(data) % WORD_LENGTH)
+
+
+def encode_uint256(value):
+    return value.to_bytes(WORD_LENGTH, 'big')
+
+
+def encode_bytes_arguments(*values, static_arguments=b''):
+    """
+    ABI-encode a sequence of dynamic ``bytes`` arguments, without a selector.
+
+    ``static_arguments`` are the already encoded static arguments that follow them,
+    such as a fixed-size array, and go into the head after the offset words.
+    """
+    head = []
+    tail = []
+    offset = len(values) * WORD_LENGTH + len(static_arguments)
+    for value in values:
+        head.append(encode_uint256(offset))
+        encoded = encode_uint256(len(value)) + pad_right(value)
+        tail.append(encoded)
+        offset += len(encoded)
+    return b''.join(head + [static_arguments] + tail)
+
+
+def decode_bytes_argument(data, position):
+    """
+    Return the dynamic ``bytes`` value whose head word is the ``position``-th of ``data``.
+    """
+    head_end = (position + 1) * WORD_LENGTH
+    if head_end > len(data):
+        raise ValueError("ABI-encoded data has no head word %d" % position)
+    offset = int.from_bytes(data[head_end - WORD_LENGTH:head_end], 'big')
+    if offset % WORD_LENGTH != 0 or offset < head_end:
+        raise ValueError("Invalid offset %d for ABI-encoded bytes" % offset)
+    if offset + WORD_LENGTH > len(data):
+        raise ValueError("ABI-encoded bytes offset %d is past the end of the data" % offset)
+    length = int.from_bytes(data[offset:offset + WORD_LENGTH], 'big')
+    start = offset + WORD_LENGTH
+    if start + length > len(data):
+        raise ValueError("ABI-encoded bytes run past the end of the data")
+    return bytes(data[start:start + length])
+
+
+def encode_deposit_call(pubkey, withdrawal_credentials, signature):
+    """
+    Return the calldata of ``deposit(pubkey, withdrawal_credentials, signature)``.
+    """
+    selector = get_deposit_contract_artifact().function_selectors['deposit']
+    return selector + encode_bytes_arguments(pubkey, withdrawal_credentials, signature)
+
+
+def get_max_deposit_batch_size():
+    """
+    Return the length of the ``amounts`` array taken by ``deposit_batch()``.
+    """
+    abi = get_contract_artifact(BATCH_DEPOSIT_CONTRACT_NAME).abi
+    function = next(item for item in abi if item.get('name') == 'deposit_batch')
+    amounts_type = function['inputs'][-1]['type']  # e.g. 'uint256[16]'
+    return int(amounts_type[amounts_type.index('[') + 1:-1])
+
+
+def encode_deposit_batch_call(deposits):
+    """
+    Return the calldata of ``deposit_batch()`` for ``deposits``, a sequence of
+    ``(pubkey, withdrawal_credentials, amount, signature)`` tuples with amounts in Gwei.
+
+    The call must send the sum of the amounts as its value.
+    """
+    deposits = list(deposits)
+    max_batch_size = get_max_deposit_batch_size()
+    if not 0 < len(deposits) <= max_batch_size:
+        raise ValueError("A batch holds between 1 and %d deposits" % max_batch_size)
+    for pubkey, withdrawal_credentials, _, signature in deposits:
+        if len(pubkey) != PUBKEY_LENGTH:
+            raise ValueError("Expected a %d-byte pubkey" % PUBKEY_LENGTH)
+        if len(withdrawal_credentials) != WITHDRAWAL_CREDENTIALS_LENGTH:
+            raise ValueError(
+                "Expected %d-byte withdrawal credentials" % WITHDRAWAL_CREDENTIALS_LENGTH
+            )
+        if len(signature) != SIGNATURE_LENGTH:
+            raise ValueError("Expected a %d-byte signature" % SIGNATURE_LENGTH)
+
+    pubkeys, withdrawal_credentials, amounts, signatures = zip(*deposits)
+    amounts = list(amounts) + [0] * (max_batch_size - len(deposits))
+    artifact = get_contract_artifact(BATCH_DEPOSIT_CONTRACT_NAME)
+    return artifact.function_selectors['deposit_batch'] + encode_bytes_arguments(
+        b''.join(pubkeys),
+        b''.join(withdrawal_credentials),
+        b''.join(signatures),
+        static_arguments=b''.join(encode_uint256(amount) for amount in amounts),
+    )
+
+
+def decode_eth2genesis_data(data):
+    """
+    Decode the data of an ``Eth2Genesis`` log into ``(deposit_root, deposit_count, time)``.
+    """
+    deposit_root = bytes(data[:WORD_LENGTH])
+    deposit_count = int.from_bytes(decode_bytes_argument(data, 1), 'little')
+    time = int.from_bytes(decode_bytes_argument(data, 2), 'little')
+    return deposit_root, deposit_count, time
+
+
+def _get_deposit_log_layout():
+    # The five fields of a Deposit log are dynamic ``bytes`` of fixed sizes, so the
+    # data always has the same layout: the offset words, then a length word and the
+    # zero-padded value of each field. Everything but the values is constant.
+    lengths = (
+        PUBKEY_LENGTH,
+        WITHDRAWAL_CREDENTIALS_LENGTH,
+        AMOUNT_LENGTH,
+        SIGNATURE_LENGTH,
+        MERKLE_TREE_INDEX_LENGTH,
+    )
+    template = bytearray(encode_bytes_arguments(*(b'\x00' * length for length in lengths)))
+    value_starts = []
+    gaps = []
+    gap_start = 0
+    for position, length in enumerate(lengths):
+        head_word = template[position * WORD_LENGTH:(position + 1) * WORD_LENGTH]
+        value_start = int.from_bytes(head_word, 'big') + WORD_LENGTH
+        value_starts.append(value_start)
+        gaps.append((gap_start, value_start))
+        gap_start = value_start + length
+    gaps.append((gap_start, len(template)))
+    # (start, end, expected bytes) of every stretch between two values
+    checks = tuple((start, end, bytes(template[start:end])) for start, end in gaps if end > start)
+    fields = tuple((start, start + length) for start, length in zip(value_starts, lengths))
+    return len(template), checks, fields
+
+
+DEPOSIT_LOG_DATA_LENGTH, _DEPOSIT_LOG_CHECKS, _DEPOSIT_LOG_FIELDS = _get_deposit_log_layout()
+(
+    (_PUBKEY_START, _PUBKEY_END),
+    (_WITHDRAWAL_CREDENTIALS_START, _WITHDRAWAL_CREDENTIALS_END),
+    (_AMOUNT_START, _AMOUNT_END),
+    (_SIGNATURE_START, _SIGNATURE_END),
+    (_MERKLE_TREE_INDEX_START, _MERKLE_TREE_INDEX_END),
+) = _DEPOSIT_LOG_FIELDS
+
+
+def _check_deposit_log_data(data):
+    if len(data) != DEPOSIT_LOG_DATA_LENGTH:
+        raise ValueError(
+            "Deposit log data must be %d bytes, got %d" % (DEPOSIT_LOG_DATA_LENGTH, len(data))
+        )
+    for start, end, expected in _DEPOSIT_LOG_CHECKS:
+        if data[start:end] != expected:
+            raise ValueError(
+                "Malformed Deposit log data: unexpected offsets, lengths or padding "
+                "in bytes %d-%d" % (start, end)
+            )
+
+
+def decode_deposit_log_data(data):
+    """
+    Decode the data of a ``Deposit`` log into ``(pubkey, withdrawal_credentials, amount,
+    signature, merkle_tree_index)``, as zero-copy memoryviews into ``data``.
+
+    ``amount`` and ``merkle_tree_index`` are 8-byte little-endian values, as logged.
+    Raises ``ValueError`` unless ``data`` has exactly the layout the contract logs.
+    """
+    data = memoryview(data)
+    _check_deposit_log_data(data)
+    return tuple(data[start:end] for start, end in _DEPOSIT_LOG_FIELDS)
+
+
+def decode_deposit_log_batch(logs_data):
+    """
+    Decode the data of a sequence of ``Deposit`` logs in one pass.
+
+    Returns ``(deposit_data, merkle_tree_indices)``: a ``DepositDataBatch`` whose rows
+    are the logged deposits, ready for ``hash_tree_roots()``, and the list of their
+    indices. The logged fields are already the serialized DepositData fields, so each
+    row is filled by copying four slices. Raises ``ValueError`` on the first malformed log.
+    """
+    logs_data = list(logs_data)
+    buffer = bytearray(len(logs_data) * DEPOSIT_DATA_LENGTH)
+    indices = []
+    row = 0
+    for data in logs_data:
+        data = memoryview(data)
+        _check_deposit_log_data(data)
+        pubkey_end = row + PUBKEY_LENGTH
+        withdrawal_credentials_end = pubkey_end + WITHDRAWAL_CREDENTIALS_LENGTH
+        amount_end = withdrawal_credentials_end + AMOUNT_LENGTH
+        buffer[row:pubkey_end] = data[_PUBKEY_START:_PUBKEY_END]
+        buffer[pubkey_end:withdrawal_credentials_end] = data[
+            _WITHDRAWAL_CREDENTIALS_START:_WITHDRAWAL_CREDENTIALS_END
+        ]
+        buffer[withdrawal_credentials_end:amount_end] = data[_AMOUNT_START:_AMOUNT_END]
+        buffer[amount_end:row + DEPOSIT_DATA_LENGTH] = data[_SIGNATURE_START:_SIGNATURE_END]
+        index = data[_MERKLE_TREE_INDEX_START:_MERKLE_TREE_INDEX_END]
+        indices.append(int.from_bytes(index, 'little'))
+        row += DEPOSIT_DATA_LENGTH
+    return DepositDataBatch(buffer, copy=False), indices
@@ -0,0 +1,280 @@
+import asyncio
+import time
+
+from deposit_contract.contracts.utils import (
+    get_deposit_contract_artifact,
+)
+from deposit_contract.deposit_tree import (
+    DepositTree,
+)
+from deposit_contract.encoding import (
+    decode_deposit_log_batch,
+    decode_eth2genesis_data,
+)
+from deposit_contract.indexer import (
+    check_genesis,
+    check_merkle_tree_indices,
+    to_bytes,
+)
+
+DEFAULT_POLL_INTERVAL = 1.0  # seconds
+DEFAULT_QUEUE_SIZE = 64  # blocks
+DEFAULT_MAX_CONCURRENT_FETCHES = 8
+# reorgs deeper than this many blocks are not followed
+DEFAULT_MAX_REORG_DEPTH = 128
+
+
+class FollowedBlock:
+    """
+    The decoded deposit logs of one block.
+
+    ``leaves`` is the packed buffer of the deposits' leaves, and ``genesis`` is
+    ``(deposit_root, deposit_count, time)`` if the block logged ``Eth2Genesis``, which
+    follows the first ``genesis_position`` deposits of the block.
+    """
+
+    def __init__(self, number, hash, parent_hash, timestamp, leaves, indices,
+                 genesis=None, genesis_position=0):
+        self.number = number
+        self.hash = hash
+        self.parent_hash = parent_hash
+        self.timestamp = timestamp
+        self.leaves = leaves
+        self.indices = indices
+        self.genesis = genesis
+        self.genesis_position = genesis_position
+
+
+class Rollback:
+    """
+    Undo every block after ``block_number``, which is on the canonical chain.
+    """
+
+    def __init__(self, block_number):
+        self.block_number = block_number
+
+
+class DepositFollower:
+    """
+    Follow the deposit contract at the chain head and keep ``tree`` up to date.
+
+    A producer polls for new blocks and fetches and decodes up to
+    ``max_concurrent_fetches`` of them at once in ``executor`` threads, as web3
+    calls block. Blocks go to a consumer, in order, through a queue of
+    ``queue_size`` blocks; when the consumer falls behind the producer waits for
+    it. The producer remembers the hashes of the last ``max_reorg_depth`` blocks.
+    When one of them leaves the canonical chain, it queues a ``Rollback`` to the
+    last common ancestor, and the consumer rolls ``tree`` back to its deposit count
+    at that block. ``tree`` must support ``rollback(deposit_count)``, as
+    ``DepositTree`` does, and hold the deposits made before ``start_block``.
+    """
+
+    def __init__(self,
+                 w3,
+                 contract_address,
+                 tree=None,
+                 start_block=0,
+                 poll_interval=DEFAULT_POLL_INTERVAL,
+                 queue_size=DEFAULT_QUEUE_SIZE,
+                 max_concurrent_fetches=DEFAULT_MAX_CONCURRENT_FETCHES,
+                 max_reorg_depth=DEFAULT_MAX_REORG_DEPTH,
+                 executor=None):
+        self.w3 = w3
+        self.contract_address = contract_address
+        self.tree = DepositTree() if tree is None else tree
+        self.start_block = start_block
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self.max_reorg_depth = max_reorg_depth
+        self.executor = executor
+
+        artifact = get_deposit_contract_artifact()
+        self._deposit_topic = artifact.event_topics['Deposit']
+        self._genesis_topic = artifact.event_topics['Eth2Genesis']
+
+        # producer state
+        self.head_block_number = start_block - 1
+        self.fetched_block_number = start_block - 1
+        self._block_hashes = {}
+        # consumer state
+        self.block_number = start_block - 1
+        self.block_timestamp = None
+        self.genesis = None
+        self._deposit_counts = {start_block - 1: self.tree.deposit_count}
+        self.reorgs = 0
+        self.rolled_back_deposits = 0
+
+        self._queue = None
+        self._stopped = False
+
+    def _call(self, function, *args):
+        return asyncio.get_event_loop().run_in_executor(self.executor, function, *args)
+
+    def get_block_hash(self, block_number):
+        block = self.w3.eth.getBlock(block_number)
+        return None if block is None else bytes(block['hash'])
+
+    def fetch_block(self, block_number):
+        """
+        Fetch and decode the deposit logs of ``block_number``; return ``None`` if the
+        block changed while it was being fetched.
+        """
+        block = self.w3.eth.getBlock(block_number)
+        if block is None:
+            return None
+        block_hash = bytes(block['hash'])
+        logs = self.w3.eth.getLogs({
+            'fromBlock': block_number,
+            'toBlock': block_number,
+            'address': self.contract_address,
+        })
+        deposits = []
+        genesis = None
+        genesis_position = 0
+        for log in logs:
+            if to_bytes(log['blockHash']) != block_hash:
+                return None
+            topic = to_bytes(log['topics'][0])
+            if topic == self._deposit_topic:
+                deposits.append(to_bytes(log['data']))
+            elif topic == self._genesis_topic:
+                genesis = decode_eth2genesis_data(to_bytes(log['data']))
+                genesis_position = len(deposits)
+        deposit_data, indices = decode_deposit_log_batch(deposits)
+        return FollowedBlock(
+            block_number,
+            block_hash,
+            bytes(block['parentHash']),
+            block['timestamp'],
+            bytes(deposit_data.hash_tree_roots()),
+            indices,
+            genesis,
+            genesis_position,
+        )
+
+    async def _find_common_ancestor(self, block_number):
+        while block_number >= self.start_block:
+            if block_number not in self._block_hashes:
+                raise ValueError("Reorg deeper than %d blocks" % self.max_reorg_depth)
+            block_hash = await self._call(self.get_block_hash, block_number)
+            if block_hash == self._block_hashes[block_number]:
+                break
+            block_number -= 1
+        return block_number
+
+    async def poll(self):
+        """
+        Queue a ``Rollback`` if fetched blocks left the canonical chain, then every new
+        block up to the head.
+        """
+        self.head_block_number = await self._call(lambda: self.w3.eth.blockNumber)
+        ancestor = await self._find_common_ancestor(
+            min(self.head_block_number, self.fetched_block_number),
+        )
+        if ancestor < self.fetched_block_number:
+            for block_number in range(ancestor + 1, self.fetched_block_number + 1):
+                self._block_hashes.pop(block_number, None)
+            self.fetched_block_number = ancestor
+            await self._queue.put(Rollback(ancestor))
+
+        while self.fetched_block_number < self.head_block_number:
+            first = self.fetched_block_number + 1
+            last = min(self.head_block_number, first + self.max_concurrent_fetches - 1)
+            blocks = await asyncio.gather(*(
+                self._call(self.fetch_block, block_number)
+                for block_number in range(first, last + 1)
+            ))
+            for block in blocks:
+                if block is None or block.parent_hash != self._block_hashes.get(
+                    block.number - 1,
+                    block.parent_hash,
+                ):
+                    # the chain changed under us; the next poll finds the new fork
+                    return
+                await self._queue.put(block)
+                self._block_hashes[block.number] = block.hash
+                self._block_hashes.pop(block.number - self.max_reorg_depth, None)
+                self.fetched_block_number = block.number
+
+    def apply_block(self, block):
+        check_merkle_tree_indices(block.indices, self.tree.deposit_count)
+        leaves = block.leaves
+        position = len(leaves) if block.genesis is None else block.genesis_position * 32
+        self.tree.extend(leaves[i:i + 32] for i in range(0, position, 32))
+        if block.genesis is not None:
+            deposit_root, deposit_count, time = block.genesis
+            check_genesis(self.tree, deposit_root, deposit_count)
+            self.genesis = (deposit_root, deposit_count, time, block.number)
+            self.tree.extend(leaves[i:i + 32] for i in range(position, len(leaves), 32))
+        self.block_number = block.number
+        self.block_timestamp = block.timestamp
+        self._deposit_counts[block.number] = self.tree.deposit_count
+        self._deposit_counts.pop(block.number - self.max_reorg_depth - 1, None)
+
+    def apply_rollback(self, rollback):
+        deposit_count = self._deposit_counts[rollback.block_number]
+        self.rolled_back_deposits += self.tree.deposit_count - deposit_count
+        self.reorgs += 1
+        self.tree.rollback(deposit_count)
+        for block_number in range(rollback.block_number + 1, self.block_number + 1):
+            self._deposit_counts.pop(block_number, None)
+        self.block_number = rollback.block_number
+        self.block_timestamp = None
+        if self.genesis is not None and self.genesis[3] > rollback.block_number:
+            self.genesis = None
+
+    async def _produce(self, until_block):
+        while not self._stopped:
+            await self.poll()
+            if until_block is not None and self.fetched_block_number >= until_block:
+                break
+            await asyncio.sleep(self.poll_interval)
+        await self._queue.put(None)
+
+    async def _consume(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, Rollback):
+                self.apply_rollback(item)
+            else:
+                self.apply_block(item)
+
+    async def run(self, until_block=None):
+        """
+        Follow the chain until ``stop()`` is called or, with ``until_block``, until that
+        block has been applied.
+        """
+        self._stopped = False
+        self._queue = asyncio.Queue(self.queue_size)
+        tasks = [
+            asyncio.ensure_future(self._produce(until_block)),
+            asyncio.ensure_future(self._consume()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stop(self):
+        self._stopped = True
+
+    def metrics(self):
+        lag_seconds = None
+        if self.block_timestamp is not None:
+            lag_seconds = max(0.0, time.time() - self.block_timestamp)
+        return {
+            'head_block_number': self.head_block_number,
+            'fetched_block_number': self.fetched_block_number,
+            'block_number': self.block_number,
+            'lag_blocks': max(0, self.head_block_number - self.block_number),
+            'lag_seconds': lag_seconds,
+            'queue_depth': 0 if self._queue is None else self._queue.qsize(),
+            'queue_size': self.queue_size,
+            'deposit_count': self.tree.deposit_count,
+            'reorgs': self.reorgs,
+            'rolled_back_deposits': self.rolled_back_deposits,
+        }
@@ -0,0 +1,303 @@
+import json
+import os
+import tempfile
+
+from deposit_contract.contracts.utils import (
+    get_deposit_contract_artifact,
+)
+from deposit_contract.deposit_tree import (
+    IncrementalDepositTree,
+)
+from deposit_contract.encoding import (
+    decode_bytes_argument,
+    decode_deposit_log_batch,
+    decode_eth2genesis_data,
+)
+
+CHECKPOINT_VERSION = 1
+DEFAULT_INITIAL_BLOCK_RANGE = 1000
+DEFAULT_MAX_BLOCK_RANGE = 100000
+# aim for about this many logs per eth_getLogs request
+DEFAULT_TARGET_LOGS = 2000
+DEFAULT_CHECKPOINT_INTERVAL = 10000  # blocks
+
+
+def to_bytes(value):
+    # eth_getLogs returns data as a hex string and topics as HexBytes
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith('0x') else value)
+    return bytes(value)
+
+
+def check_merkle_tree_indices(indices, first_index):
+    for offset, index in enumerate(indices):
+        if index != first_index + offset:
+            raise ValueError(
+                "Expected merkle_tree_index %d, got %d" % (first_index + offset, index)
+            )
+
+
+def check_genesis(tree, deposit_root, deposit_count):
+    # Eth2Genesis commits to the tree right after the deposit that started the chain
+    if deposit_count != tree.deposit_count:
+        raise ValueError(
+            "Eth2Genesis logged %d deposits, indexed %d" % (deposit_count, tree.deposit_count)
+        )
+    if deposit_root != tree.get_deposit_root():
+        raise ValueError("Eth2Genesis deposit root does not match the tree")
+
+
+class IndexerCheckpoint:
+    """
+    Indexer state after every log up to and including ``block_number``.
+
+    ``branch`` and ``deposit_count`` are those of an ``IncrementalDepositTree``, and
+    ``genesis`` is ``(deposit_root, deposit_count, time, block_number)`` once the
+    contract has logged ``Eth2Genesis``.
+    """
+
+    def __init__(self, contract_address, block_number, deposit_count, branch, genesis=None):
+        self.contract_address = contract_address
+        self.block_number = block_number
+        self.deposit_count = deposit_count
+        self.branch = list(branch)
+        self.genesis = genesis
+
+    def to_json(self):
+        genesis = None
+        if self.genesis is not None:
+            deposit_root, deposit_count, time, block_number = self.genesis
+            genesis = {
+                'deposit_root': deposit_root.hex(),
+                'deposit_count': deposit_count,
+                'time': time,
+                'block_number': block_number,
+            }
+        return {
+            'version': CHECKPOINT_VERSION,
+            'contract_address': self.contract_address,
+            'block_number': self.block_number,
+            'deposit_count': self.deposit_count,
+            'branch': [node.hex() for node in self.branch],
+            'genesis': genesis,
+        }
+
+    @classmethod
+    def from_json(cls, checkpoint_json):
+        if checkpoint_json.get('version') != CHECKPOINT_VERSION:
+            raise ValueError("Unsupported checkpoint version: %r" % checkpoint_json.get('version'))
+        genesis = checkpoint_json['genesis']
+        if genesis is not None:
+            genesis = (
+                bytes.fromhex(genesis['deposit_root']),
+                genesis['deposit_count'],
+                genesis['time'],
+                genesis['block_number'],
+            )
+        return cls(
+            checkpoint_json['contract_address'],
+            checkpoint_json['block_number'],
+            checkpoint_json['deposit_count'],
+            [bytes.fromhex(node) for node in checkpoint_json['branch']],
+            genesis,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Return the checkpoint saved at ``path``, or ``None`` if there is none.
+        """
+        try:
+            with open(path) as f:
+                return cls.from_json(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def save(self, path):
+        # write to a temporary file first so a crash never leaves a partial checkpoint
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.to_json(), f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class DepositLogIndexer:
+    """
+    Rebuild the deposit contract's tree from its ``Deposit`` and ``Eth2Genesis`` logs.
+
+    Logs are fetched with ``eth_getLogs`` through the web3 instance ``w3``, over block
+    ranges that shrink when a request fails or returns more than ``target_logs`` logs
+    and grow again when it returns few. Every ``Deposit`` must carry the next
+    ``merkle_tree_index``. Every ``checkpoint_interval`` blocks, and at the end of each
+    ``sync()``, the reconstructed root and count are checked against the contract at
+    that block and, with a ``checkpoint_path``, the state is saved there; a new
+    indexer with the same path resumes from the block after it.
+    """
+
+    def __init__(self,
+                 w3,
+                 contract_address,
+                 checkpoint_path=None,
+                 start_block=0,
+                 initial_block_range=DEFAULT_INITIAL_BLOCK_RANGE,
+                 max_block_range=DEFAULT_MAX_BLOCK_RANGE,
+                 target_logs=DEFAULT_TARGET_LOGS,
+                 checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        if not 1 <= initial_block_range <= max_block_range:
+            raise ValueError("Block ranges must satisfy 1 <= initial <= max")
+        self.w3 = w3
+        self.contract_address = contract_address
+        self.checkpoint_path = checkpoint_path
+        self.max_block_range = max_block_range
+        self.block_range = initial_block_range
+        self.target_logs = target_logs
+        self.checkpoint_interval = checkpoint_interval
+
+        artifact = get_deposit_contract_artifact()
+        self._deposit_topic = artifact.event_topics['Deposit']
+        self._genesis_topic = artifact.event_topics['Eth2Genesis']
+        self._root_selector = artifact.function_selectors['get_deposit_root']
+        self._count_selector = artifact.function_selectors['get_deposit_count']
+
+        checkpoint = None
+        if checkpoint_path is not None:
+            checkpoint = IndexerCheckpoint.load(checkpoint_path)
+        if checkpoint is None:
+            self.tree = IncrementalDepositTree()
+            self.block_number = start_block - 1
+            self.genesis = None
+        else:
+            if checkpoint.contract_address.lower() != contract_address.lower():
+                raise ValueError(
+                    "Checkpoint %s belongs to contract %s" % (
+                        checkpoint_path, checkpoint.contract_address,
+                    )
+                )
+            self.tree = IncrementalDepositTree(checkpoint.branch, checkpoint.deposit_count)
+            self.block_number = checkpoint.block_number
+            self.genesis = checkpoint.genesis
+        self.checkpoint_block_number = self.block_number
+
+    @property
+    def deposit_count(self):
+        return self.tree.deposit_count
+
+    def get_logs(self, from_block, to_block):
+        # the contract logs nothing but Deposit and Eth2Genesis, so the address alone
+        # selects them (eth-tester does not match topic alternatives)
+        return self.w3.eth.getLogs({
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': self.contract_address,
+        })
+
+    def _fetch_logs(self, from_block, to_block):
+        # shrink the range until the node answers; returns the last block covered
+        while True:
+            end = min(to_block, from_block + self.block_range - 1)
+            try:
+                return end, self.get_logs(from_block, end)
+            except (ValueError, OSError):
+                # nodes reject ranges with too many results or time out on them
+                if self.block_range == 1:
+                    raise
+                self.block_range //= 2
+
+    def _adjust_block_range(self, log_count):
+        if log_count > self.target_logs:
+            self.block_range = max(1, self.block_range // 2)
+        elif log_count < self.target_logs // 2:
+            self.block_range = min(self.max_block_range, self.block_range * 2)
+
+    def process_logs(self, logs):
+        """
+        Apply ``logs``, in chain order, to the tree.
+        """
+        deposits = []
+        for log in logs:
+            topic = to_bytes(log['topics'][0])
+            if topic == self._deposit_topic:
+                deposits.append(to_bytes(log['data']))
+            elif topic == self._genesis_topic:
+                # Eth2Genesis follows the deposit that started the chain, in the same
+                # transaction, and commits to the root including it
+                self._append_deposits(deposits)
+                deposits = []
+                self._process_genesis(log)
+        self._append_deposits(deposits)
+
+    def _append_deposits(self, logs_data):
+        if not logs_data:
+            return
+        deposit_data, indices = decode_deposit_log_batch(logs_data)
+        check_merkle_tree_indices(indices, self.tree.deposit_count)
+        leaves = bytes(deposit_data.hash_tree_roots())
+        self.tree.extend(leaves[i:i + 32] for i in range(0, len(leaves), 32))
+
+    def _process_genesis(self, log):
+        deposit_root, deposit_count, time = decode_eth2genesis_data(to_bytes(log['data']))
+        check_genesis(self.tree, deposit_root, deposit_count)
+        self.genesis = (deposit_root, deposit_count, time, log['blockNumber'])
+
+    def verify(self, block_number):
+        """
+        Check the tree against ``get_deposit_root()`` and ``get_deposit_count()`` of
+        the contract at ``block_number``, which must be the last block indexed.
+        """
+        transaction = {'to': self.contract_address, 'data': '0x' + self._root_selector.hex()}
+        root = to_bytes(self.w3.eth.call(transaction, block_number))
+        transaction['data'] = '0x' + self._count_selector.hex()
+        output = to_bytes(self.w3.eth.call(transaction, block_number))
+        deposit_count = int.from_bytes(decode_bytes_argument(output, 0), 'little')
+        if deposit_count != self.tree.deposit_count:
+            raise ValueError(
+                "Contract has %d deposits at block %d, indexed %d" % (
+                    deposit_count, block_number, self.tree.deposit_count,
+                )
+            )
+        if root != self.tree.get_deposit_root():
+            raise ValueError(
+                "Deposit root does not match the contract at block %d" % block_number
+            )
+
+    def checkpoint(self):
+        """
+        Verify the tree at the last indexed block and save it to ``checkpoint_path``.
+        """
+        if self.block_number < 0:
+            return
+        self.verify(self.block_number)
+        if self.checkpoint_path is not None:
+            IndexerCheckpoint(
+                self.contract_address,
+                self.block_number,
+                self.tree.deposit_count,
+                self.tree.branch,
+                self.genesis,
+            ).save(self.checkpoint_path)
+        self.checkpoint_block_number = self.block_number
+
+    def sync(self, to_block=None):
+        """
+        Index every block up to ``to_block`` (the latest block by default) and return
+        the deposit count.
+        """
+        if to_block is None:
+            to_block = self.w3.eth.blockNumber
+        while self.block_number < to_block:
+            end, logs = self._fetch_logs(self.block_number + 1, to_block)
+            self.process_logs(logs)
+            self.block_number = end
+            self._adjust_block_range(len(logs))
+            if self.block_number - self.checkpoint_block_number >= self.checkpoint_interval:
+                self.checkpoint()
+        if self.checkpoint_block_number != self.block_number:
+            self.checkpoint()
+        return self.tree.deposit_count
@@ -0,0 +1,110 @@
+import mmap
+import multiprocessing
+import os
+
+from deposit_contract.deposit_data import (
+    DEPOSIT_DATA_LENGTH,
+    hash_deposit_data_batch,
+)
+from deposit_contract.deposit_tree import (
+    DEPOSIT_CONTRACT_TREE_DEPTH,
+    MAX_DEPOSIT_COUNT,
+    compute_subtree_root,
+)
+
+# number of subtrees handed to each worker process, to even out uneven progress
+TASKS_PER_PROCESS = 4
+# below this many leaves the pool start-up costs more than it saves
+MIN_PARALLEL_LEAVES = 4096
+
+# (data, roots) anonymous shared mappings, set while a pool runs; forked workers
+# inherit them, so neither buffer is pickled or copied into the workers
+_shared_buffers = None
+
+
+def hash_subtree(task):
+    item_length, start, stop, slot, subtree_height = task
+    data, roots = _shared_buffers
+    items = memoryview(data)[start * item_length:stop * item_length]
+    try:
+        if item_length == DEPOSIT_DATA_LENGTH:
+            leaves = hash_deposit_data_batch(items)
+        else:
+            leaves = bytes(items)
+    finally:
+        items.release()
+    roots[slot * 32:slot * 32 + 32] = compute_subtree_root(leaves, 0, subtree_height)
+
+
+def get_fork_context():
+    # the shared buffers reach the workers by fork; without it the work stays serial
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    return multiprocessing.get_context('fork')
+
+
+def compute_root_parallel(data, item_length, processes):
+    global _shared_buffers
+    if len(data) % item_length != 0:
+        raise ValueError("Buffer length must be a multiple of %d" % item_length)
+    count = len(data) // item_length
+    if count > MAX_DEPOSIT_COUNT:
+        raise ValueError("Too many leaves for the deposit tree")
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    context = get_fork_context()
+    if processes <= 1 or count < MIN_PARALLEL_LEAVES or context is None:
+        leaves = hash_deposit_data_batch(data) if item_length == DEPOSIT_DATA_LENGTH else data
+        return compute_subtree_root(leaves, 0, DEPOSIT_CONTRACT_TREE_DEPTH)
+
+    # split the leaves into aligned subtrees of 2**subtree_height leaves each
+    tasks_wanted = processes * TASKS_PER_PROCESS
+    subtree_height = max(((count + tasks_wanted - 1) // tasks_wanted - 1).bit_length(), 0)
+    subtree_size = 1 << subtree_height
+    subtree_count = (count + subtree_size - 1) // subtree_size
+
+    # anonymous mappings are shared with forked children, and work on Python 3.6
+    data_map = mmap.mmap(-1, len(data))
+    roots_map = mmap.mmap(-1, subtree_count * 32)
+    try:
+        data_map[:] = data
+        tasks = [
+            (
+                item_length,
+                slot * subtree_size,
+                min((slot + 1) * subtree_size, count),
+                slot,
+                subtree_height,
+            )
+            for slot in range(subtree_count)
+        ]
+        _shared_buffers = (data_map, roots_map)
+        try:
+            with context.Pool(processes) as pool:
+                pool.map(hash_subtree, tasks, chunksize=1)
+        finally:
+            _shared_buffers = None
+        subtree_roots = roots_map[:]
+    finally:
+        data_map.close()
+        roots_map.close()
+
+    # combine the subtree roots into the top levels in this process
+    return compute_subtree_root(subtree_roots, subtree_height, DEPOSIT_CONTRACT_TREE_DEPTH)
+
+
+def compute_deposit_root_parallel(deposit_data, processes=None):
+    """
+    Return the deposit root for a packed buffer of serialized DepositData, hashing
+    leaves and subtrees across ``processes`` worker processes (all cores by default).
+    """
+    return compute_root_parallel(deposit_data, DEPOSIT_DATA_LENGTH, processes)
+
+
+def compute_leaves_root_parallel(leaves, processes=None):
+    """
+    Return the deposit root for a packed buffer of 32-byte leaves, hashing subtrees
+    across ``processes`` worker processes (all cores by default).
+    """
+    return compute_root_parallel(leaves, 32, processes)
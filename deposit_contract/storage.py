@@ -0,0 +1,132 @@
+import json
+
+from deposit_contract.deposit_tree import (
+    DEPOSIT_CONTRACT_TREE_DEPTH,
+    ZEROHASHES,
+    IncrementalDepositTree,
+)
+
+# Vyper assigns storage slots to the contract's globals in declaration order, and
+# stores element ``i`` of a fixed-size array declared at slot ``p`` at
+# ``keccak256(uint256(p)) + i``.
+ZEROHASHES_SLOT = 0
+BRANCH_SLOT = 1
+DEPOSIT_COUNT_SLOT = 2
+FULL_DEPOSIT_COUNT_SLOT = 3
+CHAIN_STARTED_SLOT = 4
+
+
+def get_array_slot(position, index):
+    from eth_utils import keccak
+    return int.from_bytes(keccak(position.to_bytes(32, 'big')), 'big') + index
+
+
+def get_branch_slots():
+    return [get_array_slot(BRANCH_SLOT, height) for height in range(DEPOSIT_CONTRACT_TREE_DEPTH)]
+
+
+def get_zerohashes_slots():
+    return [
+        get_array_slot(ZEROHASHES_SLOT, height) for height in range(DEPOSIT_CONTRACT_TREE_DEPTH)
+    ]
+
+
+def get_storage_batch(w3, address, slots, block_number):
+    """
+    Return the 32-byte values of ``slots`` of ``address`` at ``block_number``.
+
+    Over HTTP the reads go to the node as one JSON-RPC batch request; other
+    providers are asked slot by slot.
+    """
+    provider = w3.providers[0]
+    endpoint_uri = getattr(provider, 'endpoint_uri', None)
+    if endpoint_uri is None:
+        return [
+            bytes(w3.eth.getStorageAt(address, slot, block_number)).rjust(32, b'\x00')
+            for slot in slots
+        ]
+
+    from web3.utils.request import make_post_request
+    payload = [
+        {
+            'jsonrpc': '2.0',
+            'id': request_id,
+            'method': 'eth_getStorageAt',
+            'params': [address, hex(slot), hex(block_number)],
+        }
+        for request_id, slot in enumerate(slots)
+    ]
+    response = json.loads(make_post_request(
+        endpoint_uri,
+        json.dumps(payload).encode('utf-8'),
+        **dict(provider.get_request_kwargs())
+    ).decode('utf-8'))
+    if not isinstance(response, list):
+        raise ValueError("Node does not support batch requests: %r" % response)
+    results = {}
+    for item in response:
+        request_id = item.get('id')
+        if request_id not in range(len(slots)):
+            raise ValueError("Unexpected item in batch response: %r" % item)
+        if 'error' in item or 'result' not in item:
+            raise ValueError("eth_getStorageAt failed for slot %s: %r" % (
+                hex(slots[request_id]), item.get('error'),
+            ))
+        # some nodes return unpadded quantities such as "0x0"
+        results[request_id] = int(item['result'], 16).to_bytes(32, 'big')
+    missing = [hex(slots[i]) for i in range(len(slots)) if i not in results]
+    if missing:
+        raise ValueError("Batch response is missing slots %s" % ', '.join(missing))
+    return [results[request_id] for request_id in range(len(slots))]
+
+
+class ContractStorageState:
+    """
+    The deposit contract's tree state as read from its storage at ``block_number``.
+    """
+
+    def __init__(self, block_number, deposit_count, full_deposit_count, chain_started,
+                 branch, zerohashes):
+        self.block_number = block_number
+        self.deposit_count = deposit_count
+        self.full_deposit_count = full_deposit_count
+        self.chain_started = chain_started
+        self.branch = branch
+        self.zerohashes = zerohashes
+
+    def get_deposit_tree(self):
+        return IncrementalDepositTree(self.branch, self.deposit_count)
+
+
+def read_contract_storage(w3, address, block_number=None):
+    """
+    Read the deposit contract's tree state from its storage in one batch, at
+    ``block_number`` or at the latest block.
+
+    Raises ``ValueError`` if the stored ``zerohashes`` are not the expected ones,
+    that is if ``address`` does not hold a deposit contract with this storage layout.
+    """
+    if block_number is None:
+        # pin every read to one block, so they are consistent without a batch too
+        block_number = w3.eth.blockNumber
+    branch_slots = get_branch_slots()
+    zerohashes_slots = get_zerohashes_slots()
+    slots = [DEPOSIT_COUNT_SLOT, FULL_DEPOSIT_COUNT_SLOT, CHAIN_STARTED_SLOT]
+    slots.extend(branch_slots)
+    slots.extend(zerohashes_slots)
+    values = get_storage_batch(w3, address, slots, block_number)
+    deposit_count, full_deposit_count, chain_started = (
+        int.from_bytes(value, 'big') for value in values[:3]
+    )
+    branch = values[3:3 + len(branch_slots)]
+    zerohashes = values[3 + len(branch_slots):]
+    if zerohashes != ZEROHASHES[:DEPOSIT_CONTRACT_TREE_DEPTH]:
+        raise ValueError("No deposit contract storage at %s" % address)
+    return ContractStorageState(
+        block_number,
+        deposit_count,
+        full_deposit_count,
+        bool(chain_started),
+        branch,
+        zerohashes,
+    )
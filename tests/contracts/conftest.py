@@ -1,22 +1,20 @@
 from random import (
     randint,
 )
-import re
 
 import pytest
 
+from deposit_contract.contracts.builder import (
+    build_deposit_contract,
+)
 from deposit_contract.contracts.utils import (
-    get_deposit_contract_code,
-    get_deposit_contract_json,
+    get_deposit_contract_artifact,
 )
 import eth_tester
 from eth_tester import (
     EthereumTester,
     PyEVMBackend,
 )
-from vyper import (
-    compiler,
-)
 from web3 import Web3
 from web3.providers.eth_tester import (
     EthereumTesterProvider,
@@ -30,26 +28,7 @@ DEPOSIT_CONTRACT_TREE_DEPTH = 32
 TWO_TO_POWER_OF_TREE_DEPTH = 2**DEPOSIT_CONTRACT_TREE_DEPTH
 
 
-@pytest.fixture
-def tester():
-    return EthereumTester(PyEVMBackend())
-
-
-@pytest.fixture
-def a0(tester):
-    return tester.get_accounts()[0]
-
-
-@pytest.fixture
-def w3(tester):
-    web3 = Web3(EthereumTesterProvider(tester))
-    return web3
-
-
-@pytest.fixture
-def registration_contract(w3, tester):
-    contract_bytecode = get_deposit_contract_json()['bytecode']
-    contract_abi = get_deposit_contract_json()['abi']
+def deploy_contract(w3, contract_abi, contract_bytecode):
     registration = w3.eth.contract(
         abi=contract_abi,
         bytecode=contract_bytecode)
@@ -62,37 +41,41 @@ def registration_contract(w3, tester):
     return registration_deployed
 
 
+# The chain and every contract variant are set up once per session. Session-scoped
+# fixtures are created before function-scoped ones, so deployments always happen
+# before the per-test snapshot taken by `tester` and survive its revert.
+@pytest.fixture(scope="session")
+def session_tester():
+    return EthereumTester(PyEVMBackend())
+
+
+@pytest.fixture(scope="session")
+def session_w3(session_tester):
+    web3 = Web3(EthereumTesterProvider(session_tester))
+    return web3
+
+
+@pytest.fixture(scope="session")
+def session_registration_contract(session_w3):
+    artifact = get_deposit_contract_artifact()
+    return deploy_contract(session_w3, artifact.abi, artifact.bytecode_hex)
+
+
 @pytest.fixture(scope="session")
 def chain_start_full_deposit_thresholds():
     return [randint(1, 5), randint(6, 10), randint(11, 15)]
 
 
-@pytest.fixture(params=[0, 1, 2])
-def modified_registration_contract(
+@pytest.fixture(scope="session", params=[0, 1, 2])
+def session_modified_registration_contract(
         request,
-        w3,
-        tester,
+        session_w3,
         chain_start_full_deposit_thresholds):
     # Set CHAIN_START_FULL_DEPOSIT_THRESHOLD to different threshold t
-    registration_code = get_deposit_contract_code()
-    t = str(chain_start_full_deposit_thresholds[request.param])
-    modified_registration_code = re.sub(
-        r'CHAIN_START_FULL_DEPOSIT_THRESHOLD: constant\(uint256\) = [0-9]+',
-        'CHAIN_START_FULL_DEPOSIT_THRESHOLD: constant(uint256) = ' + t,
-        registration_code,
-    )
-    assert modified_registration_code != registration_code
-    contract_bytecode = compiler.compile_code(modified_registration_code)['bytecode']
-    contract_abi = compiler.mk_full_signature(modified_registration_code)
-    registration = w3.eth.contract(
-        abi=contract_abi,
-        bytecode=contract_bytecode)
-    tx_hash = registration.constructor().transact()
-    tx_receipt = w3.eth.waitForTransactionReceipt(tx_hash)
-    registration_deployed = w3.eth.contract(
-        address=tx_receipt.contractAddress,
-        abi=contract_abi
+    compiled = build_deposit_contract(
+        CHAIN_START_FULL_DEPOSIT_THRESHOLD=chain_start_full_deposit_thresholds[request.param],
     )
+    registration_deployed = deploy_contract(session_w3, compiled['abi'], compiled['bytecode'])
     setattr(
         registration_deployed,
         'chain_start_full_deposit_threshold',
@@ -101,6 +84,50 @@ def modified_registration_contract(
     return registration_deployed
 
 
+def get_filter_ids(tester):
+    return {
+        filter_id
+        for filters in (
+            tester._block_filters,
+            tester._pending_transaction_filters,
+            tester._log_filters,
+        )
+        for filter_id in filters
+    }
+
+
+@pytest.fixture
+def tester(session_tester):
+    # every test runs from, and leaves behind, the state right after deployment
+    snapshot_id = session_tester.take_snapshot()
+    filter_ids = get_filter_ids(session_tester)
+    yield session_tester
+    session_tester.revert_to_snapshot(snapshot_id)
+    # filters are not part of the chain state; drop the ones this test created
+    for filter_id in get_filter_ids(session_tester) - filter_ids:
+        session_tester.delete_filter(filter_id)
+
+
+@pytest.fixture
+def a0(tester):
+    return tester.get_accounts()[0]
+
+
+@pytest.fixture
+def w3(session_w3, tester):
+    return session_w3
+
+
+@pytest.fixture
+def registration_contract(session_registration_contract, tester):
+    return session_registration_contract
+
+
+@pytest.fixture
+def modified_registration_contract(session_modified_registration_contract, tester):
+    return session_modified_registration_contract
+
+
 @pytest.fixture
 def assert_tx_failed(tester):
     def assert_tx_failed(function_to_test, exception=eth_tester.exceptions.TransactionFailed):
@@ -0,0 +1,171 @@
+from random import (
+    Random,
+)
+
+import pytest
+
+from deposit_contract.bulk_deposit import (
+    GWEI,
+    BulkDepositDriver,
+    TransactionFailed,
+    make_deposit,
+)
+from deposit_contract.contracts.builder import (
+    build_deposit_contract,
+)
+from deposit_contract.contracts.utils import (
+    BATCH_DEPOSIT_CONTRACT_NAME,
+    DEPOSIT_CONTRACT_NAME,
+    get_contract_artifact,
+)
+from deposit_contract.encoding import (
+    encode_bytes_arguments,
+    encode_uint256,
+    get_max_deposit_batch_size,
+)
+from eth_tester import (
+    PyEVMBackend,
+)
+from tests.contracts.conftest import (
+    CHAIN_START_FULL_DEPOSIT_THRESHOLD,
+    FULL_DEPOSIT_AMOUNT,
+    MIN_DEPOSIT_AMOUNT,
+)
+from tests.contracts.test_gas_benchmarks import (
+    check_gas,
+)
+
+
+def deploy_drivers(**overrides):
+    # individual deposit() calls to the deposit contract, and the same deposits in
+    # batches to the batch deposit contract, each on its own chain
+    drivers = []
+    for contract_name in (DEPOSIT_CONTRACT_NAME, BATCH_DEPOSIT_CONTRACT_NAME):
+        compiled = build_deposit_contract(contract_name, **overrides)
+        driver = BulkDepositDriver(PyEVMBackend())
+        driver.deploy(bytes.fromhex(compiled['bytecode'][2:]))
+        drivers.append(driver)
+    return drivers
+
+
+def get_logs(receipts):
+    return [(log.topics, log.data) for receipt in receipts for log in receipt.logs]
+
+
+def deposit_both(drivers, deposits):
+    """
+    Make ``deposits`` one by one and as one batch, check that both log the same
+    events and leave the same state, and return the gas used by each.
+    """
+    single_driver, batch_driver = drivers
+    gas_used = single_driver.gas_used
+    receipts = [single_driver.deposit(*deposit) for deposit in deposits]
+    single_gas = single_driver.gas_used - gas_used
+
+    gas_used = batch_driver.gas_used
+    batch_receipt = batch_driver.deposit_batch(deposits)
+    batch_gas = batch_driver.gas_used - gas_used
+
+    assert get_logs([batch_receipt]) == get_logs(receipts)
+    for function_name in ('get_deposit_root', 'get_deposit_count', 'chainStarted'):
+        assert batch_driver.call(function_name) == single_driver.call(function_name)
+    return single_gas, batch_gas
+
+
+def send_raw_batch(driver, pubkeys, withdrawal_credentials, signatures, amounts, value):
+    artifact = get_contract_artifact(BATCH_DEPOSIT_CONTRACT_NAME)
+    amounts = amounts + [0] * (get_max_deposit_batch_size() - len(amounts))
+    data = artifact.function_selectors['deposit_batch'] + encode_bytes_arguments(
+        pubkeys,
+        withdrawal_credentials,
+        signatures,
+        static_arguments=b''.join(encode_uint256(amount) for amount in amounts),
+    )
+    return driver.send_transaction(driver.contract_address, data, value=value * GWEI)
+
+
+@pytest.fixture
+def drivers():
+    return deploy_drivers()
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 5, 16])
+def test_batch_matches_single_deposits(drivers, batch_size):
+    rng = Random(batch_size)
+    for _ in range(2):
+        start = len(drivers[0].tree)
+        deposits = [
+            make_deposit(index, rng.randint(MIN_DEPOSIT_AMOUNT, FULL_DEPOSIT_AMOUNT * 2))
+            for index in range(start, start + batch_size)
+        ]
+        deposit_both(drivers, deposits)
+    batch_driver = drivers[1]
+    assert batch_driver.call('get_deposit_root') == batch_driver.tree.get_deposit_root()
+
+
+@pytest.mark.parametrize('batch_size', [4, 16])
+def test_batch_gas_per_deposit(drivers, batch_size):
+    deposits = [make_deposit(index, FULL_DEPOSIT_AMOUNT) for index in range(batch_size)]
+    single_gas, batch_gas = deposit_both(drivers, deposits)
+    assert batch_gas < single_gas
+    # fails when the per-deposit cost of a batch regresses
+    check_gas('deposit_batch[%d] per deposit' % batch_size, batch_gas // batch_size)
+
+
+@pytest.mark.parametrize('index', [2**10 - 3, 2**20 - 7, 2**31 - 5])
+def test_seeded_batch_matches_single_deposits(drivers, index):
+    for driver in drivers:
+        driver.seed_deposit_count(index, CHAIN_START_FULL_DEPOSIT_THRESHOLD)
+    deposits = [make_deposit(i, FULL_DEPOSIT_AMOUNT) for i in range(index, index + 8)]
+    single_gas, batch_gas = deposit_both(drivers, deposits)
+    assert batch_gas < single_gas
+
+
+def test_batch_chain_start():
+    threshold = 5
+    drivers = deploy_drivers(CHAIN_START_FULL_DEPOSIT_THRESHOLD=threshold)
+    # Eth2Genesis is logged after the deposit that reaches the threshold, in the
+    # middle of the batch, and not again for the rest of it
+    deposits = [make_deposit(0, MIN_DEPOSIT_AMOUNT)] + [
+        make_deposit(index, FULL_DEPOSIT_AMOUNT) for index in range(1, threshold + 3)
+    ]
+    deposit_both(drivers, deposits)
+    single_driver, batch_driver = drivers
+    assert batch_driver.genesis['deposit_count'] == threshold + 1
+    for key in ('deposit_root', 'deposit_count'):
+        assert batch_driver.genesis[key] == single_driver.genesis[key]
+
+
+def test_invalid_batches(drivers):
+    batch_driver = drivers[1]
+    deposits = [make_deposit(index, FULL_DEPOSIT_AMOUNT) for index in range(3)]
+    pubkeys, withdrawal_credentials, amounts, signatures = [
+        b''.join(values) if isinstance(values[0], bytes) else list(values)
+        for values in zip(*deposits)
+    ]
+    total = sum(amounts)
+    invalid_batches = [
+        # value does not match the amounts
+        (pubkeys, withdrawal_credentials, signatures, amounts, total - 1),
+        (pubkeys, withdrawal_credentials, signatures, amounts, total + 1),
+        # an amount below the minimum
+        (
+            pubkeys,
+            withdrawal_credentials,
+            signatures,
+            amounts[:2] + [MIN_DEPOSIT_AMOUNT - 1],
+            total - amounts[2] + MIN_DEPOSIT_AMOUNT - 1,
+        ),
+        # an amount past the last deposit
+        (pubkeys, withdrawal_credentials, signatures, amounts + [1], total + 1),
+        # fields of different batch sizes
+        (pubkeys[:-1], withdrawal_credentials, signatures, amounts, total),
+        (pubkeys, withdrawal_credentials[:-32], signatures, amounts, total),
+        (pubkeys, withdrawal_credentials, signatures + b'\x33' * 96, amounts, total),
+        # an empty batch
+        (b'', b'', b'', [], 0),
+    ]
+    for batch in invalid_batches:
+        with pytest.raises(TransactionFailed):
+            send_raw_batch(batch_driver, *batch)
+    send_raw_batch(batch_driver, pubkeys, withdrawal_credentials, signatures, amounts, total)
@@ -0,0 +1,45 @@
+from deposit_contract.bulk_deposit import (
+    BulkDepositDriver,
+    make_deposit,
+)
+from deposit_contract.contracts.builder import (
+    build_deposit_contract,
+)
+from tests.contracts.conftest import (
+    FULL_DEPOSIT_AMOUNT,
+    MIN_DEPOSIT_AMOUNT,
+)
+
+
+def test_bulk_deposit_chain_start(tester):
+    threshold = 40
+    compiled = build_deposit_contract(CHAIN_START_FULL_DEPOSIT_THRESHOLD=threshold)
+    driver = BulkDepositDriver(tester.backend)
+    driver.deploy(bytes.fromhex(compiled['bytecode'][2:]))
+
+    # deposits below the full amount do not count towards the threshold
+    for _ in range(5):
+        driver.deposit(*make_deposit(len(driver.tree), MIN_DEPOSIT_AMOUNT))
+    assert driver.genesis is None
+
+    genesis = driver.run_until_genesis(FULL_DEPOSIT_AMOUNT, 1000)
+    driver.check_genesis()
+    assert genesis['deposit_count'] == threshold + 5
+    # more than one deposit went into each block
+    assert driver.blocks_mined < len(driver.tree)
+
+
+def test_fast_forward_chain_start(tester):
+    threshold = 40
+    compiled = build_deposit_contract(CHAIN_START_FULL_DEPOSIT_THRESHOLD=threshold)
+    driver = BulkDepositDriver(tester.backend, full_deposit_amount=FULL_DEPOSIT_AMOUNT)
+    driver.deploy(bytes.fromhex(compiled['bytecode'][2:]))
+
+    # the seeded branch and counters must be the ones deposit() itself would leave,
+    # or the roots logged by the deposits sent afterwards would not match
+    driver.fast_forward(5, MIN_DEPOSIT_AMOUNT)
+    driver.fast_forward(threshold - 3, FULL_DEPOSIT_AMOUNT)
+    assert driver.genesis is None
+    genesis = driver.run_until_genesis(FULL_DEPOSIT_AMOUNT, 1000)
+    driver.check_genesis()
+    assert genesis['deposit_count'] == threshold + 5
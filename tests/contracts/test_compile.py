@@ -1,18 +1,95 @@
+import pytest
+
+from deposit_contract.contracts.builder import (
+    build_deposit_contract,
+    build_deposit_contract_variants,
+)
 from deposit_contract.contracts.utils import (
+    BATCH_DEPOSIT_CONTRACT_NAME,
+    compile_contract,
     get_deposit_contract_code,
     get_deposit_contract_json,
 )
-from vyper import (
-    compiler,
-)
 
 
 def test_compile_deposit_contract():
     compiled_deposit_contract_json = get_deposit_contract_json()
 
     deposit_contract_code = get_deposit_contract_code()
-    abi = compiler.mk_full_signature(deposit_contract_code)
-    bytecode = compiler.compile_code(deposit_contract_code)['bytecode']
+    compiled = compile_contract(deposit_contract_code)
+
+    assert compiled["abi"] == compiled_deposit_contract_json["abi"]
+    assert compiled["bytecode"] == compiled_deposit_contract_json["bytecode"]
+
+
+def test_compile_cache(tmpdir, monkeypatch):
+    from deposit_contract.contracts import utils
+    from vyper import compiler
+
+    monkeypatch.setenv(utils.COMPILE_CACHE_DIR_ENV, str(tmpdir))
+    monkeypatch.setattr(utils, '_compiled_contracts', {})
+    deposit_contract_code = get_deposit_contract_code()
+    compiled = compile_contract(deposit_contract_code)
+    assert len(tmpdir.listdir(lambda path: path.ext == '.json')) == 1
+
+    def fail_compile(*args, **kwargs):
+        raise AssertionError("Cached source was compiled again")
+
+    # a new process only has the on-disk cache
+    monkeypatch.setattr(utils, '_compiled_contracts', {})
+    monkeypatch.setattr(compiler, 'compile_code', fail_compile)
+    monkeypatch.setattr(compiler, 'mk_full_signature', fail_compile)
+    assert compile_contract(deposit_contract_code) == compiled
+
+
+def test_compile_returns_copies():
+    deposit_contract_code = get_deposit_contract_code()
+    compiled = compile_contract(deposit_contract_code)
+    compiled['abi'].pop()
+    compiled['bytecode'] = '0x'
+    compiled = compile_contract(deposit_contract_code)
+    assert compiled['abi'] == get_deposit_contract_json()['abi']
+    assert compiled['bytecode'] == get_deposit_contract_json()['bytecode']
+
+
+def test_compile_cache_write_failure(tmpdir, monkeypatch):
+    from deposit_contract.contracts import utils
+
+    monkeypatch.setenv(utils.COMPILE_CACHE_DIR_ENV, str(tmpdir))
+    monkeypatch.setattr(utils, '_compiled_contracts', {})
+
+    def fail_dump(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(utils.json, 'dump', fail_dump)
+    with pytest.raises(OSError):
+        compile_contract(get_deposit_contract_code())
+    # neither a cache entry nor a temporary file is left behind
+    assert tmpdir.listdir(lambda path: path.ext in ('.json', '.tmp')) == []
+
+
+def test_build_deposit_contract_variants():
+    thresholds = [1, 2, 3]
+    variants = build_deposit_contract_variants(
+        [{'CHAIN_START_FULL_DEPOSIT_THRESHOLD': t} for t in thresholds],
+        processes=2,
+    )
+    assert len(variants) == len(thresholds)
+    for t, variant in zip(thresholds, variants):
+        assert variant == build_deposit_contract(CHAIN_START_FULL_DEPOSIT_THRESHOLD=t)
+        assert variant['abi'] == get_deposit_contract_json()['abi']
+    assert len(set(variant['bytecode'] for variant in variants)) == len(thresholds)
+    assert build_deposit_contract()['bytecode'] == get_deposit_contract_json()['bytecode']
+
 
-    assert abi == compiled_deposit_contract_json["abi"]
-    assert bytecode == compiled_deposit_contract_json["bytecode"]
+def test_build_other_contract_variants():
+    overrides = {'MAX_DEPOSIT_BATCH_SIZE': 16, 'CHAIN_START_FULL_DEPOSIT_THRESHOLD': 4}
+    variants = build_deposit_contract_variants(
+        [overrides],
+        processes=1,
+        contract_name=BATCH_DEPOSIT_CONTRACT_NAME,
+    )
+    assert variants == [build_deposit_contract(BATCH_DEPOSIT_CONTRACT_NAME, **overrides)]
+    # overrides are checked against the constants of the contract being built
+    with pytest.raises(ValueError):
+        build_deposit_contract_variants([{'MAX_DEPOSIT_BATCH_SIZE': 16}])
@@ -1,15 +1,23 @@
-from hashlib import (
-    sha256,
-)
 from random import (
     randint,
 )
 
 import pytest
 
+from deposit_contract.deposit_tree import (
+    DepositTree,
+    IncrementalDepositTree,
+    verify_merkle_branch,
+)
+from deposit_contract.encoding import (
+    decode_deposit_log_batch,
+    decode_deposit_log_data,
+)
 import eth_utils
+from hexbytes import (
+    HexBytes,
+)
 from tests.contracts.conftest import (
-    DEPOSIT_CONTRACT_TREE_DEPTH,
     FULL_DEPOSIT_AMOUNT,
     MIN_DEPOSIT_AMOUNT,
 )
@@ -30,25 +38,6 @@ DepositData = SSZType({
 })
 
 
-def hash(data):
-    return sha256(data).digest()
-
-
-def compute_merkle_root(leaf_nodes):
-    assert len(leaf_nodes) >= 1
-    empty_node = b'\x00' * 32
-    child_nodes = leaf_nodes[:]
-    for _ in range(DEPOSIT_CONTRACT_TREE_DEPTH):
-        parent_nodes = []
-        if len(child_nodes) % 2 == 1:
-            child_nodes.append(empty_node)
-        for j in range(0, len(child_nodes), 2):
-            parent_nodes.append(hash(child_nodes[j] + child_nodes[j + 1]))
-        child_nodes = parent_nodes
-        empty_node = hash(empty_node + empty_node)
-    return child_nodes[0]
-
-
 @pytest.fixture
 def deposit_input():
     """
@@ -168,13 +157,38 @@ def test_deposit_log(registration_contract, a0, w3, deposit_input):
         assert log['merkle_tree_index'] == i.to_bytes(8, 'little')
 
 
+def test_decode_deposit_logs(registration_contract, w3, deposit_input):
+    deposit_amount_list = [randint(MIN_DEPOSIT_AMOUNT, FULL_DEPOSIT_AMOUNT * 2) for _ in range(3)]
+    events = []
+    for amount in deposit_amount_list:
+        tx_hash = registration_contract.functions.deposit(
+            *deposit_input,
+        ).transact({"value": amount * eth_utils.denoms.gwei})
+        receipt = w3.eth.getTransactionReceipt(tx_hash)
+        events.extend(registration_contract.events.Deposit().processReceipt(receipt))
+
+    logs = w3.eth.getLogs({'address': registration_contract.address, 'fromBlock': 0})
+    deposit_data, indices = decode_deposit_log_batch(HexBytes(log['data']) for log in logs)
+    assert indices == list(range(3))
+    names = ('pubkey', 'withdrawal_credentials', 'amount', 'signature', 'merkle_tree_index')
+    for log, row, event, amount in zip(logs, deposit_data, events, deposit_amount_list):
+        args = event['args']
+        fields = decode_deposit_log_data(HexBytes(log['data']))
+        assert [bytes(value) for value in fields] == [args[name] for name in names]
+        assert row.pubkey == args['pubkey']
+        assert row.withdrawal_credentials == args['withdrawal_credentials']
+        assert row.amount == amount
+        assert row.signature == args['signature']
+
+
 def test_deposit_tree(registration_contract, w3, assert_tx_failed, deposit_input):
     log_filter = registration_contract.events.Deposit.createFilter(
         fromBlock='latest',
     )
 
     deposit_amount_list = [randint(MIN_DEPOSIT_AMOUNT, FULL_DEPOSIT_AMOUNT * 2) for _ in range(10)]
-    leaf_nodes = []
+    deposit_tree = IncrementalDepositTree()
+    full_deposit_tree = DepositTree()
     for i in range(0, 10):
         tx_hash = registration_contract.functions.deposit(
             *deposit_input,
@@ -195,9 +209,14 @@ def test_deposit_tree(registration_contract, w3, assert_tx_failed, deposit_input
             signature=deposit_input[2],
         )
         hash_tree_root_result = hash_tree_root(deposit_data)
-        leaf_nodes.append(hash_tree_root_result)
-        root = compute_merkle_root(leaf_nodes)
+        deposit_tree.append(hash_tree_root_result)
+        full_deposit_tree.append(hash_tree_root_result)
+        root = deposit_tree.get_deposit_root()
         assert root == registration_contract.functions.get_deposit_root().call()
+        assert full_deposit_tree.get_deposit_root() == root
+        for j in range(i + 1):
+            proof = full_deposit_tree.get_proof(j)
+            assert verify_merkle_branch(full_deposit_tree.get_leaf(j), proof, j, root)
 
 
 def test_chain_start(modified_registration_contract, w3, assert_tx_failed, deposit_input):
@@ -248,3 +267,26 @@ def test_chain_start(modified_registration_contract, w3, assert_tx_failed, depos
     ).transact({"value": full_deposit_amount})
     logs = log_filter.get_new_entries()
     assert len(logs) == 0
+
+
+def test_historical_roots(registration_contract, w3, deposit_input):
+    block_numbers = [w3.eth.blockNumber]
+    for _ in range(6):
+        amount = randint(MIN_DEPOSIT_AMOUNT, FULL_DEPOSIT_AMOUNT)
+        registration_contract.functions.deposit(
+            *deposit_input,
+        ).transact({"value": amount * eth_utils.denoms.gwei})
+        block_numbers.append(w3.eth.blockNumber)
+
+    logs = w3.eth.getLogs({'address': registration_contract.address, 'fromBlock': 0})
+    deposit_data, _ = decode_deposit_log_batch(HexBytes(log['data']) for log in logs)
+    deposit_tree = DepositTree.from_leaves(deposit_data.hash_tree_roots())
+    # the root after k deposits is what the contract returned at the block of the k-th
+    contract_roots = [
+        registration_contract.functions.get_deposit_root().call(block_identifier=block_number)
+        for block_number in block_numbers
+    ]
+    assert deposit_tree.get_roots_at(range(len(block_numbers))) == contract_roots
+    for count, root in enumerate(contract_roots):
+        for index, proof in enumerate(deposit_tree.get_proofs_at(range(count), count)):
+            assert verify_merkle_branch(deposit_tree.get_leaf(index), proof, index, root)
@@ -0,0 +1,129 @@
+import asyncio
+from concurrent.futures import (
+    ThreadPoolExecutor,
+)
+from random import (
+    Random,
+)
+
+import pytest
+
+from deposit_contract.deposit_tree import (
+    DepositTree,
+)
+from deposit_contract.follower import (
+    DepositFollower,
+)
+from tests.contracts.conftest import (
+    FULL_DEPOSIT_AMOUNT,
+)
+from tests.contracts.test_indexer import (
+    get_contract_root,
+    make_deposit_leaf,
+    make_deposits,
+)
+
+
+@pytest.fixture
+def executor():
+    # eth-tester is not thread-safe, so every web3 call goes through one thread
+    with ThreadPoolExecutor(1) as executor:
+        yield executor
+
+
+def follow(follower, w3):
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(follower.run(until_block=w3.eth.blockNumber))
+
+
+def test_follow_deposits(registration_contract, w3, executor):
+    follower = DepositFollower(w3, registration_contract.address, executor=executor)
+    make_deposits(registration_contract, range(4), rng=Random(0))
+    follow(follower, w3)
+    assert follower.tree.get_deposit_root() == get_contract_root(registration_contract)
+
+    make_deposits(registration_contract, range(4, 6), rng=Random(1))
+    follow(follower, w3)
+    assert follower.tree.get_deposit_root() == get_contract_root(registration_contract)
+    metrics = follower.metrics()
+    assert metrics['block_number'] == w3.eth.blockNumber
+    assert metrics['lag_blocks'] == 0
+    assert metrics['queue_depth'] == 0
+    assert metrics['deposit_count'] == 6
+    assert metrics['reorgs'] == 0
+
+
+@pytest.mark.parametrize('new_deposits,new_blocks', [(2, 3), (1, 0), (0, 0)])
+def test_reorg_rollback(registration_contract, w3, tester, executor, new_deposits, new_blocks):
+    follower = DepositFollower(
+        w3,
+        registration_contract.address,
+        max_concurrent_fetches=2,
+        executor=executor,
+    )
+    make_deposits(registration_contract, range(3), rng=Random(2))
+    snapshot_id = tester.take_snapshot()
+    make_deposits(registration_contract, range(3, 6), rng=Random(3))
+    follow(follower, w3)
+    assert follower.tree.deposit_count == 6
+
+    # replace the last three deposits with a fork that is longer, shorter or empty
+    tester.revert_to_snapshot(snapshot_id)
+    make_deposits(registration_contract, range(3, 3 + new_deposits), rng=Random(4))
+    tester.mine_blocks(new_blocks)
+    follow(follower, w3)
+    assert follower.tree.deposit_count == 3 + new_deposits
+    assert follower.tree.get_deposit_root() == get_contract_root(registration_contract)
+    metrics = follower.metrics()
+    assert metrics['reorgs'] == 1
+    assert metrics['rolled_back_deposits'] == 3
+
+    make_deposits(registration_contract, range(3 + new_deposits, 4 + new_deposits), rng=Random(5))
+    follow(follower, w3)
+    assert follower.tree.get_deposit_root() == get_contract_root(registration_contract)
+
+
+def test_backpressure(registration_contract, w3, tester, executor):
+    queue_size = 2
+    follower = DepositFollower(
+        w3,
+        registration_contract.address,
+        queue_size=queue_size,
+        executor=executor,
+    )
+    make_deposits(registration_contract, range(3), rng=Random(6))
+    tester.mine_blocks(6)
+    queue_depths = []
+    apply_block = follower.apply_block
+
+    def record_queue_depth(block):
+        queue_depths.append(follower.metrics()['queue_depth'])
+        apply_block(block)
+    follower.apply_block = record_queue_depth
+    follow(follower, w3)
+    assert max(queue_depths) <= queue_size
+    assert follower.tree.get_deposit_root() == get_contract_root(registration_contract)
+
+
+def test_follow_genesis(modified_registration_contract, w3, tester, executor):
+    threshold = modified_registration_contract.chain_start_full_deposit_threshold
+    follower = DepositFollower(w3, modified_registration_contract.address, executor=executor)
+    make_deposits(modified_registration_contract, range(threshold - 1), amount=FULL_DEPOSIT_AMOUNT)
+    snapshot_id = tester.take_snapshot()
+    make_deposits(
+        modified_registration_contract,
+        range(threshold - 1, threshold + 1),
+        amount=FULL_DEPOSIT_AMOUNT,
+    )
+    follow(follower, w3)
+    expected_tree = DepositTree.from_leaves([
+        make_deposit_leaf(index, FULL_DEPOSIT_AMOUNT) for index in range(threshold)
+    ])
+    assert follower.genesis[:2] == (expected_tree.get_deposit_root(), threshold)
+
+    # a reorg that drops the deposit that started the chain drops the genesis too
+    tester.revert_to_snapshot(snapshot_id)
+    tester.mine_blocks(3)
+    follow(follower, w3)
+    assert follower.genesis is None
+    assert follower.tree.deposit_count == threshold - 1
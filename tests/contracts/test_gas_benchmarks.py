@@ -0,0 +1,91 @@
+import json
+import os
+
+import pytest
+
+from deposit_contract.bulk_deposit import (
+    BulkDepositDriver,
+    make_deposit,
+)
+from deposit_contract.encoding import (
+    decode_bytes_argument,
+)
+from tests.contracts.conftest import (
+    CHAIN_START_FULL_DEPOSIT_THRESHOLD,
+    FULL_DEPOSIT_AMOUNT,
+)
+
+GAS_BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'gas_baseline.json')
+# set to record the current measurements as the new baseline
+UPDATE_GAS_BASELINE_ENV = 'UPDATE_GAS_BASELINE'
+GAS_REGRESSION_TOLERANCE = 0.01
+
+# index + 1 ending in h zero bits makes deposit() hash h branch levels; 65535 is the
+# deposit that reaches the chain start threshold and emits Eth2Genesis
+DEPOSIT_INDICES = [
+    0, 1, 2, 3, 6, 7, 255, 65535, 2**20 - 1, 2**24 - 1, 2**31 - 1, 2**32 - 2,
+]
+DEPOSIT_COUNTS = [0, 1, 2**16, 2**31, 2**32 - 1]
+
+
+def load_gas_baseline():
+    try:
+        with open(GAS_BASELINE_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def check_gas(name, gas_used):
+    baseline = load_gas_baseline()
+    if os.environ.get(UPDATE_GAS_BASELINE_ENV):
+        baseline[name] = gas_used
+        with open(GAS_BASELINE_PATH, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        return
+    if name not in baseline:
+        pytest.fail("No gas baseline for %s (used %d gas); record it with %s=1" % (
+            name, gas_used, UPDATE_GAS_BASELINE_ENV,
+        ))
+    limit = int(baseline[name] * (1 + GAS_REGRESSION_TOLERANCE))
+    assert gas_used <= limit, "%s used %d gas, baseline is %d" % (name, gas_used, baseline[name])
+
+
+@pytest.fixture
+def driver(tester):
+    driver = BulkDepositDriver(tester.backend)
+    driver.deploy()
+    return driver
+
+
+@pytest.mark.parametrize('index', DEPOSIT_INDICES)
+def test_deposit_gas(driver, index):
+    driver.seed_deposit_count(index, CHAIN_START_FULL_DEPOSIT_THRESHOLD)
+    deposit_count = driver.call('get_deposit_count')
+    assert decode_bytes_argument(deposit_count, 0) == index.to_bytes(8, 'little')
+
+    gas_used = driver.gas_used
+    driver.deposit(*make_deposit(index, FULL_DEPOSIT_AMOUNT))
+    gas_used = driver.gas_used - gas_used
+    if index + 1 == CHAIN_START_FULL_DEPOSIT_THRESHOLD:
+        assert driver.genesis is not None
+
+    deposit_count = driver.call('get_deposit_count')
+    assert decode_bytes_argument(deposit_count, 0) == (index + 1).to_bytes(8, 'little')
+    check_gas('deposit[%d]' % index, gas_used)
+
+
+@pytest.mark.parametrize('count', DEPOSIT_COUNTS)
+def test_get_deposit_root_gas(driver, count):
+    driver.seed_deposit_count(count, CHAIN_START_FULL_DEPOSIT_THRESHOLD)
+    gas_used = driver.gas_used
+    root = driver.call('get_deposit_root')
+    assert len(root) == 32
+    check_gas('get_deposit_root[%d]' % count, driver.gas_used - gas_used)
+
+
+def test_get_deposit_count_gas(driver):
+    gas_used = driver.gas_used
+    driver.call('get_deposit_count')
+    check_gas('get_deposit_count', driver.gas_used - gas_used)
@@ -0,0 +1,39 @@
+import pytest
+
+from deposit_contract.bulk_deposit import (
+    make_deposit,
+)
+from deposit_contract.encoding import (
+    encode_deposit_call,
+)
+from tests.contracts.conftest import (
+    FULL_DEPOSIT_AMOUNT,
+)
+from tool.profile_deposit_gas import (
+    profile_deposit,
+)
+
+
+def get_intrinsic_gas(chain, data):
+    transaction = chain.create_unsigned_transaction(
+        nonce=0,
+        gas_price=1,
+        gas=0,
+        to=b'\x00' * 20,
+        value=0,
+        data=data,
+    )
+    return transaction.get_intrinsic_gas()
+
+
+@pytest.mark.parametrize('index', [0, 255])
+def test_traced_gas_adds_up(tester, index):
+    records, _, gas_used = profile_deposit(index=index)
+    pubkey, withdrawal_credentials, _, signature = make_deposit(index, FULL_DEPOSIT_AMOUNT)
+    intrinsic_gas = get_intrinsic_gas(
+        tester.backend.chain,
+        encode_deposit_call(pubkey, withdrawal_credentials, signature),
+    )
+    # every unit of gas spent in execution is charged to exactly one traced step
+    assert sum(gas for _, _, _, gas in records) == gas_used - intrinsic_gas
+    assert all(gas >= 0 for _, _, _, gas in records)
@@ -0,0 +1,129 @@
+import json
+from random import (
+    Random,
+)
+
+import pytest
+
+from deposit_contract.bulk_deposit import (
+    make_deposit,
+)
+from deposit_contract.deposit_data import (
+    hash_deposit_data,
+    serialize_deposit_data,
+)
+from deposit_contract.deposit_tree import (
+    IncrementalDepositTree,
+)
+from deposit_contract.indexer import (
+    DepositLogIndexer,
+    IndexerCheckpoint,
+)
+import eth_utils
+from tests.contracts.conftest import (
+    FULL_DEPOSIT_AMOUNT,
+    MIN_DEPOSIT_AMOUNT,
+)
+
+
+def make_deposits(contract, indices, amount=None, rng=None):
+    for index in indices:
+        if amount is None:
+            deposit_amount = rng.randint(MIN_DEPOSIT_AMOUNT, FULL_DEPOSIT_AMOUNT * 2)
+        else:
+            deposit_amount = amount
+        pubkey, withdrawal_credentials, _, signature = make_deposit(index, deposit_amount)
+        contract.functions.deposit(
+            pubkey,
+            withdrawal_credentials,
+            signature,
+        ).transact({"value": deposit_amount * eth_utils.denoms.gwei})
+
+
+def make_deposit_leaf(index, amount):
+    return hash_deposit_data(serialize_deposit_data(*make_deposit(index, amount)))
+
+
+def get_contract_root(contract):
+    return contract.functions.get_deposit_root().call()
+
+
+def test_sync_matches_contract(registration_contract, w3):
+    make_deposits(registration_contract, range(6), rng=Random(0))
+    tester = w3.providers[0].ethereum_tester
+    tester.mine_blocks(5)
+    indexer = DepositLogIndexer(
+        w3,
+        registration_contract.address,
+        initial_block_range=1,
+        target_logs=2,
+        checkpoint_interval=4,
+    )
+    assert indexer.sync() == 6
+    assert indexer.block_number == w3.eth.blockNumber
+    assert indexer.tree.get_deposit_root() == get_contract_root(registration_contract)
+    # two logs per range are on target, so ranges grew over the empty blocks only
+    assert indexer.block_range > 1
+
+    make_deposits(registration_contract, range(6, 8), rng=Random(1))
+    assert indexer.sync() == 8
+    assert indexer.tree.get_deposit_root() == get_contract_root(registration_contract)
+
+
+def test_resume_from_checkpoint(registration_contract, w3, tmpdir):
+    checkpoint_path = str(tmpdir.join('checkpoint.json'))
+    rng = Random(2)
+    make_deposits(registration_contract, range(6), rng=rng)
+    indexer = DepositLogIndexer(w3, registration_contract.address, checkpoint_path)
+    indexer.sync()
+    with open(checkpoint_path) as f:
+        checkpoint_json = json.load(f)
+    assert checkpoint_json['block_number'] == w3.eth.blockNumber
+    assert checkpoint_json['deposit_count'] == 6
+
+    make_deposits(registration_contract, range(6, 9), rng=rng)
+    resumed = DepositLogIndexer(w3, registration_contract.address, checkpoint_path)
+    assert resumed.block_number == checkpoint_json['block_number']
+    assert resumed.deposit_count == 6
+    # a restarted indexer only fetches the blocks after the checkpoint
+    fetched = []
+    get_logs = resumed.get_logs
+    resumed.get_logs = lambda *block_range: fetched.append(block_range) or get_logs(*block_range)
+    assert resumed.sync() == 9
+    assert fetched[0][0] == checkpoint_json['block_number'] + 1
+    assert resumed.tree.get_deposit_root() == get_contract_root(registration_contract)
+
+    with pytest.raises(ValueError):
+        DepositLogIndexer(w3, '0x' + '11' * 20, checkpoint_path)
+
+
+def test_genesis(modified_registration_contract, w3, tmpdir):
+    checkpoint_path = str(tmpdir.join('checkpoint.json'))
+    threshold = modified_registration_contract.chain_start_full_deposit_threshold
+    make_deposits(modified_registration_contract, range(threshold + 2), amount=FULL_DEPOSIT_AMOUNT)
+    indexer = DepositLogIndexer(w3, modified_registration_contract.address, checkpoint_path)
+    assert indexer.sync() == threshold + 2
+    deposit_root, deposit_count, _, block_number = indexer.genesis
+    assert deposit_count == threshold
+    expected = IncrementalDepositTree()
+    expected.extend(make_deposit_leaf(index, FULL_DEPOSIT_AMOUNT) for index in range(threshold))
+    assert deposit_root == expected.get_deposit_root()
+    assert block_number == w3.eth.blockNumber - 2
+    assert IndexerCheckpoint.load(checkpoint_path).genesis == indexer.genesis
+
+
+def test_merkle_tree_index_gap(registration_contract, w3):
+    make_deposits(registration_contract, range(3), rng=Random(3))
+    logs = w3.eth.getLogs({'address': registration_contract.address, 'fromBlock': 0})
+    indexer = DepositLogIndexer(w3, registration_contract.address)
+    with pytest.raises(ValueError):
+        indexer.process_logs([logs[0], logs[2]])
+
+
+def test_verify_detects_mismatch(registration_contract, w3):
+    make_deposits(registration_contract, range(2), rng=Random(4))
+    indexer = DepositLogIndexer(w3, registration_contract.address)
+    indexer.sync()
+    indexer.tree.append(b'\x44' * 32)
+    with pytest.raises(ValueError):
+        indexer.verify(indexer.block_number)
@@ -0,0 +1,162 @@
+from random import (
+    Random,
+)
+
+import pytest
+
+from deposit_contract.bulk_deposit import (
+    BulkDepositDriver,
+    TransactionFailed,
+    make_deposit,
+)
+from deposit_contract.contracts.builder import (
+    build_deposit_contract,
+)
+from deposit_contract.contracts.utils import (
+    DEPOSIT_CONTRACT_NAME,
+    OPTIMIZED_DEPOSIT_CONTRACT_NAME,
+    compile_contract,
+    get_contract_artifact,
+    get_contract_code,
+)
+from deposit_contract.encoding import (
+    decode_bytes_argument,
+    encode_uint256,
+)
+from eth_tester import (
+    PyEVMBackend,
+)
+from tests.contracts.conftest import (
+    CHAIN_START_FULL_DEPOSIT_THRESHOLD,
+    FULL_DEPOSIT_AMOUNT,
+    MIN_DEPOSIT_AMOUNT,
+)
+
+CONTRACT_NAMES = (DEPOSIT_CONTRACT_NAME, OPTIMIZED_DEPOSIT_CONTRACT_NAME)
+
+
+def strip_gas_estimates(abi):
+    # the compiler's per-function gas estimates are the only part allowed to differ
+    return [{key: value for key, value in item.items() if key != 'gas'} for item in abi]
+
+
+def deploy_drivers(**overrides):
+    # one chain per contract, so that both see the same block numbers and storage
+    drivers = []
+    for contract_name in CONTRACT_NAMES:
+        compiled = build_deposit_contract(contract_name, **overrides)
+        driver = BulkDepositDriver(PyEVMBackend())
+        driver.deploy(bytes.fromhex(compiled['bytecode'][2:]))
+        drivers.append(driver)
+    return drivers
+
+
+def deposit_all(drivers, deposit):
+    """
+    Make ``deposit`` on every driver, check that the logs and contract state match
+    and return the gas each deposit used.
+    """
+    receipts = []
+    gas = []
+    for driver in drivers:
+        gas_used = driver.gas_used
+        receipts.append(driver.deposit(*deposit))
+        gas.append(driver.gas_used - gas_used)
+    expected, actual = [
+        [(log.topics, log.data) for log in receipt.logs] for receipt in receipts
+    ]
+    assert actual == expected
+    for function_name in ('get_deposit_root', 'get_deposit_count', 'chainStarted'):
+        expected, actual = [driver.call(function_name) for driver in drivers]
+        assert actual == expected
+    return gas
+
+
+@pytest.fixture
+def drivers():
+    return deploy_drivers()
+
+
+def test_optimized_artifact():
+    contract_code = get_contract_code(OPTIMIZED_DEPOSIT_CONTRACT_NAME)
+    compiled = compile_contract(contract_code)
+    artifact = get_contract_artifact(OPTIMIZED_DEPOSIT_CONTRACT_NAME)
+    assert compiled['abi'] == artifact.abi
+    assert compiled['bytecode'] == artifact.bytecode_hex
+
+    abi = get_contract_artifact(DEPOSIT_CONTRACT_NAME).abi
+    assert strip_gas_estimates(artifact.abi) == strip_gas_estimates(abi)
+
+
+@pytest.mark.parametrize(
+    'value',
+    [0, 1, 255, 256, 55555, 2**32 - 1, 0x0102030405060708, 2**64 - 1, 2**64, 2**256 - 1]
+)
+def test_to_little_endian_64(drivers, value):
+    results = []
+    for driver in drivers:
+        try:
+            output = driver.call('to_little_endian_64', encode_uint256(value))
+        except TransactionFailed:
+            results.append(None)
+        else:
+            results.append(decode_bytes_argument(output, 0))
+    expected = value.to_bytes(8, 'little') if value < 2**64 else None
+    assert results == [expected, expected]
+
+
+def test_deposits_match(drivers):
+    rng = Random(0)
+    for index in range(16):
+        amount = rng.randint(MIN_DEPOSIT_AMOUNT, FULL_DEPOSIT_AMOUNT * 2)
+        baseline_gas, optimized_gas = deposit_all(drivers, make_deposit(index, amount))
+        assert optimized_gas < baseline_gas
+    assert drivers[1].tree.get_deposit_root() == drivers[1].call('get_deposit_root')
+
+
+def test_invalid_deposits_fail(drivers):
+    pubkey, withdrawal_credentials, amount, signature = make_deposit(0, FULL_DEPOSIT_AMOUNT)
+    invalid_deposits = [
+        (pubkey[1:], withdrawal_credentials, amount, signature),
+        (pubkey, withdrawal_credentials[1:], amount, signature),
+        (pubkey, withdrawal_credentials, amount, signature[1:]),
+        (pubkey, withdrawal_credentials, MIN_DEPOSIT_AMOUNT - 1, signature),
+    ]
+    for driver in drivers:
+        for deposit in invalid_deposits:
+            with pytest.raises(TransactionFailed):
+                driver.deposit(*deposit)
+
+
+@pytest.mark.parametrize('index', [1, 6, 255, 65535, 2**20 - 1, 2**31 - 1])
+def test_seeded_deposits_match(drivers, index):
+    for driver in drivers:
+        driver.seed_deposit_count(index, CHAIN_START_FULL_DEPOSIT_THRESHOLD)
+    for offset in range(3):
+        baseline_gas, optimized_gas = deposit_all(
+            drivers,
+            make_deposit(index + offset, FULL_DEPOSIT_AMOUNT),
+        )
+        assert optimized_gas < baseline_gas
+
+
+def test_max_deposit_count(drivers):
+    for driver in drivers:
+        driver.seed_deposit_count(2**32 - 2, CHAIN_START_FULL_DEPOSIT_THRESHOLD)
+    deposit_all(drivers, make_deposit(2**32 - 2, FULL_DEPOSIT_AMOUNT))
+    for driver in drivers:
+        with pytest.raises(TransactionFailed):
+            driver.deposit(*make_deposit(2**32 - 1, FULL_DEPOSIT_AMOUNT))
+
+
+def test_chain_start_matches():
+    threshold = 8
+    drivers = deploy_drivers(CHAIN_START_FULL_DEPOSIT_THRESHOLD=threshold)
+    deposit_all(drivers, make_deposit(0, MIN_DEPOSIT_AMOUNT))
+    for index in range(1, threshold + 1):
+        deposit_all(drivers, make_deposit(index, FULL_DEPOSIT_AMOUNT))
+    for driver in drivers:
+        driver.check_genesis()
+        assert driver.genesis['deposit_count'] == threshold + 1
+    # the logs of later deposits are compared too, so neither contract logs Eth2Genesis again
+    deposit_all(drivers, make_deposit(threshold + 1, FULL_DEPOSIT_AMOUNT))
@@ -0,0 +1,195 @@
+from http.server import (
+    BaseHTTPRequestHandler,
+    HTTPServer,
+)
+import json
+from random import (
+    Random,
+)
+import threading
+
+import pytest
+
+from deposit_contract.bulk_deposit import (
+    GWEI,
+    make_deposit,
+)
+from deposit_contract.deposit_data import (
+    hash_deposit_data,
+    serialize_deposit_data,
+)
+from deposit_contract.indexer import (
+    DepositLogIndexer,
+    IndexerCheckpoint,
+)
+from deposit_contract.storage import (
+    read_contract_storage,
+)
+from eth_utils import (
+    to_canonical_address,
+)
+from tests.contracts.conftest import (
+    FULL_DEPOSIT_AMOUNT,
+    MIN_DEPOSIT_AMOUNT,
+)
+from tests.contracts.test_indexer import (
+    get_contract_root,
+)
+from web3 import Web3
+from web3.providers.eth_tester import (
+    EthereumTesterProvider,
+)
+
+
+def get_storage_at(tester, address, slot, block_number):
+    # eth-tester does not implement eth_getStorageAt, so read the block's state directly
+    chain = tester.backend.chain
+    header = chain.get_canonical_block_by_number(block_number).header
+    account_db = chain.get_vm(header).state.account_db
+    return account_db.get_storage(to_canonical_address(address), slot)
+
+
+def handle_request(tester, request, padded=True):
+    # like some nodes, answer with unpadded quantities such as "0x0" unless `padded`
+    method, params = request['method'], request['params']
+    head = tester.get_block_by_number('latest')['number']
+    if method == 'eth_getStorageAt':
+        address, slot, block_number = params
+        if int(block_number, 16) > head:
+            return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'message': 'no block'}}
+        value = get_storage_at(tester, address, int(slot, 16), int(block_number, 16))
+        result = '0x' + value.to_bytes(32, 'big').hex() if padded else hex(value)
+    elif method == 'eth_blockNumber':
+        result = hex(head)
+    else:
+        return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'message': method}}
+    return {'jsonrpc': '2.0', 'id': request['id'], 'result': result}
+
+
+class StorageEthereumTesterProvider(EthereumTesterProvider):
+
+    def make_request(self, method, params):
+        if method == 'eth_getStorageAt':
+            request = {'id': 0, 'method': method, 'params': params}
+            return handle_request(self.ethereum_tester, request)
+        return super().make_request(method, params)
+
+
+@pytest.fixture
+def http_w3(tester):
+    """
+    Web3 over HTTP to a JSON-RPC server answering, singly or in batches, the few
+    eth-tester requests the bootstrap reader makes. Records the size of every request.
+    """
+    request_sizes = []
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            if isinstance(body, list):
+                request_sizes.append(len(body))
+                response = [handle_request(tester, request, padded=False) for request in body]
+            else:
+                request_sizes.append(1)
+                response = handle_request(tester, body, padded=False)
+            data = json.dumps(response).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    w3 = Web3(Web3.HTTPProvider('http://127.0.0.1:%d' % server.server_port))
+    w3.request_sizes = request_sizes
+    yield w3
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def storage_w3(tester):
+    return Web3(StorageEthereumTesterProvider(tester))
+
+
+def send_deposit(contract, deposit):
+    pubkey, withdrawal_credentials, amount, signature = deposit
+    contract.functions.deposit(
+        pubkey,
+        withdrawal_credentials,
+        signature,
+    ).transact({"value": amount * GWEI})
+
+
+def make_deposits(contract, indices, rng):
+    full_deposit_count = 0
+    for index in indices:
+        amount = rng.choice([MIN_DEPOSIT_AMOUNT, FULL_DEPOSIT_AMOUNT])
+        send_deposit(contract, make_deposit(index, amount))
+        full_deposit_count += amount == FULL_DEPOSIT_AMOUNT
+    return full_deposit_count
+
+
+def test_bootstrap_over_http(registration_contract, w3, http_w3, storage_w3):
+    full_deposit_count = make_deposits(registration_contract, range(7), Random(0))
+    state = read_contract_storage(http_w3, registration_contract.address)
+    # one request for the block number, then every slot in one batch
+    assert http_w3.request_sizes == [1, 3 + 2 * 32]
+    assert state.block_number == w3.eth.blockNumber
+    assert state.deposit_count == 7
+    assert state.full_deposit_count == full_deposit_count
+    assert not state.chain_started
+
+    slot_by_slot_state = read_contract_storage(storage_w3, registration_contract.address)
+    assert vars(slot_by_slot_state) == vars(state)
+
+    # the tree picks up where the contract is
+    tree = state.get_deposit_tree()
+    assert tree.get_deposit_root() == get_contract_root(registration_contract)
+    deposit = make_deposit(7, FULL_DEPOSIT_AMOUNT)
+    send_deposit(registration_contract, deposit)
+    tree.append(hash_deposit_data(serialize_deposit_data(*deposit)))
+    assert tree.get_deposit_root() == get_contract_root(registration_contract)
+
+
+def test_bootstrap_at_block(registration_contract, w3, storage_w3):
+    make_deposits(registration_contract, range(3), Random(1))
+    block_number = w3.eth.blockNumber
+    root = get_contract_root(registration_contract)
+    make_deposits(registration_contract, range(3, 5), Random(2))
+    state = read_contract_storage(storage_w3, registration_contract.address, block_number)
+    assert state.deposit_count == 3
+    assert state.get_deposit_tree().get_deposit_root() == root
+
+
+def test_bootstrap_checks_storage_layout(registration_contract, storage_w3):
+    with pytest.raises(ValueError):
+        read_contract_storage(storage_w3, '0x' + '11' * 20)
+
+
+def test_indexer_resumes_from_bootstrap(registration_contract, w3, storage_w3, tmpdir):
+    checkpoint_path = str(tmpdir.join('checkpoint.json'))
+    make_deposits(registration_contract, range(4), Random(3))
+    state = read_contract_storage(storage_w3, registration_contract.address)
+    IndexerCheckpoint(
+        registration_contract.address,
+        state.block_number,
+        state.deposit_count,
+        state.branch,
+    ).save(checkpoint_path)
+
+    make_deposits(registration_contract, range(4, 6), Random(4))
+    indexer = DepositLogIndexer(w3, registration_contract.address, checkpoint_path)
+    assert indexer.sync() == 6
+    assert indexer.tree.get_deposit_root() == get_contract_root(registration_contract)
+
+
+def test_bootstrap_batch_error(registration_contract, w3, http_w3):
+    with pytest.raises(ValueError, match='slot 0x2'):
+        read_contract_storage(http_w3, registration_contract.address, w3.eth.blockNumber + 10)
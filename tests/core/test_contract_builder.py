@@ -0,0 +1,62 @@
+import pytest
+
+from deposit_contract.contracts.builder import (
+    apply_constant_overrides,
+    get_contract_constants,
+)
+from deposit_contract.contracts.utils import (
+    get_deposit_contract_code,
+)
+
+
+def test_get_contract_constants():
+    constants = get_contract_constants()
+    assert constants['CHAIN_START_FULL_DEPOSIT_THRESHOLD'] == 2**16
+    assert constants['DEPOSIT_CONTRACT_TREE_DEPTH'] == 32
+    assert constants['MAX_DEPOSIT_COUNT'] == 2**32 - 1
+    assert constants['MIN_DEPOSIT_AMOUNT'] == 10**9
+
+
+def test_apply_constant_overrides():
+    contract_code = get_deposit_contract_code()
+    assert apply_constant_overrides(contract_code, {}) == contract_code
+
+    modified_code = apply_constant_overrides(contract_code, {
+        'CHAIN_START_FULL_DEPOSIT_THRESHOLD': 8,
+        'MIN_DEPOSIT_AMOUNT': 1,
+    })
+    constants = get_contract_constants(modified_code)
+    assert constants == dict(
+        get_contract_constants(contract_code),
+        CHAIN_START_FULL_DEPOSIT_THRESHOLD=8,
+        MIN_DEPOSIT_AMOUNT=1,
+    )
+
+
+def test_tree_depth_override_updates_max_deposit_count():
+    contract_code = get_deposit_contract_code()
+    constants = get_contract_constants(
+        apply_constant_overrides(contract_code, {'DEPOSIT_CONTRACT_TREE_DEPTH': 10})
+    )
+    assert constants['DEPOSIT_CONTRACT_TREE_DEPTH'] == 10
+    assert constants['MAX_DEPOSIT_COUNT'] == 2**10 - 1
+
+    constants = get_contract_constants(apply_constant_overrides(
+        contract_code,
+        {'DEPOSIT_CONTRACT_TREE_DEPTH': 10, 'MAX_DEPOSIT_COUNT': 100},
+    ))
+    assert constants['MAX_DEPOSIT_COUNT'] == 100
+
+
+@pytest.mark.parametrize(
+    'overrides',
+    [
+        {'UNKNOWN_CONSTANT': 1},
+        {'MIN_DEPOSIT_AMOUNT': -1},
+        {'MIN_DEPOSIT_AMOUNT': '1'},
+        {'MIN_DEPOSIT_AMOUNT': True},
+    ]
+)
+def test_invalid_overrides(overrides):
+    with pytest.raises(ValueError):
+        apply_constant_overrides(get_deposit_contract_code(), overrides)
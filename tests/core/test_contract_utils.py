@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from deposit_contract.contracts.utils import (
+    get_deposit_contract_artifact,
+    get_deposit_contract_code,
+    get_deposit_contract_json,
+)
+
+
+def test_artifact_is_parsed_once():
+    artifact = get_deposit_contract_artifact()
+    assert get_deposit_contract_artifact() is artifact
+    assert get_deposit_contract_json() is get_deposit_contract_json()
+    with open(artifact.file_path) as f:
+        assert artifact.json == json.load(f)
+    assert 'MAX_DEPOSIT_COUNT' in get_deposit_contract_code()
+
+
+def test_artifact_bytecode():
+    artifact = get_deposit_contract_artifact()
+    assert isinstance(artifact.bytecode, bytes)
+    assert '0x' + artifact.bytecode.hex() == artifact.bytecode_hex
+
+
+def test_artifact_selectors_and_topics():
+    eth_utils = pytest.importorskip('eth_utils')
+    artifact = get_deposit_contract_artifact()
+    assert artifact.function_selectors['deposit'] == (
+        eth_utils.function_signature_to_4byte_selector('deposit(bytes,bytes,bytes)')
+    )
+    assert set(artifact.function_selectors) == {
+        'to_little_endian_64',
+        'get_deposit_root',
+        'get_deposit_count',
+        'deposit',
+        'chainStarted',
+    }
+    assert artifact.event_topics['Deposit'] == (
+        eth_utils.event_signature_to_log_topic('Deposit(bytes,bytes,bytes,bytes,bytes)')
+    )
+    assert artifact.event_topics['Eth2Genesis'] == (
+        eth_utils.event_signature_to_log_topic('Eth2Genesis(bytes32,bytes,bytes)')
+    )
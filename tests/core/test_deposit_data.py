@@ -0,0 +1,127 @@
+import os
+from random import (
+    randint,
+)
+
+import pytest
+
+from deposit_contract.deposit_data import (
+    DEPOSIT_DATA_LENGTH,
+    DepositDataBatch,
+    hash_deposit_data,
+    hash_deposit_data_batch,
+)
+from tests.utils.minimal_ssz import (
+    SSZType,
+)
+
+DepositData = SSZType({
+    'pubkey': 'bytes48',
+    'withdrawal_credentials': 'bytes32',
+    'amount': 'uint64',
+    'signature': 'bytes96',
+})
+
+
+def make_deposits(count):
+    return [
+        (os.urandom(48), os.urandom(32), randint(0, 2**64 - 1), os.urandom(96))
+        for _ in range(count)
+    ]
+
+
+def test_deposit_data_batch_matches_ssz():
+    deposits = make_deposits(10)
+    batch = DepositDataBatch.from_deposits(deposits)
+    assert len(batch) == 10
+
+    expected = [DepositData(
+        pubkey=pubkey,
+        withdrawal_credentials=withdrawal_credentials,
+        amount=amount,
+        signature=signature,
+    ) for pubkey, withdrawal_credentials, amount, signature in deposits]
+    assert batch.serialize() == b''.join(deposit_data.serialize() for deposit_data in expected)
+    roots = batch.hash_tree_roots()
+    for index, (row, deposit_data) in enumerate(zip(batch, expected)):
+        assert row.pubkey == deposit_data.pubkey
+        assert row.withdrawal_credentials == deposit_data.withdrawal_credentials
+        assert row.amount == deposit_data.amount
+        assert row.signature == deposit_data.signature
+        assert row.serialize() == deposit_data.serialize()
+        assert row.hash_tree_root() == deposit_data.hash_tree_root()
+        assert roots[index * 32:index * 32 + 32] == deposit_data.hash_tree_root()
+        assert hash_deposit_data(deposit_data.serialize()) == deposit_data.hash_tree_root()
+
+
+def test_deposit_data_batch_views_survive_growth():
+    batch = DepositDataBatch()
+    deposits = make_deposits(20)
+    batch.append(*deposits[0])
+    first = batch[0]
+    for deposit in deposits[1:]:
+        batch.append(*deposit)
+    assert first.pubkey == deposits[0][0]
+    assert batch[-1].signature == deposits[-1][3]
+    assert DepositDataBatch(batch.serialize()).serialize() == batch.serialize()
+
+
+@pytest.mark.parametrize(
+    'pubkey_length,withdrawal_credentials_length,signature_length',
+    [
+        (47, 32, 96),
+        (48, 33, 96),
+        (48, 32, 95),
+    ]
+)
+def test_deposit_data_batch_invalid_row(pubkey_length,
+                                        withdrawal_credentials_length,
+                                        signature_length):
+    with pytest.raises(ValueError):
+        DepositDataBatch().append(
+            b'\x00' * pubkey_length,
+            b'\x00' * withdrawal_credentials_length,
+            1,
+            b'\x00' * signature_length,
+        )
+
+
+def test_deposit_data_batch_invalid_buffer():
+    with pytest.raises(ValueError):
+        DepositDataBatch(b'\x00' * (DEPOSIT_DATA_LENGTH + 1))
+
+
+def test_deposit_data_batch_without_copy():
+    buffer = bytearray(os.urandom(DEPOSIT_DATA_LENGTH * 2))
+    batch = DepositDataBatch(buffer, copy=False)
+    # the batch wraps the caller's buffer rather than a copy of it
+    buffer[0] ^= 0xff
+    assert batch[0].pubkey[0] == buffer[0]
+    assert DepositDataBatch(buffer)[0].pubkey[0] == buffer[0]
+    with pytest.raises(TypeError):
+        DepositDataBatch(bytes(buffer), copy=False)
+
+
+def test_deposit_data_batch_numpy():
+    np = pytest.importorskip('numpy')
+    deposits = make_deposits(5)
+    batch = DepositDataBatch.from_deposits(deposits)
+    array = batch.to_numpy()
+    assert array.shape == (5,)
+    assert array.itemsize == DEPOSIT_DATA_LENGTH
+    assert [int(amount) for amount in array['amount']] == [deposit[2] for deposit in deposits]
+    assert bytes(array['pubkey'][3]) == deposits[3][0]
+    assert np.shares_memory(array, batch.to_numpy())
+    assert DepositDataBatch.from_numpy(array).serialize() == batch.serialize()
+
+
+def test_hash_deposit_data_batch_reuses_output_buffer():
+    batch = DepositDataBatch.from_deposits(make_deposits(4))
+    out = bytearray(5 * 32)
+    assert hash_deposit_data_batch(batch.data, out) is out
+    assert out[:4 * 32] == batch.hash_tree_roots()
+    assert out[4 * 32:] == b'\x00' * 32
+    with pytest.raises(ValueError):
+        hash_deposit_data_batch(batch.data, bytearray(3 * 32))
+    with pytest.raises(ValueError):
+        hash_deposit_data_batch(batch.data[:-1])
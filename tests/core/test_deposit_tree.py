@@ -0,0 +1,161 @@
+from hashlib import (
+    sha256,
+)
+import os
+
+import pytest
+
+from deposit_contract.deposit_tree import (
+    DEPOSIT_CONTRACT_TREE_DEPTH,
+    MAX_DEPOSIT_COUNT,
+    ZEROHASHES,
+    DepositTree,
+    IncrementalDepositTree,
+    verify_merkle_branch,
+)
+
+
+def hash(data):
+    return sha256(data).digest()
+
+
+def compute_merkle_root(leaf_nodes):
+    empty_node = b'\x00' * 32
+    child_nodes = leaf_nodes[:]
+    for _ in range(DEPOSIT_CONTRACT_TREE_DEPTH):
+        parent_nodes = []
+        if len(child_nodes) % 2 == 1:
+            child_nodes.append(empty_node)
+        for j in range(0, len(child_nodes), 2):
+            parent_nodes.append(hash(child_nodes[j] + child_nodes[j + 1]))
+        child_nodes = parent_nodes
+        empty_node = hash(empty_node + empty_node)
+    return child_nodes[0] if child_nodes else empty_node
+
+
+def test_empty_tree_root():
+    tree = IncrementalDepositTree()
+    assert len(tree) == 0
+    assert tree.get_deposit_root() == ZEROHASHES[DEPOSIT_CONTRACT_TREE_DEPTH]
+    assert tree.get_deposit_root() == compute_merkle_root([])
+
+
+def test_incremental_root_matches_full_rebuild():
+    tree = IncrementalDepositTree()
+    leaves = []
+    for _ in range(70):
+        leaf = os.urandom(32)
+        leaves.append(leaf)
+        tree.append(leaf)
+        assert len(tree) == len(leaves)
+        assert tree.get_deposit_root() == compute_merkle_root(leaves)
+
+
+def test_copy_is_independent():
+    tree = IncrementalDepositTree()
+    tree.extend([os.urandom(32) for _ in range(5)])
+    snapshot = tree.copy()
+    root = snapshot.get_deposit_root()
+    tree.append(os.urandom(32))
+    assert snapshot.get_deposit_root() == root
+    assert tree.get_deposit_root() != root
+
+
+@pytest.mark.parametrize(
+    'branch,deposit_count',
+    [
+        ([b'\x00' * 32] * (DEPOSIT_CONTRACT_TREE_DEPTH - 1), 0),
+        (None, -1),
+        (None, MAX_DEPOSIT_COUNT + 1),
+    ]
+)
+def test_invalid_state(branch, deposit_count):
+    with pytest.raises(ValueError):
+        IncrementalDepositTree(branch, deposit_count)
+
+
+def test_append_invalid_leaf():
+    with pytest.raises(ValueError):
+        IncrementalDepositTree().append(b'\x00' * 31)
+
+
+def test_append_to_full_tree():
+    tree = IncrementalDepositTree(deposit_count=MAX_DEPOSIT_COUNT)
+    with pytest.raises(ValueError):
+        tree.append(b'\x00' * 32)
+
+
+def test_deposit_tree_matches_incremental_tree():
+    deposit_tree = DepositTree()
+    incremental_tree = IncrementalDepositTree()
+    assert deposit_tree.get_deposit_root() == incremental_tree.get_deposit_root()
+    for _ in range(70):
+        leaf = os.urandom(32)
+        deposit_tree.append(leaf)
+        incremental_tree.append(leaf)
+        assert deposit_tree.get_deposit_root() == incremental_tree.get_deposit_root()
+
+
+@pytest.mark.parametrize('deposit_count', [1, 2, 7, 8, 33])
+def test_deposit_tree_proofs(deposit_count):
+    leaves = [os.urandom(32) for _ in range(deposit_count)]
+    deposit_tree = DepositTree()
+    deposit_tree.extend(leaves)
+    root = deposit_tree.get_deposit_root()
+    for index, leaf in enumerate(leaves):
+        assert deposit_tree.get_leaf(index) == leaf
+        proof = deposit_tree.get_proof(index)
+        assert len(proof) == DEPOSIT_CONTRACT_TREE_DEPTH
+        assert verify_merkle_branch(leaf, proof, index, root)
+        assert not verify_merkle_branch(leaf, proof, index ^ 1, root)
+    with pytest.raises(IndexError):
+        deposit_tree.get_proof(deposit_count)
+
+
+@pytest.mark.parametrize('deposit_count', [0, 1, 5, 16, 33])
+def test_deposit_tree_from_leaves(deposit_count):
+    leaves = [os.urandom(32) for _ in range(deposit_count)]
+    appended_tree = DepositTree()
+    appended_tree.extend(leaves)
+    built_tree = DepositTree.from_leaves(leaves)
+    assert built_tree.deposit_count == deposit_count
+    assert built_tree.levels == appended_tree.levels
+    assert DepositTree.from_leaves(b''.join(leaves)).levels == appended_tree.levels
+
+
+@pytest.mark.parametrize('deposit_count,rollback_count', [(1, 0), (8, 5), (33, 32), (33, 17)])
+def test_deposit_tree_rollback(deposit_count, rollback_count):
+    leaves = [os.urandom(32) for _ in range(deposit_count)]
+    deposit_tree = DepositTree.from_leaves(leaves)
+    deposit_tree.rollback(rollback_count)
+    assert deposit_tree.levels == DepositTree.from_leaves(leaves[:rollback_count]).levels
+
+    # appends after a rollback replace the dropped leaves
+    new_leaves = [os.urandom(32) for _ in range(3)]
+    deposit_tree.extend(new_leaves)
+    expected_tree = DepositTree.from_leaves(leaves[:rollback_count] + new_leaves)
+    assert deposit_tree.get_deposit_root() == expected_tree.get_deposit_root()
+    with pytest.raises(ValueError):
+        deposit_tree.rollback(len(deposit_tree) + 1)
+
+
+def test_deposit_tree_history():
+    leaves = [os.urandom(32) for _ in range(37)]
+    deposit_tree = DepositTree.from_leaves(leaves)
+    counts = list(range(len(leaves) + 1))
+    prefix_trees = [DepositTree.from_leaves(leaves[:count]) for count in counts]
+    expected_roots = [prefix_tree.get_deposit_root() for prefix_tree in prefix_trees]
+    assert deposit_tree.get_roots_at(counts) == expected_roots
+    assert deposit_tree.get_roots_at([5, 0, 5, 37]) == [expected_roots[i] for i in (5, 0, 5, 37)]
+    for count, prefix_tree in zip(counts, prefix_trees):
+        assert deposit_tree.get_root_at(count) == expected_roots[count]
+        proofs = deposit_tree.get_proofs_at(range(count), count)
+        for index in range(count):
+            assert proofs[index] == prefix_tree.get_proof(index)
+            assert deposit_tree.get_proof_at(index, count) == proofs[index]
+            assert verify_merkle_branch(leaves[index], proofs[index], index, expected_roots[count])
+
+    with pytest.raises(ValueError):
+        deposit_tree.get_root_at(len(leaves) + 1)
+    with pytest.raises(IndexError):
+        deposit_tree.get_proof_at(5, 5)
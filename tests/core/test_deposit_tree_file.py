@@ -0,0 +1,181 @@
+import os
+
+import pytest
+
+from deposit_contract.deposit_tree import (
+    DepositTree,
+    verify_merkle_branch,
+)
+from deposit_contract.deposit_tree_file import (
+    COMMIT_SLOT_OFFSETS,
+    DepositTreeFile,
+)
+
+
+@pytest.fixture
+def tree_path(tmpdir):
+    return str(tmpdir.join('deposits.tree'))
+
+
+def test_matches_in_memory_tree(tree_path):
+    deposit_tree = DepositTree()
+    with DepositTreeFile.create(tree_path, capacity=64) as tree_file:
+        assert tree_file.get_deposit_root() == deposit_tree.get_deposit_root()
+        for _ in range(40):
+            leaf = os.urandom(32)
+            deposit_tree.append(leaf)
+            tree_file.append(leaf)
+            root = deposit_tree.get_deposit_root()
+            assert tree_file.get_deposit_root() == root
+            for index in range(len(deposit_tree)):
+                assert tree_file.get_proof(index) == deposit_tree.get_proof(index)
+        tree_file.commit()
+
+
+@pytest.mark.parametrize('count', [0, 1, 2, 15, 16, 17, 40])
+def test_from_leaves(tree_path, count):
+    leaves = [os.urandom(32) for _ in range(count)]
+    deposit_tree = DepositTree.from_leaves(leaves)
+    with DepositTreeFile.from_leaves(tree_path, leaves, capacity=64) as tree_file:
+        assert len(tree_file) == count
+        assert tree_file.get_deposit_root() == deposit_tree.get_deposit_root()
+    with DepositTreeFile(tree_path, writable=True) as tree_file:
+        assert len(tree_file) == count
+        for index in range(count):
+            assert tree_file.get_proof(index) == deposit_tree.get_proof(index)
+        # appends after a bulk build find the complete nodes they depend on
+        new_leaves = [os.urandom(32) for _ in range(5)]
+        tree_file.extend(new_leaves)
+        deposit_tree.extend(new_leaves)
+        for index in range(len(deposit_tree)):
+            assert tree_file.get_proof(index) == deposit_tree.get_proof(index)
+        assert tree_file.get_deposit_root() == deposit_tree.get_deposit_root()
+
+
+def test_from_leaves_capacity(tree_path):
+    with pytest.raises(ValueError):
+        DepositTreeFile.from_leaves(tree_path, [b'\x00' * 32] * 9, capacity=8)
+    assert not os.path.exists(tree_path)
+    with DepositTreeFile.from_leaves(tree_path, b'\x11' * 32 * 8, capacity=8) as tree_file:
+        assert len(tree_file) == 8
+
+
+def test_reopen_and_readers(tree_path):
+    leaves = [os.urandom(32) for _ in range(21)]
+    writer = DepositTreeFile.create(tree_path, capacity=32)
+    writer.extend(leaves[:13])
+    writer.commit()
+
+    reader = DepositTreeFile(tree_path)
+    assert len(reader) == 13
+    writer.extend(leaves[13:])
+    reader.refresh()
+    # appends are not visible before commit
+    assert len(reader) == 13
+    writer.commit()
+    reader.refresh()
+    assert len(reader) == 21
+
+    root = DepositTree.from_leaves(leaves).get_deposit_root()
+    assert reader.get_deposit_root() == root
+    for index, leaf in enumerate(leaves):
+        assert verify_merkle_branch(leaf, reader.get_proof(index), index, root)
+    with pytest.raises(ValueError):
+        reader.append(leaves[0])
+    reader.close()
+    writer.close()
+
+    with DepositTreeFile(tree_path, writable=True) as tree_file:
+        assert len(tree_file) == 21
+        assert tree_file.get_deposit_root() == root
+
+
+def test_uncommitted_appends_are_discarded(tree_path):
+    leaves = [os.urandom(32) for _ in range(10)]
+    with DepositTreeFile.create(tree_path, capacity=16) as tree_file:
+        tree_file.extend(leaves[:6])
+        tree_file.commit()
+        tree_file.extend(leaves[6:])
+
+    with DepositTreeFile(tree_path, writable=True) as tree_file:
+        expected_root = DepositTree.from_leaves(leaves[:6]).get_deposit_root()
+        assert tree_file.get_deposit_root() == expected_root
+        tree_file.extend(leaves[6:])
+        tree_file.commit()
+        assert tree_file.get_deposit_root() == DepositTree.from_leaves(leaves).get_deposit_root()
+
+
+def test_torn_header_falls_back_to_previous_commit(tree_path):
+    leaves = [os.urandom(32) for _ in range(5)]
+    with DepositTreeFile.create(tree_path, capacity=8) as tree_file:
+        tree_file.extend(leaves[:3])
+        tree_file.commit()
+        tree_file.extend(leaves[3:])
+        tree_file.commit()
+        last_slot = COMMIT_SLOT_OFFSETS[tree_file._sequence % 2]
+
+    with open(tree_path, 'r+b') as f:
+        f.seek(last_slot)
+        f.write(b'\xff' * 4)
+
+    with DepositTreeFile(tree_path) as tree_file:
+        assert len(tree_file) == 3
+        expected_root = DepositTree.from_leaves(leaves[:3]).get_deposit_root()
+        assert tree_file.get_deposit_root() == expected_root
+
+
+def test_capacity(tree_path):
+    with DepositTreeFile.create(tree_path, capacity=3) as tree_file:
+        tree_file.extend([os.urandom(32) for _ in range(3)])
+        with pytest.raises(ValueError):
+            tree_file.append(os.urandom(32))
+
+
+def test_single_writer(tree_path):
+    with DepositTreeFile.create(tree_path, capacity=4):
+        with pytest.raises(BlockingIOError):
+            DepositTreeFile(tree_path, writable=True)
+
+
+def test_invalid_file(tree_path):
+    with open(tree_path, 'wb') as f:
+        f.write(b'\x00' * 8192)
+    with pytest.raises(ValueError):
+        DepositTreeFile(tree_path)
+
+
+def test_rollback(tree_path):
+    leaves = [os.urandom(32) for _ in range(20)]
+    new_leaves = [os.urandom(32) for _ in range(9)]
+    with DepositTreeFile.create(tree_path, capacity=32) as tree_file:
+        tree_file.extend(leaves)
+        tree_file.commit()
+        tree_file.rollback(11)
+        expected_tree = DepositTree.from_leaves(leaves[:11])
+        assert tree_file.get_deposit_root() == expected_tree.get_deposit_root()
+        # the rollback is committed on its own
+        with DepositTreeFile(tree_path) as reader:
+            assert len(reader) == 11
+            assert reader.get_deposit_root() == expected_tree.get_deposit_root()
+
+        tree_file.extend(new_leaves)
+        tree_file.commit()
+        expected_tree = DepositTree.from_leaves(leaves[:11] + new_leaves)
+        assert tree_file.get_deposit_root() == expected_tree.get_deposit_root()
+        for index in range(len(expected_tree)):
+            assert tree_file.get_proof(index) == expected_tree.get_proof(index)
+
+
+def test_history(tree_path):
+    leaves = [os.urandom(32) for _ in range(21)]
+    with DepositTreeFile.create(tree_path, capacity=32) as tree_file:
+        tree_file.extend(leaves)
+        tree_file.commit()
+        deposit_tree = DepositTree.from_leaves(leaves)
+        counts = list(range(len(leaves) + 1))
+        assert tree_file.get_roots_at(counts) == deposit_tree.get_roots_at(counts)
+        for count in counts:
+            assert tree_file.get_proofs_at(range(count), count) == deposit_tree.get_proofs_at(
+                range(count),
+                count,
+            )
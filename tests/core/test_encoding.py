@@ -0,0 +1,175 @@
+import os
+
+import pytest
+
+from deposit_contract.encoding import (
+    DEPOSIT_LOG_DATA_LENGTH,
+    decode_bytes_argument,
+    decode_deposit_log_batch,
+    decode_deposit_log_data,
+    decode_eth2genesis_data,
+    encode_bytes_arguments,
+    encode_deposit_batch_call,
+    encode_uint256,
+    get_max_deposit_batch_size,
+    pad_right,
+)
+
+
+def test_encode_bytes_arguments():
+    encoded = encode_bytes_arguments(b'\x11' * 48, b'\x22' * 32, b'\x33' * 96)
+    # three head words, then a length word and the padded value for each argument
+    assert len(encoded) == 3 * 32 + (32 + 64) + (32 + 32) + (32 + 96)
+    assert [int.from_bytes(encoded[i:i + 32], 'big') for i in (0, 32, 64)] == [96, 192, 256]
+    assert int.from_bytes(encoded[96:128], 'big') == 48
+    assert encoded[128:176] == b'\x11' * 48
+    assert encoded[176:192] == b'\x00' * 16
+    for position, value in enumerate((b'\x11' * 48, b'\x22' * 32, b'\x33' * 96)):
+        assert decode_bytes_argument(encoded, position) == value
+
+
+def test_encode_empty_bytes():
+    encoded = encode_bytes_arguments(b'')
+    assert encoded == (32).to_bytes(32, 'big') + b'\x00' * 32
+    assert decode_bytes_argument(encoded, 0) == b''
+
+
+def test_decode_bytes_argument_out_of_range():
+    encoded = encode_bytes_arguments(b'\x11' * 48)
+    with pytest.raises(ValueError):
+        decode_bytes_argument(encoded[:-32], 0)
+
+
+@pytest.mark.parametrize(
+    'position,offset',
+    [
+        (0, 16),  # not word-aligned
+        (0, 0),  # inside the head
+        (1, 32),  # inside the head
+        (0, 224),  # at the end of the data
+        (0, 2**256 - 32),
+    ]
+)
+def test_decode_bytes_argument_corrupt_offset(position, offset):
+    encoded = bytearray(encode_bytes_arguments(b'\x11' * 48, b'\x22' * 32))
+    assert len(encoded) == 224
+    encoded[position * 32:position * 32 + 32] = encode_uint256(offset)
+    with pytest.raises(ValueError):
+        decode_bytes_argument(encoded, position)
+
+
+def test_decode_bytes_argument_missing_head_word():
+    encoded = encode_bytes_arguments(b'\x11' * 48)
+    with pytest.raises(ValueError):
+        decode_bytes_argument(encoded, 4)
+
+
+def test_decode_eth2genesis_data():
+    deposit_root = b'\x44' * 32
+    data = b''.join([
+        deposit_root,
+        encode_uint256(96),
+        encode_uint256(160),
+        encode_uint256(8),
+        pad_right((65536).to_bytes(8, 'little')),
+        encode_uint256(8),
+        pad_right((1546300800).to_bytes(8, 'little')),
+    ])
+    assert decode_eth2genesis_data(data) == (deposit_root, 65536, 1546300800)
+
+
+def test_encode_bytes_arguments_with_static_arguments():
+    static_arguments = encode_uint256(7) + encode_uint256(8)
+    encoded = encode_bytes_arguments(b'\x11' * 48, static_arguments=static_arguments)
+    # the offset word, then the static arguments, then the bytes argument
+    assert int.from_bytes(encoded[:32], 'big') == 96
+    assert encoded[32:96] == static_arguments
+    assert decode_bytes_argument(encoded, 0) == b'\x11' * 48
+
+
+def test_encode_deposit_batch_call():
+    pytest.importorskip('eth_utils')
+    deposits = [
+        (bytes([i]) * 48, bytes([i]) * 32, 32000000000 + i, bytes([i]) * 96)
+        for i in range(1, 4)
+    ]
+    max_batch_size = get_max_deposit_batch_size()
+    data = encode_deposit_batch_call(deposits)
+    arguments = data[4:]
+    for position, length in enumerate((48, 32, 96)):
+        value = decode_bytes_argument(arguments, position)
+        assert value == b''.join(bytes([i]) * length for i in range(1, 4))
+    amounts = [
+        int.from_bytes(arguments[32 * (3 + i):32 * (4 + i)], 'big') for i in range(max_batch_size)
+    ]
+    assert amounts == [32000000001, 32000000002, 32000000003] + [0] * (max_batch_size - 3)
+
+    with pytest.raises(ValueError):
+        encode_deposit_batch_call([])
+    with pytest.raises(ValueError):
+        encode_deposit_batch_call(deposits[:1] * (max_batch_size + 1))
+    with pytest.raises(ValueError):
+        encode_deposit_batch_call([(b'\x01' * 47,) + deposits[0][1:]])
+
+
+def make_deposit_log_data(index):
+    fields = (
+        os.urandom(48),
+        os.urandom(32),
+        (32000000000 + index).to_bytes(8, 'little'),
+        os.urandom(96),
+        index.to_bytes(8, 'little'),
+    )
+    return fields, encode_bytes_arguments(*fields)
+
+
+def test_decode_deposit_log_data():
+    fields, data = make_deposit_log_data(5)
+    assert len(data) == DEPOSIT_LOG_DATA_LENGTH
+    decoded = decode_deposit_log_data(data)
+    assert all(isinstance(value, memoryview) for value in decoded)
+    assert [bytes(value) for value in decoded] == list(fields)
+
+
+def test_decode_deposit_log_batch():
+    logs = [make_deposit_log_data(index) for index in range(10)]
+    deposit_data, indices = decode_deposit_log_batch(data for _, data in logs)
+    assert indices == list(range(10))
+    assert len(deposit_data) == 10
+    for row, (fields, _) in zip(deposit_data, logs):
+        pubkey, withdrawal_credentials, amount, signature, _ = fields
+        assert row.pubkey == pubkey
+        assert row.withdrawal_credentials == withdrawal_credentials
+        assert row.amount == int.from_bytes(amount, 'little')
+        assert row.signature == signature
+
+    deposit_data, indices = decode_deposit_log_batch([])
+    assert len(deposit_data) == 0
+    assert indices == []
+
+
+@pytest.mark.parametrize(
+    'position,value',
+    [
+        (31, 0xa1),  # the offset of the pubkey
+        (5 * 32 + 31, 47),  # the length of the pubkey
+        (5 * 32 + 32 + 48, 1),  # the padding after the pubkey
+        (352 + 8, 1),  # the padding after the amount
+        (DEPOSIT_LOG_DATA_LENGTH - 1, 1),  # the padding after the index
+    ]
+)
+def test_decode_deposit_log_data_malformed(position, value):
+    _, data = make_deposit_log_data(0)
+    data = bytearray(data)
+    data[position] = value
+    with pytest.raises(ValueError):
+        decode_deposit_log_data(data)
+    with pytest.raises(ValueError):
+        decode_deposit_log_batch([make_deposit_log_data(1)[1], data])
+
+
+def test_decode_deposit_log_data_wrong_length():
+    _, data = make_deposit_log_data(0)
+    for malformed in (data[:-32], data + b'\x00' * 32, b''):
+        with pytest.raises(ValueError):
+            decode_deposit_log_data(malformed)
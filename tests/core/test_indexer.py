@@ -0,0 +1,39 @@
+import pytest
+
+from deposit_contract.deposit_tree import (
+    IncrementalDepositTree,
+)
+from deposit_contract.indexer import (
+    IndexerCheckpoint,
+)
+
+
+def test_checkpoint_round_trip(tmpdir):
+    path = str(tmpdir.join('checkpoint.json'))
+    assert IndexerCheckpoint.load(path) is None
+
+    tree = IncrementalDepositTree()
+    tree.extend(bytes([i]) * 32 for i in range(5))
+    genesis = (tree.get_deposit_root(), 5, 86400, 12)
+    address = '0x' + '11' * 20
+    IndexerCheckpoint(address, 12, tree.deposit_count, tree.branch, genesis).save(path)
+    # only the checkpoint itself is left in the directory
+    assert tmpdir.listdir() == [tmpdir.join('checkpoint.json')]
+
+    checkpoint = IndexerCheckpoint.load(path)
+    assert checkpoint.contract_address == address
+    assert checkpoint.block_number == 12
+    assert checkpoint.genesis == genesis
+    restored = IncrementalDepositTree(checkpoint.branch, checkpoint.deposit_count)
+    assert restored.get_deposit_root() == tree.get_deposit_root()
+
+    checkpoint.block_number = 20
+    checkpoint.save(path)
+    assert IndexerCheckpoint.load(path).block_number == 20
+
+
+def test_checkpoint_version():
+    checkpoint_json = IndexerCheckpoint('0x' + '11' * 20, 0, 0, []).to_json()
+    checkpoint_json['version'] += 1
+    with pytest.raises(ValueError):
+        IndexerCheckpoint.from_json(checkpoint_json)
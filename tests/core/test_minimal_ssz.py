@@ -0,0 +1,298 @@
+import os
+
+import pytest
+
+from tests.utils import (
+    minimal_ssz,
+)
+from tests.utils.minimal_ssz import (
+    ZERO_CHUNK,
+    ZERO_HASHES,
+    IncrementalList,
+    SSZType,
+    hash,
+    hash_tree_root,
+    is_power_of_two,
+    merkleize,
+    serialize_value,
+)
+
+DepositData = SSZType({
+    'pubkey': 'bytes48',
+    'withdrawal_credentials': 'bytes32',
+    'amount': 'uint64',
+    'signature': 'bytes96',
+})
+
+Checkpoint = SSZType({
+    'index': 'uint32',
+    'deposits': [DepositData],
+    'roots': ['bytes32', 2],
+    'data': 'bytes',
+    'ready': 'bool',
+})
+
+Wrapper = SSZType({
+    'deposit': DepositData,
+})
+
+Registry = SSZType({
+    'balances': ['uint64'],
+    'version': 'uint8',
+})
+
+
+def merkleize_padded(chunks):
+    tree = chunks[::]
+    while not is_power_of_two(len(tree)):
+        tree.append(ZERO_CHUNK)
+    tree = [ZERO_CHUNK] * len(tree) + tree
+    for i in range(len(tree) // 2 - 1, 0, -1):
+        tree[i] = hash(tree[i * 2] + tree[i * 2 + 1])
+    return tree[1]
+
+
+def test_zero_hashes():
+    assert ZERO_HASHES[0] == ZERO_CHUNK
+    for h in range(1, len(ZERO_HASHES)):
+        assert ZERO_HASHES[h] == hash(ZERO_HASHES[h - 1] + ZERO_HASHES[h - 1])
+
+
+@pytest.mark.parametrize('chunk_count', [0, 1, 2, 3, 4, 5, 7, 8, 9, 31, 33, 100])
+def test_merkleize(chunk_count):
+    chunks = [os.urandom(32) for _ in range(chunk_count)]
+    original = chunks[::]
+    assert merkleize(chunks) == merkleize_padded(chunks)
+    assert chunks == original
+
+
+def make_deposit_data(amount):
+    return DepositData(
+        pubkey=os.urandom(48),
+        withdrawal_credentials=os.urandom(32),
+        amount=amount,
+        signature=os.urandom(96),
+    )
+
+
+def as_dynamic(value):
+    # a plain object and type exposing only `fields` take the generic dispatch path
+    class DynamicType():
+        fields = value.fields
+
+    class DynamicObject():
+        pass
+
+    dynamic_value = DynamicObject()
+    for field, subtype in value.fields.items():
+        field_value = getattr(value, field)
+        if hasattr(subtype, 'fields'):
+            field_value = as_dynamic(field_value)[0]
+        elif isinstance(subtype, list) and hasattr(subtype[0], 'fields'):
+            field_value = [as_dynamic(element)[0] for element in field_value]
+        setattr(dynamic_value, field, field_value)
+    return dynamic_value, DynamicType
+
+
+def as_dynamic_root(value):
+    return hash_tree_root(*as_dynamic(value))
+
+
+def test_compiled_container_layout():
+    assert DepositData.ssz_size == 48 + 32 + 8 + 96
+    assert DepositData.field_offsets == {
+        'pubkey': 0,
+        'withdrawal_credentials': 48,
+        'amount': 80,
+        'signature': 88,
+    }
+    assert Checkpoint.ssz_size is None
+    with pytest.raises(AttributeError):
+        make_deposit_data(1).extra = 1
+
+
+@pytest.mark.parametrize('amount', [0, 1, 32 * 10**9, 2**64 - 1])
+def test_compiled_codecs_match_dynamic_path(amount):
+    deposit_data = make_deposit_data(amount)
+    dynamic_value, dynamic_type = as_dynamic(deposit_data)
+    assert deposit_data.serialize() == serialize_value(dynamic_value, dynamic_type)
+    assert deposit_data.hash_tree_root() == hash_tree_root(dynamic_value, dynamic_type)
+    assert hash_tree_root(deposit_data) == deposit_data.hash_tree_root()
+
+    checkpoint = Checkpoint(
+        index=amount % 2**32,
+        deposits=[make_deposit_data(amount) for _ in range(3)],
+        roots=[os.urandom(32), os.urandom(32)],
+        data=b'checkpoint',
+        ready=True,
+    )
+    dynamic_value, dynamic_type = as_dynamic(checkpoint)
+    assert checkpoint.serialize() == serialize_value(dynamic_value, dynamic_type)
+    assert checkpoint.hash_tree_root() == hash_tree_root(dynamic_value, dynamic_type)
+
+
+def test_compiled_codecs_match_dynamic_path_list_field():
+    registry = Registry(balances=[1, 2, 3], version=4)
+    dynamic_value, dynamic_type = as_dynamic(registry)
+    assert registry.serialize() == serialize_value(dynamic_value, dynamic_type)
+    assert registry.hash_tree_root() == hash_tree_root(dynamic_value, dynamic_type)
+    assert Registry.ssz_size is None
+
+    wrapper = SSZType({'registry': Registry, 'index': 'uint32'})(registry=registry, index=5)
+    dynamic_value, dynamic_type = as_dynamic(wrapper)
+    assert wrapper.serialize() == serialize_value(dynamic_value, dynamic_type)
+
+
+def test_compiled_codecs_validate_sizes():
+    deposit_data = make_deposit_data(1)
+    deposit_data.pubkey = b'\x00' * 47
+    with pytest.raises(AssertionError):
+        deposit_data.serialize()
+    with pytest.raises(AssertionError):
+        deposit_data.hash_tree_root()
+    deposit_data = make_deposit_data(2**64)
+    with pytest.raises(OverflowError):
+        deposit_data.serialize()
+
+
+@pytest.fixture
+def hash_calls(monkeypatch):
+    calls = []
+
+    def counting_hash(x):
+        calls.append(x)
+        return hash(x)
+
+    monkeypatch.setattr(minimal_ssz, 'hash', counting_hash)
+    return calls
+
+
+def test_cached_hash_tree_root(hash_calls):
+    deposit_data = make_deposit_data(1)
+    root = deposit_data.hash_tree_root()
+    del hash_calls[:]
+    assert deposit_data.hash_tree_root() == root
+    assert {deposit_data: 1}[deposit_data] == 1
+    assert len(hash_calls) == 0
+
+    # amount fits in one chunk, so only the two nodes above it are rehashed
+    deposit_data.amount = 2
+    root = deposit_data.hash_tree_root()
+    assert len(hash_calls) == 2
+    assert root == as_dynamic_root(deposit_data)
+
+    del hash_calls[:]
+    deposit_data.pubkey = os.urandom(48)
+    root = deposit_data.hash_tree_root()
+    assert len(hash_calls) == 3
+    assert root == as_dynamic_root(deposit_data)
+
+    # assigning an equal value leaves the upper tree untouched
+    del hash_calls[:]
+    deposit_data.amount = 2
+    assert deposit_data.hash_tree_root() == root
+    assert len(hash_calls) == 0
+
+
+def test_cached_hash_tree_root_nested_container():
+    wrapper = Wrapper(deposit=make_deposit_data(1))
+    wrapper.hash_tree_root()
+    wrapper.deposit.amount = 3
+    assert wrapper.hash_tree_root() == as_dynamic_root(wrapper)
+    wrapper.deposit = make_deposit_data(4)
+    assert wrapper.hash_tree_root() == as_dynamic_root(wrapper)
+
+
+def test_cached_hash_tree_root_list_fields():
+    registry = Registry(balances=[1, 2, 3], version=4)
+    registry.hash_tree_root()
+    registry.balances.append(5)
+    expected = Registry(balances=[1, 2, 3, 5], version=4)
+    assert registry.hash_tree_root() == expected.hash_tree_root()
+    registry.balances[0] = 6
+    assert registry.hash_tree_root() == as_dynamic_root(registry)
+
+    checkpoint = Checkpoint(
+        index=0,
+        deposits=[make_deposit_data(1)],
+        roots=[os.urandom(32), os.urandom(32)],
+        data=b'data',
+        ready=False,
+    )
+    root = checkpoint.hash_tree_root()
+    hash_value = checkpoint.__hash__()
+    checkpoint.deposits[0].amount = 2
+    assert checkpoint.hash_tree_root() == as_dynamic_root(checkpoint)
+    checkpoint.deposits.append(make_deposit_data(3))
+    checkpoint.roots[1] = os.urandom(32)
+    assert checkpoint.hash_tree_root() == as_dynamic_root(checkpoint)
+    assert checkpoint.hash_tree_root() != root
+    # equal objects hash alike after in-place changes
+    copy = Checkpoint(**{field: getattr(checkpoint, field) for field in Checkpoint.fields})
+    assert copy == checkpoint
+    assert copy.__hash__() == checkpoint.__hash__() != hash_value
+
+
+def test_incremental_list():
+    deposits = IncrementalList(DepositData)
+    items = []
+    assert deposits.hash_tree_root() == hash_tree_root(items, [DepositData])
+    for i in range(20):
+        deposit_data = make_deposit_data(i)
+        deposits.append(deposit_data)
+        items.append(deposit_data)
+        assert len(deposits) == len(items)
+        assert deposits.hash_tree_root() == hash_tree_root(items, [DepositData])
+        assert hash_tree_root(deposits) == deposits.hash_tree_root()
+
+    deposits[5] = items[5] = make_deposit_data(100)
+    deposits[-1] = items[-1] = make_deposit_data(101)
+    assert deposits.hash_tree_root() == hash_tree_root(items, [DepositData])
+    assert serialize_value(deposits) == serialize_value(items, [DepositData])
+
+    checkpoint = Checkpoint(
+        index=0,
+        deposits=deposits,
+        roots=[os.urandom(32), os.urandom(32)],
+        data=b'',
+        ready=False,
+    )
+    assert checkpoint.hash_tree_root() == as_dynamic_root(checkpoint)
+
+
+@pytest.mark.parametrize('key,count', [
+    (slice(2, 5), 3),
+    (slice(None, None, 3), 4),
+    (slice(-2, None), 2),
+    (slice(3, 6), 1),
+    (slice(4, 4), 2),
+    (slice(None), 0),
+])
+def test_incremental_list_slice_assignment(key, count):
+    items = [make_deposit_data(i) for i in range(10)]
+    deposits = IncrementalList(DepositData, items)
+    replacements = [make_deposit_data(100 + i) for i in range(count)]
+    deposits[key] = replacements
+    items[key] = replacements
+    assert list(deposits) == items
+    assert deposits.hash_tree_root() == hash_tree_root(items, [DepositData])
+    deposits.append(make_deposit_data(200))
+    items.append(deposits[-1])
+    assert deposits.hash_tree_root() == hash_tree_root(items, [DepositData])
+
+
+def test_incremental_list_extended_slice_length():
+    deposits = IncrementalList(DepositData, [make_deposit_data(i) for i in range(4)])
+    root = deposits.hash_tree_root()
+    with pytest.raises(ValueError):
+        deposits[::2] = [make_deposit_data(5)]
+    assert deposits.hash_tree_root() == root
+
+
+def test_incremental_list_append_cost(hash_calls):
+    deposits = IncrementalList('bytes32', [os.urandom(32) for _ in range(1000)])
+    del hash_calls[:]
+    deposits.append(os.urandom(32))
+    deposits.hash_tree_root()
+    # one hash per level of the 1024-wide tree plus the length mix-in
+    assert len(hash_calls) == 10 + 1
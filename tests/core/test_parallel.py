@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from deposit_contract import (
+    parallel,
+)
+from deposit_contract.deposit_data import (
+    DEPOSIT_DATA_LENGTH,
+    hash_deposit_data_batch,
+)
+from deposit_contract.deposit_tree import (
+    DepositTree,
+)
+
+
+@pytest.fixture
+def small_parallel_threshold(monkeypatch):
+    monkeypatch.setattr(parallel, 'MIN_PARALLEL_LEAVES', 2)
+
+
+@pytest.mark.parametrize('deposit_count', [0, 1, 2, 3, 17, 64, 100])
+@pytest.mark.parametrize('processes', [1, 2, 3])
+def test_compute_deposit_root_parallel(small_parallel_threshold, deposit_count, processes):
+    deposit_data = os.urandom(deposit_count * DEPOSIT_DATA_LENGTH)
+    leaves = hash_deposit_data_batch(deposit_data)
+    expected_root = DepositTree.from_leaves(leaves).get_deposit_root()
+    assert parallel.compute_deposit_root_parallel(deposit_data, processes) == expected_root
+    assert parallel.compute_leaves_root_parallel(leaves, processes) == expected_root
+
+
+def test_compute_root_parallel_invalid_buffer():
+    with pytest.raises(ValueError):
+        parallel.compute_deposit_root_parallel(b'\x00' * (DEPOSIT_DATA_LENGTH - 1))
+    with pytest.raises(ValueError):
+        parallel.compute_leaves_root_parallel(b'\x00' * 33)
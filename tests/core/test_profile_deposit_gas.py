@@ -0,0 +1,81 @@
+from tool.profile_deposit_gas import (
+    DISPATCHER_FRAME,
+    SourceMap,
+    folded_stacks,
+    hotspots,
+)
+
+CONTRACT_CODE = '''THRESHOLD: constant(uint256) = 8
+
+@public
+def deposit(value: uint256):
+    self.count += 1; self.total += value
+
+@public
+def get_count() -> uint256:
+    return self.count
+'''
+# runtime pc -> (line, column, end line, end column), as recorded by the compiler
+PC_POS_MAP = {
+    10: (1, 0, 1, 34),
+    20: (5, 4, 5, 40),
+    32: (5, 25, 5, 40),
+    40: (9, 4, 9, 21),
+}
+
+DEPOSIT_FRAME = 'deposit:5 self.count += 1, self.total += value'
+GET_COUNT_FRAME = 'get_count:9 return self.count'
+
+
+def test_source_map_line_numbers():
+    source_map = SourceMap(CONTRACT_CODE, PC_POS_MAP)
+    assert source_map.get_line_number(0) is None
+    assert source_map.get_line_number(9) is None
+    assert source_map.get_line_number(10) == 1
+    assert source_map.get_line_number(19) == 1
+    # a pc between recorded positions belongs to the construct started before it
+    assert source_map.get_line_number(25) == 5
+    assert source_map.get_line_number(32) == 5
+    assert source_map.get_line_number(40) == 9
+    assert source_map.get_line_number(1000) == 9
+
+
+def test_source_map_frames():
+    source_map = SourceMap(CONTRACT_CODE, PC_POS_MAP)
+    assert source_map.get_frame(0) == DISPATCHER_FRAME
+    assert source_map.get_frame(10) == '<module>:1 THRESHOLD: constant(uint256) = 8'
+    assert source_map.get_frame(20) == DEPOSIT_FRAME
+    assert source_map.get_frame(33) == DEPOSIT_FRAME
+    assert source_map.get_frame(41) == GET_COUNT_FRAME
+
+
+RECORDS = [
+    # (call stack, pc, mnemonic, exclusive gas)
+    ((), 0, 'PUSH1', 3),
+    ((), 5, 'JUMPI', 10),
+    ((), 20, 'SLOAD', 200),
+    ((), 32, 'SSTORE', 5000),
+    ((32,), 41, 'SLOAD', 200),
+    ((32,), 42, 'RETURN', 0),
+    ((), 34, 'CALL', 700),
+]
+
+
+def test_hotspots():
+    source_map = SourceMap(CONTRACT_CODE, PC_POS_MAP)
+    assert hotspots(RECORDS, source_map) == [
+        (DEPOSIT_FRAME, (5900, 3)),
+        (GET_COUNT_FRAME, (200, 2)),
+        (DISPATCHER_FRAME, (13, 2)),
+    ]
+
+
+def test_folded_stacks():
+    source_map = SourceMap(CONTRACT_CODE, PC_POS_MAP)
+    assert folded_stacks(RECORDS, source_map, 'deposit') == [
+        'deposit;%s %d' % (DISPATCHER_FRAME, 13),
+        'deposit;%s %d' % (DEPOSIT_FRAME, 5900),
+        'deposit;%s;%s %d' % (DEPOSIT_FRAME, GET_COUNT_FRAME, 200),
+    ]
+    # steps that cost no gas of their own are left out
+    assert folded_stacks([((), 20, 'STOP', 0)], source_map, 'deposit') == []
@@ -0,0 +1,28 @@
+import pytest
+
+from deposit_contract.deposit_tree import (
+    DEPOSIT_CONTRACT_TREE_DEPTH,
+)
+from deposit_contract.storage import (
+    BRANCH_SLOT,
+    ZEROHASHES_SLOT,
+    get_array_slot,
+    get_branch_slots,
+    get_zerohashes_slots,
+)
+
+
+def test_branch_slots():
+    pytest.importorskip('eth_utils')
+    # keccak256(uint256(1)), the start of the array stored at slot 1
+    start = 0xb10e2d527612073b26eecdfd717e6a320cf44b4afac2b0732d9fcbe2b7fa0cf6
+    assert get_array_slot(BRANCH_SLOT, 0) == start
+    assert get_branch_slots() == list(range(start, start + DEPOSIT_CONTRACT_TREE_DEPTH))
+
+
+def test_zerohashes_slots():
+    pytest.importorskip('eth_utils')
+    # keccak256(uint256(0)), the start of the array stored at slot 0
+    start = 0x290decd9548b62a8d60345a988386fc84ba6bc95484008f6362f93160ef3e563
+    assert get_array_slot(ZEROHASHES_SLOT, 0) == start
+    assert get_zerohashes_slots() == list(range(start, start + DEPOSIT_CONTRACT_TREE_DEPTH))
@@ -5,20 +5,39 @@ from hashlib import (
 BYTES_PER_CHUNK = 32
 BYTES_PER_LENGTH_PREFIX = 4
 ZERO_CHUNK = b'\x00' * BYTES_PER_CHUNK
+# field values of these types only change by assignment
+IMMUTABLE_TYPES = (bytes, int, str)
 
 
 def hash(x):
     return sha256(x).digest()
 
 
+# ZERO_HASHES[h] is the root of an all-zero subtree of height h, like the contract's `zerohashes`
+ZERO_HASHES = [ZERO_CHUNK]
+for _ in range(64):
+    ZERO_HASHES.append(hash(ZERO_HASHES[-1] + ZERO_HASHES[-1]))
+
+
 def SSZType(fields):
     class SSZObject():
+        # ssz_root_tree caches the container's field-root tree, ssz_dirty_fields
+        # names the fields assigned since it was last brought up to date
+        __slots__ = tuple(fields) + ('ssz_root_tree', 'ssz_dirty_fields')
+
         def __init__(self, **kwargs):
+            object.__setattr__(self, 'ssz_root_tree', None)
+            object.__setattr__(self, 'ssz_dirty_fields', set())
             for f in fields:
                 if f not in kwargs:
                     raise Exception("Missing constructor argument: %s" % f)
                 setattr(self, f, kwargs[f])
 
+        def __setattr__(self, name, value):
+            object.__setattr__(self, name, value)
+            if self.ssz_root_tree is not None and name in fields:
+                self.ssz_dirty_fields.add(name)
+
         def __eq__(self, other):
             return (
                 self.fields == other.fields and
@@ -35,12 +54,13 @@ def SSZType(fields):
             return "\n".join(output)
 
         def serialize(self):
-            return serialize_value(self, self.__class__)
+            return self.ssz_serialize(self)
 
         def hash_tree_root(self):
-            return hash_tree_root(self, self.__class__)
+            return self.ssz_hash_tree_root(self)
 
     SSZObject.fields = fields
+    compile_container(SSZObject)
     return SSZObject
 
 
@@ -62,6 +82,82 @@ class Vector():
         return self.length
 
 
+class IncrementalList():
+    """
+    List of non-basic ``element_type`` values that keeps its chunk tree, so that
+    ``append`` plus ``hash_tree_root`` cost O(log n) instead of re-merkleizing the list.
+    Elements must be replaced through ``__setitem__`` rather than mutated in place.
+    """
+
+    def __init__(self, element_type, items=()):
+        assert not is_basic(element_type)
+        self.element_type = element_type
+        self.hash_element = compile_hasher(element_type)
+        self.items = []
+        # levels[h] holds the populated nodes at height h; the rest are ZERO_HASHES[h]
+        self.levels = [[]]
+        for item in items:
+            self.append(item)
+
+    def __getitem__(self, key):
+        return self.items[key]
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            items = list(self.items)
+            items[key] = value
+            if len(items) == len(self.items):
+                for index in range(len(items))[key]:
+                    self[index] = items[index]
+            else:
+                # the leaves after the slice move, so the tree is rebuilt
+                self.items = []
+                self.levels = [[]]
+                for item in items:
+                    self.append(item)
+            return
+        index = range(len(self.items))[key]
+        self.items[index] = value
+        self.levels[0][index] = self.hash_element(value)
+        self.update_path(index)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def append(self, value):
+        self.items.append(value)
+        self.levels[0].append(self.hash_element(value))
+        while len(self.levels) <= self.depth():
+            self.levels.append([])
+        self.update_path(len(self.items) - 1)
+
+    def depth(self):
+        return max(len(self.items) - 1, 0).bit_length()
+
+    def update_path(self, index):
+        node = self.levels[0][index]
+        for h in range(self.depth()):
+            if index % 2 == 1:
+                node = hash(self.levels[h][index - 1] + node)
+            elif index + 1 < len(self.levels[h]):
+                node = hash(node + self.levels[h][index + 1])
+            else:
+                node = hash(node + ZERO_HASHES[h])
+            index //= 2
+            parents = self.levels[h + 1]
+            if index == len(parents):
+                parents.append(node)
+            else:
+                parents[index] = node
+
+    def hash_tree_root(self):
+        root = self.levels[self.depth()][0] if self.items else ZERO_CHUNK
+        return mix_in_length(root, len(self.items))
+
+
 def is_basic(typ):
     return isinstance(typ, str) and (typ[:4] in ('uint', 'bool') or typ == 'byte')
 
@@ -98,7 +194,9 @@ def coerce_to_bytes(x):
 def serialize_value(value, typ=None):
     if typ is None:
         typ = infer_type(value)
-    if isinstance(typ, str) and typ[:4] == 'uint':
+    if hasattr(typ, 'ssz_serialize'):
+        return typ.ssz_serialize(value)
+    elif isinstance(typ, str) and typ[:4] == 'uint':
         length = int(typ[4:])
         assert length in (8, 16, 32, 64, 128, 256)
         return value.to_bytes(length // 8, 'little')
@@ -148,13 +246,17 @@ def is_power_of_two(x):
 
 
 def merkleize(chunks):
-    tree = chunks[::]
-    while not is_power_of_two(len(tree)):
-        tree.append(ZERO_CHUNK)
-    tree = [ZERO_CHUNK] * len(tree) + tree
-    for i in range(len(tree) // 2 - 1, 0, -1):
-        tree[i] = hash(tree[i * 2] + tree[i * 2 + 1])
-    return tree[1]
+    # Only the populated part of each level is hashed; the padding up to the next
+    # power of two is made of all-zero subtrees whose roots are in ZERO_HASHES.
+    if len(chunks) == 0:
+        return ZERO_CHUNK
+    level = chunks
+    for h in range((len(chunks) - 1).bit_length()):
+        next_level = [hash(level[i] + level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2 == 1:
+            next_level.append(hash(level[-1] + ZERO_HASHES[h]))
+        level = next_level
+    return level[0]
 
 
 def mix_in_length(root, length):
@@ -164,6 +266,8 @@ def mix_in_length(root, length):
 def infer_type(value):
     if hasattr(value.__class__, 'fields'):
         return value.__class__
+    elif isinstance(value, IncrementalList):
+        return [value.element_type]
     elif isinstance(value, Vector):
         return [infer_type(value[0]) if len(value) > 0 else 'uint64', len(value)]
     elif isinstance(value, list):
@@ -179,11 +283,15 @@ def infer_type(value):
 def hash_tree_root(value, typ=None):
     if typ is None:
         typ = infer_type(value)
-    if is_basic(typ):
+    if hasattr(typ, 'ssz_hash_tree_root'):
+        return typ.ssz_hash_tree_root(value)
+    elif is_basic(typ):
         return merkleize(pack([value], typ))
     elif isinstance(typ, list) and len(typ) == 1 and is_basic(typ[0]):
         return mix_in_length(merkleize(pack(value, typ[0])), len(value))
     elif isinstance(typ, list) and len(typ) == 1 and not is_basic(typ[0]):
+        if isinstance(value, IncrementalList) and value.element_type == typ[0]:
+            return value.hash_tree_root()
         return mix_in_length(
             merkleize([hash_tree_root(element, typ[0]) for element in value]),
             len(value),
@@ -207,6 +315,194 @@ def hash_tree_root(value, typ=None):
         raise Exception("Type not recognized")
 
 
+def get_constant_size(typ):
+    if isinstance(typ, str) and typ[:4] == 'uint':
+        return int(typ[4:]) // 8
+    elif typ in ('bool', 'byte'):
+        return 1
+    elif isinstance(typ, str) and len(typ) > 5 and typ[:5] == 'bytes':
+        return int(typ[5:])
+    elif hasattr(typ, 'ssz_size'):
+        return typ.ssz_size
+    else:
+        return None
+
+
+def compile_serializer(typ):
+    if hasattr(typ, 'ssz_serialize'):
+        return typ.ssz_serialize
+    elif isinstance(typ, str) and typ[:4] == 'uint':
+        length = int(typ[4:])
+        assert length in (8, 16, 32, 64, 128, 256)
+        byte_length = length // 8
+
+        def serialize_uint(value):
+            return value.to_bytes(byte_length, 'little')
+        return serialize_uint
+    elif isinstance(typ, str) and len(typ) > 5 and typ[:5] == 'bytes':
+        byte_length = int(typ[5:])
+
+        def serialize_bytesN(value):
+            assert len(value) == byte_length, (value, byte_length)
+            return coerce_to_bytes(value)
+        return serialize_bytesN
+    elif isinstance(typ, list) and len(typ) == 1:
+        serialize_element = compile_serializer(typ[0])
+
+        def serialize_list(value):
+            serialized_bytes = b''.join([serialize_element(element) for element in value])
+            assert len(serialized_bytes) < 2**(8 * BYTES_PER_LENGTH_PREFIX)
+            serialized_length = len(serialized_bytes).to_bytes(BYTES_PER_LENGTH_PREFIX, 'little')
+            return serialized_length + serialized_bytes
+        return serialize_list
+    elif isinstance(typ, list) and len(typ) == 2:
+        serialize_element = compile_serializer(typ[0])
+        length = typ[1]
+
+        def serialize_vector(value):
+            assert len(value) == length
+            return b''.join([serialize_element(element) for element in value])
+        return serialize_vector
+    else:
+        def serialize_generic(value):
+            return serialize_value(value, typ)
+        return serialize_generic
+
+
+def compile_hasher(typ):
+    if hasattr(typ, 'ssz_hash_tree_root'):
+        return typ.ssz_hash_tree_root
+    elif is_basic(typ):
+        # a single basic value packs into one zero-padded chunk, which is its own root
+        serialize_basic = compile_serializer(typ)
+        padding = b'\x00' * (BYTES_PER_CHUNK - get_constant_size(typ))
+
+        def hash_basic(value):
+            return serialize_basic(value) + padding
+        return hash_basic
+    elif isinstance(typ, str) and len(typ) > 5 and typ[:5] == 'bytes':
+        byte_length = int(typ[5:])
+
+        def hash_bytesN(value):
+            assert len(value) == byte_length
+            return merkleize(chunkify(coerce_to_bytes(value)))
+        return hash_bytesN
+    elif isinstance(typ, list) and len(typ) == 1 and not is_basic(typ[0]):
+        hash_element = compile_hasher(typ[0])
+
+        def hash_list(value):
+            if isinstance(value, IncrementalList) and value.element_type == typ[0]:
+                return value.hash_tree_root()
+            return mix_in_length(
+                merkleize([hash_element(element) for element in value]),
+                len(value),
+            )
+        return hash_list
+    elif isinstance(typ, list) and len(typ) == 2 and not is_basic(typ[0]):
+        hash_element = compile_hasher(typ[0])
+
+        def hash_vector(value):
+            return merkleize([hash_element(element) for element in value])
+        return hash_vector
+    else:
+        def hash_generic(value):
+            return hash_tree_root(value, typ)
+        return hash_generic
+
+
+def compile_container(typ):
+    """
+    Resolve the layout of container ``typ`` once and attach specialized
+    ``ssz_serialize`` and ``ssz_hash_tree_root`` functions to it.
+    """
+    field_names = list(typ.fields.keys())
+    field_sizes = [get_constant_size(subtype) for subtype in typ.fields.values()]
+    field_serializers = [compile_serializer(subtype) for subtype in typ.fields.values()]
+    field_hashers = [compile_hasher(subtype) for subtype in typ.fields.values()]
+
+    if None not in field_sizes:
+        typ.ssz_size = sum(field_sizes)
+        typ.field_offsets = {}
+        layout = []
+        offset = 0
+        for field, size, serialize_field in zip(field_names, field_sizes, field_serializers):
+            typ.field_offsets[field] = offset
+            layout.append((field, slice(offset, offset + size), serialize_field))
+            offset += size
+
+        def serialize_container(value):
+            serialized_bytes = bytearray(typ.ssz_size)
+            for field, position, serialize_field in layout:
+                serialized_bytes[position] = serialize_field(getattr(value, field))
+            return bytes(serialized_bytes)
+    else:
+        typ.ssz_size = None
+        typ.field_offsets = None
+        fields_and_serializers = list(zip(field_names, field_serializers))
+        # the length prefix follows `is_constant_sized`, which counts a list of
+        # constant-sized elements as constant-sized
+        prefixed = not is_constant_sized(typ)
+
+        def serialize_container(value):
+            serialized_bytes = b''.join([
+                serialize_field(getattr(value, field))
+                for field, serialize_field in fields_and_serializers
+            ])
+            if not prefixed:
+                return serialized_bytes
+            assert len(serialized_bytes) < 2**(8 * BYTES_PER_LENGTH_PREFIX)
+            serialized_length = len(serialized_bytes).to_bytes(BYTES_PER_LENGTH_PREFIX, 'little')
+            return serialized_length + serialized_bytes
+
+    fields_and_hashers = list(zip(field_names, field_hashers))
+    field_indices = {field: i for i, field in enumerate(field_names)}
+    width = 1 << max(len(field_names) - 1, 0).bit_length()
+
+    def hash_container(value):
+        if value.__class__ is not typ:
+            return merkleize([
+                hash_field(getattr(value, field))
+                for field, hash_field in fields_and_hashers
+            ])
+
+        tree = value.ssz_root_tree
+        if tree is None:
+            tree = [ZERO_CHUNK] * (2 * width)
+            for i, (field, hash_field) in enumerate(fields_and_hashers):
+                tree[width + i] = hash_field(getattr(value, field))
+            for i in range(width - 1, 0, -1):
+                tree[i] = hash(tree[i * 2] + tree[i * 2 + 1])
+            object.__setattr__(value, 'ssz_root_tree', tree)
+            return tree[1]
+
+        dirty_fields = value.ssz_dirty_fields
+        # Mutable field values (lists, vectors, nested containers) may change without
+        # an assignment on this object, so their roots are re-read on every call;
+        # nested containers and IncrementalLists answer from their own caches.
+        dirty_fields.update(
+            field for field in field_names
+            if not isinstance(getattr(value, field), IMMUTABLE_TYPES)
+        )
+        nodes = set()
+        for field in dirty_fields:
+            i = field_indices[field]
+            field_root = field_hashers[i](getattr(value, field))
+            if tree[width + i] != field_root:
+                tree[width + i] = field_root
+                if width > 1:
+                    nodes.add((width + i) >> 1)
+        dirty_fields.clear()
+        # rehash only the paths from the changed field roots up to the root
+        while nodes:
+            for i in nodes:
+                tree[i] = hash(tree[i * 2] + tree[i * 2 + 1])
+            nodes = {i >> 1 for i in nodes if i > 1}
+        return tree[1]
+
+    typ.ssz_serialize = staticmethod(serialize_container)
+    typ.ssz_hash_tree_root = staticmethod(hash_container)
+
+
 def truncate(container):
     field_keys = list(container.fields.keys())
     truncated_fields = {
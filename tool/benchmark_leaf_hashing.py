@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import time
+
+from deposit_contract.deposit_data import (
+    AMOUNT_OFFSET,
+    DEPOSIT_DATA_LENGTH,
+    PUBKEY_OFFSET,
+    SIGNATURE_OFFSET,
+    WITHDRAWAL_CREDENTIALS_OFFSET,
+    hash_deposit_data_batch,
+)
+from tests.utils.minimal_ssz import (
+    SSZType,
+    hash_tree_root,
+)
+
+DepositData = SSZType({
+    'pubkey': 'bytes48',
+    'withdrawal_credentials': 'bytes32',
+    'amount': 'uint64',
+    'signature': 'bytes96',
+})
+
+
+def generic_leaf_roots(data):
+    # the per-object path: build a DepositData and merkleize it with minimal_ssz
+    roots = []
+    for i in range(0, len(data), DEPOSIT_DATA_LENGTH):
+        deposit_data = DepositData(
+            pubkey=data[i + PUBKEY_OFFSET:i + WITHDRAWAL_CREDENTIALS_OFFSET],
+            withdrawal_credentials=data[i + WITHDRAWAL_CREDENTIALS_OFFSET:i + AMOUNT_OFFSET],
+            amount=int.from_bytes(data[i + AMOUNT_OFFSET:i + SIGNATURE_OFFSET], 'little'),
+            signature=data[i + SIGNATURE_OFFSET:i + DEPOSIT_DATA_LENGTH],
+        )
+        roots.append(hash_tree_root(deposit_data))
+    return b''.join(roots)
+
+
+def measure(function, data, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def run_benchmark(count, repeat):
+    data = os.urandom(count * DEPOSIT_DATA_LENGTH)
+    out = bytearray(count * 32)
+    generic_roots, generic_time = measure(generic_leaf_roots, data, repeat)
+    batch_roots, batch_time = measure(lambda d: hash_deposit_data_batch(d, out), data, repeat)
+    assert bytes(batch_roots) == generic_roots
+    return {
+        'deposits': count,
+        'generic_leaves_per_second': count / generic_time,
+        'batch_leaves_per_second': count / batch_time,
+        'speedup': generic_time / batch_time,
+    }
+
+
+if __name__ == '__main__':
+    # run from the repository root: python -m tool.benchmark_leaf_hashing
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100000, help="number of deposits to hash")
+    parser.add_argument("--repeat", type=int, default=3, help="best-of repetitions")
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.count, args.repeat), indent=2))
@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import time
+
+from deposit_contract.contracts.utils import (
+    get_deposit_contract_artifact,
+)
+from deposit_contract.deposit_data import (
+    AMOUNT_LENGTH,
+    PUBKEY_LENGTH,
+    SIGNATURE_LENGTH,
+    WITHDRAWAL_CREDENTIALS_LENGTH,
+)
+from deposit_contract.encoding import (
+    MERKLE_TREE_INDEX_LENGTH,
+    decode_deposit_log_batch,
+    encode_bytes_arguments,
+)
+from eth_abi import (
+    decode_abi,
+)
+from hexbytes import (
+    HexBytes,
+)
+from web3.utils.events import (
+    get_event_data,
+)
+
+
+def make_logs(count):
+    artifact = get_deposit_contract_artifact()
+    topic = HexBytes(artifact.event_topics['Deposit'])
+    logs = []
+    for index in range(count):
+        data = encode_bytes_arguments(
+            os.urandom(PUBKEY_LENGTH),
+            os.urandom(WITHDRAWAL_CREDENTIALS_LENGTH),
+            os.urandom(AMOUNT_LENGTH),
+            os.urandom(SIGNATURE_LENGTH),
+            index.to_bytes(MERKLE_TREE_INDEX_LENGTH, 'little'),
+        )
+        # the shape of an eth_getLogs entry as returned by web3
+        logs.append({
+            'address': '0x' + '11' * 20,
+            'blockHash': HexBytes(b'\x22' * 32),
+            'blockNumber': 1,
+            'data': '0x' + data.hex(),
+            'logIndex': index,
+            'topics': [topic],
+            'transactionHash': HexBytes(b'\x33' * 32),
+            'transactionIndex': 0,
+        })
+    return logs
+
+
+def web3_decode(logs, event_abi):
+    # what ContractEvent.processReceipt() and event filters do for every log
+    return [get_event_data(event_abi, log) for log in logs]
+
+
+def eth_abi_decode(logs):
+    # the ABI decoding step of the web3 path on its own
+    types = ['bytes'] * 5
+    return [decode_abi(types, bytes.fromhex(log['data'][2:])) for log in logs]
+
+
+def fast_decode(logs):
+    return decode_deposit_log_batch(bytes.fromhex(log['data'][2:]) for log in logs)
+
+
+def measure(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def run_benchmark(count, repeat):
+    logs = make_logs(count)
+    event_abi = next(
+        item for item in get_deposit_contract_artifact().abi
+        if item['type'] == 'event' and item['name'] == 'Deposit'
+    )
+    events, web3_time = measure(lambda: web3_decode(logs, event_abi), repeat)
+    _, eth_abi_time = measure(lambda: eth_abi_decode(logs), repeat)
+    (deposit_data, indices), fast_time = measure(lambda: fast_decode(logs), repeat)
+
+    for event, row, index in zip(events, deposit_data, indices):
+        args = event['args']
+        assert row.pubkey == args['pubkey']
+        assert row.withdrawal_credentials == args['withdrawal_credentials']
+        assert row.amount == int.from_bytes(args['amount'], 'little')
+        assert row.signature == args['signature']
+        assert index == int.from_bytes(args['merkle_tree_index'], 'little')
+    return {
+        'logs': count,
+        'web3_logs_per_second': count / web3_time,
+        'eth_abi_logs_per_second': count / eth_abi_time,
+        'fast_logs_per_second': count / fast_time,
+        'speedup_over_web3': web3_time / fast_time,
+        'speedup_over_eth_abi': eth_abi_time / fast_time,
+    }
+
+
+if __name__ == '__main__':
+    # run from the repository root: python -m tool.benchmark_log_decoding
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=10000, help="number of logs to decode")
+    parser.add_argument("--repeat", type=int, default=3, help="best-of repetitions")
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.count, args.repeat), indent=2))
@@ -0,0 +1,109 @@
+import argparse
+import json
+
+from deposit_contract.bulk_deposit import (
+    BulkDepositDriver,
+    make_deposit,
+)
+from deposit_contract.contracts.builder import (
+    get_contract_constants,
+)
+from deposit_contract.contracts.utils import (
+    DEPOSIT_CONTRACT_NAME,
+    OPTIMIZED_DEPOSIT_CONTRACT_NAME,
+    get_contract_artifact,
+)
+from eth_tester import (
+    PyEVMBackend,
+)
+
+# index + 1 ending in h zero bits makes deposit() hash h branch levels; 65535 is the
+# deposit that reaches the chain start threshold and emits Eth2Genesis
+DEFAULT_INDICES = [0, 1, 2, 3, 7, 255, 65535, 2**20 - 1, 2**31 - 1, 2**32 - 2]
+DEFAULT_COUNTS = [0, 2**16, 2**32 - 1]
+
+
+def measure_gas(driver, send):
+    gas_used = driver.gas_used
+    send()
+    return driver.gas_used - gas_used
+
+
+def measure_contract(contract_name, indices, counts):
+    constants = get_contract_constants()
+    driver = BulkDepositDriver(PyEVMBackend())
+    bytecode = get_contract_artifact(contract_name).bytecode
+    gas = {'deploy': measure_gas(driver, lambda: driver.deploy(bytecode))}
+    for index in indices:
+        # a fresh seed per deposit, so every deposit sees the storage of a real chain
+        driver.seed_deposit_count(index, constants['CHAIN_START_FULL_DEPOSIT_THRESHOLD'])
+        deposit = make_deposit(index, constants['FULL_DEPOSIT_AMOUNT'])
+        gas['deposit[%d]' % index] = measure_gas(driver, lambda: driver.deposit(*deposit))
+    for count in counts:
+        driver.seed_deposit_count(count, constants['CHAIN_START_FULL_DEPOSIT_THRESHOLD'])
+        gas['get_deposit_root[%d]' % count] = measure_gas(
+            driver, lambda: driver.call('get_deposit_root'),
+        )
+    gas['get_deposit_count'] = measure_gas(driver, lambda: driver.call('get_deposit_count'))
+    return gas
+
+
+def compare_deposit_gas(indices=DEFAULT_INDICES,
+                        counts=DEFAULT_COUNTS,
+                        baseline=DEPOSIT_CONTRACT_NAME,
+                        candidate=OPTIMIZED_DEPOSIT_CONTRACT_NAME):
+    baseline_gas = measure_contract(baseline, indices, counts)
+    candidate_gas = measure_contract(candidate, indices, counts)
+    rows = []
+    for name, gas in baseline_gas.items():
+        saved = gas - candidate_gas[name]
+        rows.append({
+            'name': name,
+            baseline: gas,
+            candidate: candidate_gas[name],
+            'saved': saved,
+            'saved_percent': 100.0 * saved / gas,
+        })
+    return rows
+
+
+def format_report(rows, baseline, candidate):
+    header = '%-28s %12s %12s %9s %8s' % ('', 'baseline', 'candidate', 'saved', 'saved %')
+    lines = ["baseline: %s, candidate: %s" % (baseline, candidate), header]
+    for row in rows:
+        lines.append('%-28s %12d %12d %9d %7.2f%%' % (
+            row['name'], row[baseline], row[candidate], row['saved'], row['saved_percent'],
+        ))
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    # run from the repository root: python -m tool.compare_deposit_gas
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--indices",
+        type=int,
+        nargs='+',
+        default=DEFAULT_INDICES,
+        help="deposit indices to measure, each reached by seeding contract storage",
+    )
+    parser.add_argument(
+        "--counts",
+        type=int,
+        nargs='+',
+        default=DEFAULT_COUNTS,
+        help="deposit counts to measure get_deposit_root() at",
+    )
+    parser.add_argument("--baseline", default=DEPOSIT_CONTRACT_NAME, help="contract name")
+    parser.add_argument(
+        "--candidate",
+        default=OPTIMIZED_DEPOSIT_CONTRACT_NAME,
+        help="contract name",
+    )
+    parser.add_argument("--json", action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+    rows = compare_deposit_gas(args.indices, args.counts, args.baseline, args.candidate)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(format_report(rows, args.baseline, args.candidate))
@@ -2,8 +2,8 @@ import argparse
 import json
 import os
 
-from vyper import (
-    compiler,
+from deposit_contract.contracts.utils import (
+    compile_contract,
 )
 
 DIR = os.path.dirname(__file__)
@@ -11,11 +11,10 @@ DIR = os.path.dirname(__file__)
 
 def generate_compiled_json(file_path: str):
     deposit_contract_code = open(file_path).read()
-    abi = compiler.mk_full_signature(deposit_contract_code)
-    bytecode = compiler.compile_code(deposit_contract_code)['bytecode']
+    compiled = compile_contract(deposit_contract_code)
     contract_json = {
-        'abi': abi,
-        'bytecode': bytecode,
+        'abi': compiled['abi'],
+        'bytecode': compiled['bytecode'],
     }
     # write json
     basename = os.path.basename(file_path)
@@ -0,0 +1,328 @@
+import argparse
+from concurrent.futures import (
+    ThreadPoolExecutor,
+)
+import json
+import math
+import random
+import threading
+import time
+
+from deposit_contract.contracts.builder import (
+    get_contract_constants,
+)
+from deposit_contract.contracts.utils import (
+    get_deposit_contract_artifact,
+)
+from eth_tester import (
+    EthereumTester,
+    PyEVMBackend,
+)
+from eth_utils import (
+    to_canonical_address,
+)
+from web3 import Web3
+from web3.providers.eth_tester import (
+    EthereumTesterProvider,
+)
+
+AMOUNT_DISTRIBUTIONS = ('full', 'min', 'uniform')
+DEPOSIT_GAS = 300000
+GWEI = 10**9  # wei
+
+
+class SerializedEthereumTesterProvider(EthereumTesterProvider):
+    """
+    eth-tester is not thread-safe, so every request goes through one lock.
+    """
+
+    def __init__(self, ethereum_tester, lock):
+        super().__init__(ethereum_tester)
+        self.lock = lock
+
+    def make_request(self, method, params):
+        with self.lock:
+            return super().make_request(method, params)
+
+
+class BatchMiningEthereumTester(EthereumTester):
+    """
+    With ``batch_mining`` set, sent transactions are applied to the pending block and
+    mining is left to the caller.
+
+    eth-tester either mines a block per transaction or, with auto-mining disabled,
+    executes every transaction on a snapshot and re-imports the latest block to
+    revert it, which costs more than the deposit itself.
+    """
+
+    batch_mining = False
+
+    def send_transaction(self, transaction):
+        if not self.batch_mining:
+            return super().send_transaction(transaction)
+        if 'nonce' not in transaction:
+            # the backend would take the nonce from the latest mined block, so several
+            # transactions from one account in the pending block would collide
+            account_db = self.backend.chain.get_vm().state.account_db
+            nonce = account_db.get_nonce(to_canonical_address(transaction['from']))
+            transaction = dict(transaction, nonce=nonce)
+        return self._add_transaction_to_pending_block(transaction)
+
+
+class BlockProducer(threading.Thread):
+    """
+    Mine an eth-tester block once ``block_size`` transactions are pending, once the
+    oldest pending transaction has waited ``block_interval`` seconds, or before a
+    transaction of ``transaction_gas`` would overflow the block gas limit.
+
+    Senders wait for the block holding their transaction instead of polling for the
+    receipt: eth-tester scans every block for a transaction it has not mined yet.
+    """
+
+    def __init__(self, tester, lock, block_size, block_interval, transaction_gas):
+        super().__init__(daemon=True)
+        self.tester = tester
+        self.lock = lock
+        self.block_size = block_size
+        self.block_interval = block_interval
+        self.transaction_gas = transaction_gas
+        self.condition = threading.Condition()
+        self.pending = 0
+        self.first_pending_time = None
+        self.blocks_mined = 0
+        self.stopped = False
+
+    def submit(self, send):
+        """
+        Send a transaction with ``send()`` and return its result once it is mined.
+        """
+        # sending and counting happen together, so a block never takes a transaction
+        # that has not been counted yet
+        with self.condition:
+            header = self.tester.backend.chain.header
+            if self.pending and header.gas_limit - header.gas_used < self.transaction_gas:
+                self.mine_block()
+            result = send()
+            if self.pending == 0:
+                self.first_pending_time = time.monotonic()
+            self.pending += 1
+            block = self.blocks_mined
+            self.condition.notify_all()
+            while self.blocks_mined == block:
+                self.condition.wait()
+            return result
+
+    def mine_block(self):
+        # called with the condition held
+        with self.lock:
+            self.tester.mine_blocks(1)
+        self.pending = 0
+        self.blocks_mined += 1
+        self.condition.notify_all()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def run(self):
+        with self.condition:
+            while not self.stopped:
+                timeout = None
+                if self.pending:
+                    timeout = self.first_pending_time + self.block_interval - time.monotonic()
+                    if self.pending >= self.block_size or timeout <= 0:
+                        self.mine_block()
+                        continue
+                self.condition.wait(timeout)
+
+
+def random_bytes(rng, length):
+    return rng.getrandbits(8 * length).to_bytes(length, 'big')
+
+
+def random_deposit(rng, distribution, constants):
+    if distribution == 'full':
+        amount = constants['FULL_DEPOSIT_AMOUNT']
+    elif distribution == 'min':
+        amount = constants['MIN_DEPOSIT_AMOUNT']
+    else:
+        amount = rng.randint(constants['MIN_DEPOSIT_AMOUNT'], constants['FULL_DEPOSIT_AMOUNT'])
+    return (
+        random_bytes(rng, constants['PUBKEY_LENGTH']),
+        random_bytes(rng, constants['WITHDRAWAL_CREDENTIALS_LENGTH']),
+        amount,
+        random_bytes(rng, constants['SIGNATURE_LENGTH']),
+    )
+
+
+def percentile(sorted_values, fraction):
+    # nearest-rank percentile
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def gas_histogram(gas_values, bucket_size):
+    histogram = {}
+    for gas in gas_values:
+        bucket = gas - gas % bucket_size
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+    return {str(bucket): histogram[bucket] for bucket in sorted(histogram)}
+
+
+def wait_for_receipt(w3, tx_hash, poll_interval):
+    while True:
+        receipt = w3.eth.getTransactionReceipt(tx_hash)
+        if receipt is not None and receipt['blockNumber'] is not None:
+            return receipt
+        time.sleep(poll_interval)
+
+
+def deploy_contract(w3):
+    artifact = get_deposit_contract_artifact()
+    contract = w3.eth.contract(abi=artifact.abi, bytecode=artifact.bytecode_hex)
+    tx_hash = contract.constructor().transact({'from': w3.eth.accounts[0]})
+    receipt = w3.eth.waitForTransactionReceipt(tx_hash)
+    return w3.eth.contract(address=receipt['contractAddress'], abi=artifact.abi)
+
+
+def run_load(target='eth-tester',
+             deposits=1000,
+             concurrency=8,
+             amount_distribution='full',
+             block_size=20,
+             block_interval=0.05,
+             poll_interval=0.005,
+             gas_bucket_size=1000,
+             seed=0):
+    constants = get_contract_constants()
+    lock = threading.Lock()
+    if target == 'eth-tester':
+        tester = BatchMiningEthereumTester(PyEVMBackend())
+        w3 = Web3(SerializedEthereumTesterProvider(tester, lock))
+    else:
+        tester = None
+        w3 = Web3(Web3.HTTPProvider(target))
+    # deployed while eth-tester still mines every transaction on its own
+    contract = deploy_contract(w3)
+    accounts = w3.eth.accounts
+    start_block = w3.eth.blockNumber
+
+    producer = None
+    if tester is not None:
+        tester.batch_mining = True
+        producer = BlockProducer(tester, lock, block_size, block_interval, DEPOSIT_GAS)
+        producer.start()
+
+    rng = random.Random(seed)
+    deposit_args = [
+        random_deposit(rng, amount_distribution, constants) for _ in range(deposits)
+    ]
+
+    def send_deposit(index):
+        pubkey, withdrawal_credentials, amount, signature = deposit_args[index]
+
+        def send():
+            return contract.functions.deposit(
+                pubkey,
+                withdrawal_credentials,
+                signature,
+            ).transact({
+                'from': accounts[index % len(accounts)],
+                'value': amount * GWEI,
+                'gas': DEPOSIT_GAS,
+            })
+        submitted = time.perf_counter()
+        tx_hash = send() if producer is None else producer.submit(send)
+        receipt = wait_for_receipt(w3, tx_hash, poll_interval)
+        return time.perf_counter() - submitted, receipt
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = list(executor.map(send_deposit, range(deposits)))
+    finally:
+        if producer is not None:
+            producer.stop()
+            producer.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    gas_values = [receipt['gasUsed'] for _, receipt in results]
+    return {
+        'target': target,
+        'deposits': deposits,
+        'failed': sum(1 for _, receipt in results if receipt['status'] != 1),
+        'concurrency': concurrency,
+        'amount_distribution': amount_distribution,
+        'block_size': block_size if tester is not None else None,
+        'blocks': w3.eth.blockNumber - start_block,
+        'wall_time_seconds': elapsed,
+        'deposits_per_second': deposits / elapsed,
+        'latency_seconds': {
+            'p50': percentile(latencies, 0.5),
+            'p99': percentile(latencies, 0.99),
+            'max': latencies[-1],
+        },
+        'gas_per_deposit': {
+            'min': min(gas_values),
+            'mean': sum(gas_values) / len(gas_values),
+            'max': max(gas_values),
+            'bucket_size': gas_bucket_size,
+            'histogram': gas_histogram(gas_values, gas_bucket_size),
+        },
+    }
+
+
+if __name__ == '__main__':
+    # run from the repository root: python -m tool.deposit_load_generator
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--target",
+        default='eth-tester',
+        help="'eth-tester' for an in-process chain, or the URL of a JSON-RPC node "
+        "with unlocked accounts",
+    )
+    parser.add_argument("--deposits", type=int, default=1000, help="number of deposits")
+    parser.add_argument("--concurrency", type=int, default=8, help="deposits in flight")
+    parser.add_argument(
+        "--amount-distribution",
+        choices=AMOUNT_DISTRIBUTIONS,
+        default='full',
+        help="full or minimum deposits, or amounts drawn uniformly between the two",
+    )
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=20,
+        help="eth-tester only: deposits per mined block; about 25 fit under the "
+        "default block gas limit",
+    )
+    parser.add_argument(
+        "--block-interval",
+        type=float,
+        default=0.05,
+        help="eth-tester only: longest wait in seconds before a partial block is mined",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.005,
+        help="JSON-RPC only: seconds between receipt polls",
+    )
+    parser.add_argument("--gas-bucket-size", type=int, default=1000, help="histogram bucket")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for deposit data")
+    args = parser.parse_args()
+    if min(args.deposits, args.concurrency, args.block_size) < 1:
+        parser.error("--deposits, --concurrency and --block-size must be positive")
+    result = run_load(
+        target=args.target,
+        deposits=args.deposits,
+        concurrency=args.concurrency,
+        amount_distribution=args.amount_distribution,
+        block_size=args.block_size,
+        block_interval=args.block_interval,
+        poll_interval=args.poll_interval,
+        gas_bucket_size=args.gas_bucket_size,
+        seed=args.seed,
+    )
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,207 @@
+import argparse
+import bisect
+import os
+import re
+
+from deposit_contract.bulk_deposit import (
+    BulkDepositDriver,
+    make_deposit,
+)
+from deposit_contract.contracts.builder import (
+    get_contract_constants,
+)
+from deposit_contract.contracts.utils import (
+    DIR as CONTRACTS_DIR,
+    compile_contract,
+)
+
+DEFAULT_CONTRACT_PATH = os.path.join(CONTRACTS_DIR, 'validator_registration.v.py')
+FUNCTION_PATTERN = re.compile(r'^def (\w+)\(')
+DISPATCHER_FRAME = '<dispatcher>'
+
+
+class SourceMap:
+    """
+    Map runtime program counters of a Vyper contract to source lines.
+
+    The compiler only records a position for instructions that start a source
+    construct, so a pc is attributed to the nearest recorded pc at or before it.
+    """
+
+    def __init__(self, contract_code, pc_pos_map):
+        self.lines = contract_code.splitlines()
+        self.pcs = sorted(pc_pos_map)
+        self.line_numbers = [pc_pos_map[pc][0] for pc in self.pcs]
+        self.functions = []
+        function = None
+        for line in self.lines:
+            match = FUNCTION_PATTERN.match(line)
+            if match:
+                function = match.group(1)
+            self.functions.append(function)
+
+    @classmethod
+    def from_code(cls, contract_code):
+        from vyper import compiler
+        source_map = compiler.compile_code(contract_code, ['source_map'])['source_map']
+        return cls(contract_code, source_map['pc_pos_map'])
+
+    def get_line_number(self, pc):
+        position = bisect.bisect_right(self.pcs, pc) - 1
+        if position < 0:
+            return None
+        return self.line_numbers[position]
+
+    def get_frame(self, pc):
+        line_number = self.get_line_number(pc)
+        if line_number is None:
+            return DISPATCHER_FRAME
+        source = self.lines[line_number - 1].strip()
+        function = self.functions[line_number - 1] or '<module>'
+        # ';' separates frames in the folded stack format
+        return '%s:%d %s' % (function, line_number, source.replace(';', ','))
+
+
+class GasTracer:
+    """
+    Record the gas of every opcode executed by a py-evm computation class.
+
+    A CALL is charged only the gas it uses itself (including precompiles such as
+    SHA-256); the gas used by the code it calls is recorded against that code's own
+    opcodes, under a stack holding the pc of every enclosing CALL.
+    """
+
+    def __init__(self):
+        self.records = []  # (call stack, pc, mnemonic, gas)
+        self.call_stack = []
+        self.child_gas = [0]
+
+    def wrap(self, opcode_fn):
+        def traced(computation):
+            pc = max(0, computation.code.pc - 1)
+            gas_remaining = computation.get_gas_remaining()
+            self.call_stack.append(pc)
+            self.child_gas.append(0)
+            try:
+                opcode_fn(computation=computation)
+            finally:
+                self.call_stack.pop()
+                child_gas = self.child_gas.pop()
+                gas_used = gas_remaining - computation.get_gas_remaining()
+                self.child_gas[-1] += gas_used
+                self.records.append(
+                    (tuple(self.call_stack), pc, opcode_fn.mnemonic, gas_used - child_gas)
+                )
+        traced.mnemonic = opcode_fn.mnemonic
+        return traced
+
+    def trace(self, state_class):
+        computation_class = state_class.computation_class
+        traced_class = type(
+            'Traced' + computation_class.__name__,
+            (computation_class,),
+            {
+                'opcodes': {
+                    opcode: self.wrap(opcode_fn)
+                    for opcode, opcode_fn in computation_class.opcodes.items()
+                },
+            },
+        )
+        return TracedStateClass(state_class, traced_class)
+
+
+class TracedStateClass:
+    """
+    Context manager that runs ``state_class`` with a traced computation class.
+    """
+
+    def __init__(self, state_class, computation_class):
+        self.state_class = state_class
+        self.computation_class = computation_class
+        self.original_computation_class = None
+
+    def __enter__(self):
+        self.original_computation_class = self.state_class.computation_class
+        self.state_class.computation_class = self.computation_class
+
+    def __exit__(self, *exc_info):
+        self.state_class.computation_class = self.original_computation_class
+
+
+def hotspots(records, source_map):
+    lines = {}
+    for _, pc, _, gas in records:
+        frame = source_map.get_frame(pc)
+        gas_total, steps = lines.get(frame, (0, 0))
+        lines[frame] = (gas_total + gas, steps + 1)
+    return sorted(lines.items(), key=lambda item: item[1][0], reverse=True)
+
+
+def folded_stacks(records, source_map, root_frame):
+    stacks = {}
+    for call_stack, pc, _, gas in records:
+        frames = [root_frame] + [source_map.get_frame(caller) for caller in call_stack]
+        frames.append(source_map.get_frame(pc))
+        stack = ';'.join(frames)
+        stacks[stack] = stacks.get(stack, 0) + gas
+    return ['%s %d' % (stack, gas) for stack, gas in sorted(stacks.items()) if gas > 0]
+
+
+def format_hotspots(hotspots, total_gas, limit):
+    rows = ['%10s %7s %7s  %s' % ('gas', '%', 'steps', 'line')]
+    for frame, (gas, steps) in hotspots[:limit]:
+        rows.append('%10d %6.2f%% %7d  %s' % (gas, 100.0 * gas / total_gas, steps, frame))
+    return '\n'.join(rows)
+
+
+def profile_deposit(contract_path=DEFAULT_CONTRACT_PATH, index=0):
+    with open(contract_path) as f:
+        contract_code = f.read()
+    constants = get_contract_constants(contract_code)
+    compiled = compile_contract(contract_code)
+    source_map = SourceMap.from_code(contract_code)
+
+    from eth_tester import PyEVMBackend
+    driver = BulkDepositDriver(PyEVMBackend())
+    driver.deploy(bytes.fromhex(compiled['bytecode'][2:]))
+    if index:
+        driver.seed_deposit_count(index, constants['CHAIN_START_FULL_DEPOSIT_THRESHOLD'])
+
+    tracer = GasTracer()
+    gas_used = driver.gas_used
+    with tracer.trace(driver.chain.get_vm().get_state_class()):
+        driver.deposit(*make_deposit(index, constants['FULL_DEPOSIT_AMOUNT']))
+    return tracer.records, source_map, driver.gas_used - gas_used
+
+
+if __name__ == '__main__':
+    # run from the repository root: python -m tool.profile_deposit_gas
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--contract",
+        default=DEFAULT_CONTRACT_PATH,
+        help="the path of the Vyper contract to profile",
+    )
+    parser.add_argument(
+        "--index",
+        type=int,
+        default=0,
+        help="profile the deposit at this index, reached by seeding contract storage",
+    )
+    parser.add_argument("--top", type=int, default=25, help="number of hotspot lines to print")
+    parser.add_argument(
+        "--flamegraph",
+        default='deposit_gas.folded',
+        help="output path for folded stacks weighted by gas (flamegraph.pl, speedscope)",
+    )
+    args = parser.parse_args()
+
+    records, source_map, gas_used = profile_deposit(args.contract, args.index)
+    execution_gas = sum(gas for _, _, _, gas in records)
+    print("deposit[%d]: %d gas used, %d in contract execution, %d steps" % (
+        args.index, gas_used, execution_gas, len(records),
+    ))
+    print(format_hotspots(hotspots(records, source_map), execution_gas, args.top))
+    with open(args.flamegraph, 'w') as f:
+        f.write('\n'.join(folded_stacks(records, source_map, 'deposit')) + '\n')
+    print("Wrote %s" % args.flamegraph)
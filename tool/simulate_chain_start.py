@@ -0,0 +1,85 @@
+import argparse
+import json
+import time
+
+from deposit_contract.bulk_deposit import (
+    BulkDepositDriver,
+)
+from deposit_contract.contracts.builder import (
+    build_deposit_contract,
+    get_contract_constants,
+)
+from eth_tester import (
+    PyEVMBackend,
+)
+
+
+def simulate_chain_start(threshold=None, fast_forward=0):
+    """
+    Send deposits through ``deposit()``, many per block, until the contract logs
+    ``Eth2Genesis`` and check the log against the deposits made.
+
+    ``fast_forward`` is a shortcut for quick runs: that many deposits are written
+    straight into contract storage from the off-chain tree first, so the genesis
+    check covers only the deposits sent afterwards.
+
+    With the production bytecode, a full run of 65,536 deposits takes about 1 h 50 min
+    at 10 deposits/s on py-evm 0.2.0a28. Nearly all of that time is spent in the
+    interpreter executing ``deposit()`` itself.
+    """
+    constants = get_contract_constants()
+    if threshold is None:
+        # the production bytecode from the checked-in artifact
+        bytecode = None
+        threshold = constants['CHAIN_START_FULL_DEPOSIT_THRESHOLD']
+    else:
+        compiled = build_deposit_contract(CHAIN_START_FULL_DEPOSIT_THRESHOLD=threshold)
+        bytecode = bytes.fromhex(compiled['bytecode'][2:])
+
+    amount = constants['FULL_DEPOSIT_AMOUNT']
+    start = time.perf_counter()
+    driver = BulkDepositDriver(PyEVMBackend(), full_deposit_amount=amount)
+    driver.deploy(bytecode)
+    if fast_forward:
+        driver.fast_forward(fast_forward, amount)
+    send_start = time.perf_counter()
+    driver.run_until_genesis(amount, threshold)
+    end = time.perf_counter()
+    driver.check_genesis()
+    sent = len(driver.tree) - fast_forward
+    return {
+        'deposits': len(driver.tree),
+        'sent_deposits': sent,
+        'fast_forwarded_deposits': fast_forward,
+        'genesis_checked_against': 'sent deposits only' if fast_forward else 'all deposits',
+        'blocks': driver.blocks_mined,
+        'gas_used': driver.gas_used,
+        'wall_time_seconds': end - start,
+        'setup_seconds': send_start - start,
+        'send_seconds': end - send_start,
+        'deposits_per_second': sent / (end - send_start),
+        'deposit_root': '0x' + driver.genesis['deposit_root'].hex(),
+        'genesis_time': driver.genesis['time'],
+    }
+
+
+if __name__ == '__main__':
+    # run from the repository root: python -m tool.simulate_chain_start
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--threshold",
+        type=int,
+        default=None,
+        help="compile a variant with this CHAIN_START_FULL_DEPOSIT_THRESHOLD "
+        "instead of using the production bytecode",
+    )
+    parser.add_argument(
+        "--fast-forward",
+        type=int,
+        default=0,
+        help="shortcut: write this many deposits straight into contract storage before "
+        "sending the rest through deposit(); Eth2Genesis is then only checked against "
+        "the deposits sent (default: send every deposit)",
+    )
+    args = parser.parse_args()
+    print(json.dumps(simulate_chain_start(args.threshold, args.fast_forward), indent=2))